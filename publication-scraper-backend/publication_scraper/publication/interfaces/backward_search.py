@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Optional
 
-from ..models import Publication, PublicationReference, PublicationReferenceType
+from ..models import Publication, PublicationReferenceType
 from .snowballing_search import SnowballingSearch
 
 
@@ -8,10 +8,11 @@ class BackwardSearch(SnowballingSearch):
     def __init__(
         self, 
         publications: List[Publication], 
-        show_metadata: bool = False
+        show_metadata: bool = False,
+        max_edges: Optional[int] = None
     ):
         """ Initialize the backward search. """
-        super().__init__()
+        super().__init__(max_edges=max_edges)
         self.publications = publications
         self.show_metadata = show_metadata
         self.load_publications()
@@ -36,6 +37,10 @@ class BackwardSearch(SnowballingSearch):
         """
         Performs a backward search, acquiring all papers citing the given paper(s).
         """
+        paper_dois = [result["doi"] for result in self.results if result["doi"]]
+        references = self.get_references(paper_dois, [PublicationReferenceType.CITATION])
+
+        seed_citations = []
         for i in range(len(self.results)):
           publication = self.results[i]
           paper_doi = publication["doi"]
@@ -44,29 +49,13 @@ class BackwardSearch(SnowballingSearch):
             print(f"WARNING: Paper with title {publication['title']} does not have a DOI. Skipping.")
             continue
           
-          sch_paper = self.sch.get_paper(paper_doi)
-          if sch_paper.citations is None or sch_paper.citationCount == 0:
+          citations = references.get(paper_doi)
+          if not citations:
             print(f"Skipped Paper | No citations: {publication['title']}")
             continue
-          
-          references = sch_paper.citations
-          for referenced_paper in references:
-            if referenced_paper.externalIds is None: 
-                continue
 
-            citation = PublicationReference(
-                src = self.publications[i],
-                src_doi = paper_doi,
-                ref_paper_title = referenced_paper.title,
-                ref_doi = referenced_paper.externalIds.get("DOI"),
-                ref_url = referenced_paper.url,
-                type = PublicationReferenceType.CITATION
-            )
-              
-            citation_publication = self.post_process_results(citation)
-            if citation_publication is None:
-                continue
-            citation_publication = self._get_publication_data(citation_publication, self.show_metadata)
-            self.results[i]["citations"].append(citation_publication)
-            
+          seed_citations.append((i, citations))
+        
+        # Resolve the citations of all seeds at once
+        self.attach_references(seed_citations, "citations")
         return self.results
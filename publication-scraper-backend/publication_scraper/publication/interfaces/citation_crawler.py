@@ -0,0 +1,181 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from utils import Profiler
+from utils.logger import Logger
+
+from ..models import Publication, PublicationReference, PublicationReferenceType
+from .snowballing_search import SnowballingSearch
+
+log = Logger(__name__)
+
+class CrawlDirection:
+    FORWARD = 'forward'
+    BACKWARD = 'backward'
+    BOTH = 'both'
+
+
+class CitationCrawler(SnowballingSearch):
+    """
+    Breadth-first crawler over the citation graph of the given seed publications.
+
+    Each level of the frontier is fetched concurrently from Semantic Scholar, a visited set
+    prevents cycles and repeat fetches, and each level is written to the database in bulk.
+    Crawling stops at `depth` hops or once `max_nodes` papers (seeds included) are visited.
+    Seeds without metadata are skipped and reported.
+
+    Example Usage:
+
+        crawler = CitationCrawler(publications, depth=2, direction=CrawlDirection.BOTH, max_nodes=2000)
+        graph = crawler.search()
+    """
+
+    def __init__(
+        self,
+        publications: List[Publication],
+        depth: int = 1,
+        direction: str = CrawlDirection.FORWARD,
+        max_nodes: int = 1000,
+        max_workers: int = 8,
+        show_metadata: bool = False,
+        max_edges: Optional[int] = None
+    ):
+        """ Initialize the citation crawler. """
+        super().__init__(max_edges=max_edges)
+        self.publications, self.skipped = self.split_seeds(publications)
+        self.depth = depth
+        self.direction = direction
+        self.max_nodes = max_nodes
+        self.max_workers = max_workers
+        self.show_metadata = show_metadata
+        self.nodes: List[Dict[str, Any]] = []
+        self.edges: List[Dict[str, Any]] = []
+        self.load_publications()
+
+    def load_publications(self):
+        """ Serialize the seed publications. """
+
+        for publication in self.publications:
+            self.results.append({
+                "title": publication.paper_title,
+                "doi": publication.metadata.doi,
+                **self._get_publication_data(publication, self.show_metadata)
+            })
+
+    @Profiler("Citation Crawler - Crawling")
+    def search(self) -> Dict[str, Any]:
+        """
+        Crawl the citation graph breadth-first.
+
+        Returns the seeds, every discovered node with the level it was first reached at,
+        and every edge found between visited nodes, along with the paper ids of the skipped seeds.
+        """
+        frontier: List[str] = [publication.metadata.doi for publication in self.publications if publication.metadata.doi]
+        visited = {doi.lower() for doi in frontier}
+
+        for level in range(1, self.depth + 1):
+            if not frontier:
+                break
+
+            log.info(f"Crawling level {level}: {len(frontier)} papers, {len(visited)}/{self.max_nodes} visited.")
+            references = self._fetch_level(frontier)
+
+            # Only keep edges to papers within the node budget
+            new_dois = []
+            level_references = []
+            for reference in references:
+                ref_doi = reference.ref_doi.lower()
+                if ref_doi not in visited:
+                    if len(visited) >= self.max_nodes:
+                        continue
+                    visited.add(ref_doi)
+                    new_dois.append(ref_doi)
+                level_references.append(reference)
+
+            publications = self.expand_references(level_references)
+            frontier = self._record_level(level, new_dois, level_references, publications)
+
+        log.info(f"Crawled {len(self.nodes)} papers and {len(self.edges)} edges.")
+        return {
+            "seeds": self.results,
+            "nodes": self.nodes,
+            "edges": self.edges,
+            "skipped": self.skipped,
+        }
+
+    def _fetch_level(self, frontier: List[str]) -> List[PublicationReference]:
+        """ Get the edges of every paper in the frontier, from the edge table or Semantic Scholar. """
+
+        references = self.get_references(frontier, self._reference_types())
+        return [reference for edges in references.values() for reference in edges]
+
+    def fetch_all_references(
+        self,
+        paper_dois: List[str],
+        reference_types: List[PublicationReferenceType]
+    ) -> Dict[str, List[PublicationReference]]:
+        """
+        Fetch the edges of the given papers concurrently.
+        Papers whose lookup fails are left out, so they are not stored as expanded.
+        """
+
+        # The Semantic Scholar client runs its requests on the thread's event loop
+        def init_worker():
+            asyncio.set_event_loop(asyncio.new_event_loop())
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, initializer=init_worker) as executor:
+            results = executor.map(lambda doi: self._fetch_node(doi, reference_types), paper_dois)
+            return {
+                doi: references 
+                for doi, references in zip(paper_dois, results) 
+                if references is not None
+            }
+
+    def _fetch_node(self, paper_doi: str, reference_types: List[PublicationReferenceType]) -> Optional[List[PublicationReference]]:
+        """ Fetch the edges of a single paper, returning None if the lookup fails. """
+
+        try:
+            return self.fetch_references(paper_doi, reference_types)
+        except Exception as e:
+            log.error(f"Failed to fetch references of {paper_doi}: {e}")
+            return None
+
+    def _record_level(
+        self,
+        level: int,
+        new_dois: List[str],
+        references: List[PublicationReference],
+        publications: Dict[str, Publication]
+    ) -> List[str]:
+        """ Record the nodes and edges of a level, returning the frontier of the next one. """
+
+        for reference in references:
+            if self._get_reference_id(reference) in publications:
+                self.edges.append({
+                    "src_doi": reference.src_doi,
+                    "dst_doi": reference.ref_doi,
+                    "type": PublicationReferenceType(reference.type).value,
+                })
+
+        by_doi = {paper_id.lower(): publication for paper_id, publication in publications.items()}
+        frontier = []
+        for doi in new_dois:
+            publication = by_doi.get(f"doi:{doi}")
+            if publication is None:
+                continue
+            self.nodes.append({
+                "depth": level,
+                **self._get_publication_data(publication, self.show_metadata)
+            })
+            frontier.append(publication.metadata.doi or doi)
+        return frontier
+
+    def _reference_types(self) -> List[PublicationReferenceType]:
+        """ Edge types to follow for the crawl direction. """
+
+        if self.direction == CrawlDirection.FORWARD:
+            return [PublicationReferenceType.REFERENCE]
+        if self.direction == CrawlDirection.BACKWARD:
+            return [PublicationReferenceType.CITATION]
+        return [PublicationReferenceType.REFERENCE, PublicationReferenceType.CITATION]
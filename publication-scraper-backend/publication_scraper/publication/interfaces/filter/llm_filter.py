@@ -1,10 +1,22 @@
-from typing import List, Tuple, Union
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.prompts import PromptTemplate
 from langchain_core.pydantic_v1 import BaseModel
-from publication.interfaces.llm.azure import AzureLLM
-from publication.models import Publication, PublicationMetadata
+from langchain_core.runnables import Runnable
+from publication.interfaces.filter.prescreen import LexicalPrescreen, PrescreenDecision
+from publication.interfaces.filter.prompt_builder import ScreeningPromptBuilder
+from publication.interfaces.filter.usage import ScreeningUsage
+from publication.interfaces.llm.backend import LLMBackend, get_backend, get_batch_client
+from publication.interfaces.llm.batch import BatchClient
+from publication.interfaces.llm.rate_limit import TokenRateLimiter
+from publication.models import Publication, PublicationMetadata, ScreeningDecision
 from utils import Logger
 
 log = Logger(__name__)
@@ -13,6 +25,7 @@ class FilterResponse(BaseModel):
     id: str
     question: str
     answer: str
+    confidence: Optional[float] = None
 
 
 class LLMFilterResponse(BaseModel):
@@ -20,64 +33,591 @@ class LLMFilterResponse(BaseModel):
     response: List[FilterResponse]
 
 
+class LLMFilterBatchResponse(BaseModel):
+    results: List[LLMFilterResponse]
+
+
+class ScreeningTier(NamedTuple):
+    backend: LLMBackend
+    chain: Runnable
+
+
 class LLMFilter:
-    def __init__(self):
-        self.prompt = "Ask a question about the paper: {paper_data}\nQuestion and Answers: {qna}\n{format_instructions}"
-        self.model = AzureLLM()
-        self.llm = self.model.llm
+    """
+    Screens papers against the review questions with the LLM.
+
+    The chain is built once and papers are screened concurrently through `ainvoke`, at most
+    `max_concurrency` at a time and within the `tokens_per_minute` quota of the deployment.
+    Each call is retried up to `max_retries` times; papers that still fail are reported
+    with an `error` instead of aborting the run.
+
+    With a `token_budget`, several papers are packed into each call up to that many prompt
+    tokens, and the answers are split back into one response per paper.
+
+    Answers are stored as ScreeningDecisions, so reruns only send the (paper, question)
+    pairs that were never answered by this model and prompt version.
+
+    With a `cascade` of backends, cheapest first, every tier answers the questions the
+    previous tier gave less than `escalation_confidence` on, and the last tier has the final
+    say. Every answer notes the `tier` that gave it, and every result the highest tier used.
+
+    With `batch`, the calls of every tier are written to a JSONL file in the batch format of
+    the provider and submitted as one batch job, polled every `batch_poll_seconds` until done;
+    failed calls are submitted again in a new batch. Every batch is passed to `on_batch` once
+    submitted (its id, tier, file path and the papers and questions of each call) and again
+    once its answers are collected, so the caller can persist it; `collect_batch` collects a
+    batch submitted by a run that was interrupted before it could.
+    Batches trade latency for throughput and price, so they suit large offline runs.
+
+    The tokens, latency, attempts and cost of every call are collected in `usage` and stored
+    as a ScreeningRun (`run`) once the run completes; every LLM result notes its share.
+    Costs use `prices`, LLM_PRICES_PER_MILLION_TOKENS by default.
+
+    With a `prescreen`, papers it includes or excludes are decided without the LLM. Every
+    result notes the `stage` that decided it, "prescreen" or "llm".
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        backend: Optional[LLMBackend] = None,
+        prescreen: Optional[LexicalPrescreen] = None,
+        cascade: Optional[List[LLMBackend]] = None,
+        escalation_confidence: Optional[float] = None,
+        batch: bool = False,
+        batch_client: Optional[BatchClient] = None,
+        batch_poll_seconds: Optional[int] = None,
+        prices: Optional[Dict[str, Dict[str, float]]] = None,
+        on_batch: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        self.prescreen = prescreen
+        self.on_batch = on_batch
+        self.prices = prices
         self.results: List[LLMFilterResponse] = []
 
+        self.max_concurrency       = max_concurrency or settings.LLM_FILTER_MAX_CONCURRENCY
+        self.tokens_per_minute     = tokens_per_minute or settings.LLM_FILTER_TOKENS_PER_MINUTE
+        self.max_retries           = max_retries or settings.LLM_FILTER_MAX_RETRIES
+        self.token_budget          = token_budget if token_budget is not None else settings.LLM_FILTER_TOKEN_BUDGET
+        self.escalation_confidence = (
+            escalation_confidence if escalation_confidence is not None else settings.LLM_FILTER_ESCALATION_CONFIDENCE
+        )
+        self.batch_poll_seconds    = batch_poll_seconds or settings.LLM_BATCH_POLL_SECONDS
+
+        self.parser = JsonOutputParser(pydantic_object=LLMFilterBatchResponse)
+        self.prompt_builder = ScreeningPromptBuilder(self.parser)
+        self.tiers = [
+            ScreeningTier(backend, self.prompt_builder.prompt | backend.llm)
+            for backend in self._backends(backend, cascade)
+        ]
+
+        # The last tier has the final say
+        self.model = self.tiers[-1].backend
+        self.llm = self.model.llm
+        self.model_name = self.model.name
+        self.chain = self.tiers[-1].chain
+
+        self.batch_client = None
+        if batch or batch_client:
+            self.batch_client = batch_client or get_batch_client(settings.LLM_BACKEND, [tier.backend for tier in self.tiers])
+
+    @staticmethod
+    def _backends(backend: Optional[LLMBackend], cascade: Optional[List[LLMBackend]]) -> List[LLMBackend]:
+        """ The backends to screen with, cheapest first: the given ones, or the configured cascade or backend """
+
+        if cascade:
+            return list(cascade)
+        if backend:
+            return [backend]
+        if settings.LLM_FILTER_CASCADE:
+            return [get_backend(settings.LLM_BACKEND, deployment) for deployment in settings.LLM_FILTER_CASCADE]
+        return [get_backend(settings.LLM_BACKEND)]
+
     def parse(self, paper_data: List[Union[Publication, PublicationMetadata]], qna: List[FilterResponse]):
-        self.paper_data = self._parse_paper_data(paper_data)
-        self.qna        = self._parse_qna(qna)
+        formatted_papers = [self.prompt_builder.format_paper(paper) for paper in paper_data]
+        self.paper_ids   = [paper_id for paper_id, _ in formatted_papers]
+        self.questions   = qna
+        self.qna         = self._parse_qna(qna)
+        self.usage       = ScreeningUsage(self.prices)
+
+        # Papers the prescreen decided on never reach the LLM
+        self.prescreened = {}
+        if self.prescreen:
+            self.prescreened = dict(zip(self.paper_ids, self.prescreen.screen(paper_data)))
+        self.paper_data = [
+            (paper_id, paper) for paper_id, paper in formatted_papers
+            if paper_id not in self.prescreened or self.prescreened[paper_id][0] == PrescreenDecision.UNCERTAIN
+        ]
 
 
     def completion(self):
-        """ Complete the LLM filter """
-        for pid, paper in self.paper_data:
-            self._complete_llm_filter(pid, paper)
+        """ Complete the LLM filter for every paper """
+
+        assert self.paper_ids, "Paper data is required"
+        assert self.qna, "QnA is required"
+
+        if self.prescreen:
+            log.info(f"Prescreen decided {len(self.paper_ids) - len(self.paper_data)} of {len(self.paper_ids)} papers.")
+        started_at = time.perf_counter()
+        llm_results = asyncio.run(self.acompletion()) if self.paper_data else []
+        self.run = self.usage.save(len(self.paper_ids), time.perf_counter() - started_at)
+
+        self.results = self._merge_stages(llm_results)
         return self.results
-    
 
-    def _complete_llm_filter(self, paper_id: str, paper_data: str):
-        """ Complete the LLM filter for a single paper """
 
-        assert self.paper_data, "Paper data is required"
-        assert self.qna, "QnA is required"
+    def _merge_stages(self, llm_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """ Combine the prescreen and LLM results in paper order, noting the stage that decided each paper """
+
+        by_paper_id = {result["paper_id"]: result for result in llm_results}
+        usage = self.usage.per_paper()
+        results = []
+        for paper_id in self.paper_ids:
+            if paper_id in by_paper_id:
+                result = {**by_paper_id[paper_id], "stage": "llm"}
+                result["usage"] = usage.get(paper_id, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0})
+            else:
+                decision, _ = self.prescreened[paper_id]
+                result = {"paper_id": paper_id, "response": [], "stage": "prescreen", "decision": decision.value}
+            if paper_id in self.prescreened:
+                result["prescreen_score"] = self.prescreened[paper_id][1]
+            results.append(result)
+        return results
+
+
+    async def acompletion(self) -> List[Dict[str, Any]]:
+        """
+        Complete the LLM filter for every paper concurrently, keeping the paper order.
+        Each tier answers the questions the previous one was not confident about.
+        """
+        paper_hashes, question_hashes = self._hashes()
+
+        answers = {paper_id: {} for paper_id, _ in self.paper_data}
+        errors  = {}
+        pending = {paper_id: list(self.questions) for paper_id, _ in self.paper_data}
+        for level, tier in enumerate(self.tiers):
+            tier_answers, tier_errors = await self._screen_tier(tier, pending, paper_hashes, question_hashes)
+
+            escalated = {}
+            for paper_id, questions in pending.items():
+                for question in questions:
+                    answer = tier_answers[paper_id].get(str(question.id))
+                    if answer is not None:
+                        answers[paper_id][str(question.id)] = {**answer, "tier": tier.backend.name}
+                    if level < len(self.tiers) - 1 and not self._confident(answer):
+                        escalated.setdefault(paper_id, []).append(question)
+
+                # A failure is only reported if no later tier answers the paper
+                if paper_id in tier_errors:
+                    errors[paper_id] = tier_errors[paper_id]
+                else:
+                    errors.pop(paper_id, None)
+
+            if escalated:
+                log.info(f"Escalating {sum(len(questions) for questions in escalated.values())} answers of "
+                         f"{len(escalated)} papers from {tier.backend.name} to {self.tiers[level + 1].backend.name}.")
+            pending = escalated
+            if not pending:
+                break
+
+        return [self._merge_answers(paper_id, answers[paper_id], errors.get(paper_id)) for paper_id, _ in self.paper_data]
 
-        parser = JsonOutputParser(pydantic_object=LLMFilterResponse)
-        filter_prompt = PromptTemplate(
-            template        = self.prompt,
-            input_variables = ["paper_data", "qna"],
-            partial_variables = {"format_instructions": parser.get_format_instructions()}
+
+    async def _screen_tier(
+        self,
+        tier: ScreeningTier,
+        pending: Dict[str, List[FilterResponse]],
+        paper_hashes: Dict[str, str],
+        question_hashes: Dict[str, str]
+    ) -> Tuple[Dict[str, Dict[str, Dict[str, Any]]], Dict[str, str]]:
+        """
+        Answer the pending questions of every paper with one tier. Only the questions without a
+        decision stored for the tier are sent. Returns the answers by paper and question id, and
+        the errors of the papers whose calls failed.
+        """
+        cached = await sync_to_async(ScreeningDecision.lookup)(
+            [paper_hashes[paper_id] for paper_id in pending],
+            [question_hashes[str(question.id)] for question in self.questions],
+            tier.backend.name,
+            self.prompt_builder.VERSION
         )
-        chain = filter_prompt | self.llm | parser
-        response = chain.invoke({"paper_data": self.paper_data, "qna": self.qna})
-        response["paper_id"] = paper_id
-        log.info(f"Completed LLM filter for paper {paper_data}, response: {response}")
-        self.results.append(response)
 
-    def _parse_paper_data(self, paper_data: List[Union[PublicationMetadata, Publication]]) -> List[Tuple[str, str]]:
-        """ 
-        Parse the publication & metadata in the format:
-        - field_name: field_value
+        # Papers missing the same questions are screened together
+        papers         = dict(self.paper_data)
+        answers        = {}
+        pending_papers = {}
+        for paper_id, questions in pending.items():
+            answers[paper_id] = {}
+            missing = []
+            for question in questions:
+                decision = cached.get((paper_hashes[paper_id], question_hashes[str(question.id)]))
+                if decision is None:
+                    missing.append(question)
+                else:
+                    answer, confidence = decision
+                    answers[paper_id][str(question.id)] = {
+                        "id": str(question.id), "question": question.question, "answer": answer, "confidence": confidence
+                    }
+            if missing:
+                pending_papers.setdefault(tuple(str(question.id) for question in missing), (missing, []))[1].append((paper_id, papers[paper_id]))
+
+        calls = []
+        for questions, group_papers in pending_papers.values():
+            qna = self._parse_qna(questions)
+            for group in self.prompt_builder.pack(
+                group_papers,
+                qna,
+                len(questions),
+                token_budget      = self.token_budget,
+                max_output_tokens = tier.backend.max_tokens
+            ):
+                calls.append((group, qna, questions))
+
+        log.info(f"Screening {len(pending)} papers with {tier.backend.name}: "
+                 f"{sum(len(group_papers) for _, group_papers in pending_papers.values())} need answers, "
+                 f"in {len(calls)} calls" + (" as a batch." if self.batch_client else f", {self.max_concurrency} at a time."))
+
+        if self.batch_client:
+            call_results = await self._complete_batch(tier, calls, paper_hashes, question_hashes)
+        else:
+            semaphore    = asyncio.Semaphore(self.max_concurrency)
+            rate_limiter = TokenRateLimiter(self.tokens_per_minute)
+            call_results = await asyncio.gather(*[
+                self._complete_llm_filter(tier, group, qna, questions, semaphore, rate_limiter, paper_hashes, question_hashes)
+                for group, qna, questions in calls
+            ])
+
+        errors = {}
+        for results in call_results:
+            for result in results:
+                paper_id = result["paper_id"]
+                if result.get("error"):
+                    errors[paper_id] = result["error"]
+                asked = {str(question.id) for question in pending[paper_id]}
+                for answer in result.get("response", []):
+                    question_id = str(answer.get("id"))
+                    if question_id in asked:
+                        answers[paper_id][question_id] = {**answer, "id": question_id, "confidence": self._confidence(answer)}
+        return answers, errors
+    
+
+    async def _complete_llm_filter(
+        self, 
+        tier: ScreeningTier,
+        papers: List[Tuple[str, str]], 
+        qna: str,
+        questions: List[FilterResponse],
+        semaphore: asyncio.Semaphore, 
+        rate_limiter: TokenRateLimiter,
+        paper_hashes: Dict[str, str],
+        question_hashes: Dict[str, str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Complete the LLM filter for a group of papers in one call, retrying with exponential backoff.
+        The answers are stored as soon as the call completes, so an interrupted run resumes from there.
+        """
+        paper_ids = [paper_id for paper_id, _ in papers]
+        inputs    = self.prompt_builder.inputs(qna, papers)
+        tokens    = self._estimate_tokens(inputs, tier.backend)
+
+        async with semaphore:
+            for attempt in range(1, self.max_retries + 1):
+                await rate_limiter.acquire(tokens)
+                started_at = time.perf_counter()
+                try:
+                    message  = await tier.chain.ainvoke(inputs)
+                    response = self.parser.invoke(message)
+                except Exception as e:
+                    log.error(f"LLM filter failed for papers {paper_ids} on {tier.backend.name}: {e}. Attempt {attempt} of {self.max_retries}.")
+                    if attempt == self.max_retries:
+                        self.usage.record(
+                            tier.backend.name, paper_ids, latency=time.perf_counter() - started_at, attempts=attempt, error=str(e)
+                        )
+                        return [{"paper_id": paper_id, "response": [], "error": str(e)} for paper_id in paper_ids]
+                    await asyncio.sleep(2 ** attempt)
+                else:
+                    prompt_tokens, completion_tokens = self._token_usage(message, inputs)
+                    self.usage.record(
+                        tier.backend.name,
+                        paper_ids,
+                        prompt_tokens     = prompt_tokens,
+                        completion_tokens = completion_tokens,
+                        latency           = time.perf_counter() - started_at,
+                        attempts          = attempt,
+                    )
+                    log.info(f"Completed LLM filter for papers {paper_ids} on {tier.backend.name}, response: {response}")
+                    results = self._split_response(paper_ids, response)
+                    await sync_to_async(ScreeningDecision.bulk_record)(
+                        self._decisions(results, questions, paper_hashes, question_hashes, tier.backend.name)
+                    )
+                    return results
 
-        Returns a list of tuples with 
-        1. publication_id and the 
-        2. formatted paper data
+
+    async def _complete_batch(
+        self,
+        tier: ScreeningTier,
+        calls: List[Tuple[List[Tuple[str, str]], str, List[FilterResponse]]],
+        paper_hashes: Dict[str, str],
+        question_hashes: Dict[str, str]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Complete the calls of a tier as batch jobs, like `_complete_llm_filter` does online.
+        Calls that fail are submitted again in a new batch, up to `max_retries` batches.
+        """
+        call_results = [None] * len(calls)
+        pending      = dict(enumerate(calls))
+        spent        = {}
+        for attempt in range(1, self.max_retries + 1):
+            if not pending:
+                break
+            batch_id, status, lines, elapsed = await self._run_batch(tier, pending)
+
+            failed, decisions = {}, []
+            for index, (group, _, questions) in pending.items():
+                paper_ids = [paper_id for paper_id, _ in group]
+                line = lines.get(f"call-{index}")
+                content, error = self.batch_client.content(line)
+                if error is None:
+                    try:
+                        results = self._split_response(paper_ids, self.parser.parse(content))
+                        decisions.extend(self._decisions(results, questions, paper_hashes, question_hashes, tier.backend.name))
+                    except Exception as e:
+                        error = f"Unparsable completion: {e}"
+                if error is not None:
+                    if status != self.batch_client.COMPLETED:
+                        error = f"Batch {batch_id} is {status}."
+                    log.error(f"LLM filter failed for papers {paper_ids} in batch {batch_id}: {error}. Attempt {attempt} of {self.max_retries}.")
+                    results = [{"paper_id": paper_id, "response": [], "error": error} for paper_id in paper_ids]
+                    failed[index] = pending[index]
+
+                # A call is recorded once it is done, with the tokens of all its attempts
+                prompt_tokens, completion_tokens = self.batch_client.usage(line)
+                spent[index] = (spent.get(index, (0, 0))[0] + prompt_tokens, spent.get(index, (0, 0))[1] + completion_tokens)
+                if index not in failed or attempt == self.max_retries:
+                    self.usage.record(
+                        tier.backend.name,
+                        paper_ids,
+                        prompt_tokens     = spent[index][0],
+                        completion_tokens = spent[index][1],
+                        latency           = elapsed,
+                        attempts          = attempt,
+                        batch             = True,
+                        error             = error,
+                    )
+                call_results[index] = results
+
+            await sync_to_async(ScreeningDecision.bulk_record)(decisions)
+            await self._report_batch({"batch_id": batch_id, "status": status, "collected": True})
+            pending = failed
+        return call_results
+
+
+    def collect_batch(self, batch: Dict[str, Any]) -> str:
+        """
+        Wait for a batch reported to `on_batch` by an earlier run, e.g. one interrupted by a
+        restart, and store the decisions of its answered calls, returning its final status.
+        The questions and papers it answered are then served from the stored decisions.
+        """
+        batch_id = batch["batch_id"]
+        status = self.batch_client.status(batch_id)
+        while status not in self.batch_client.TERMINAL_STATUSES:
+            time.sleep(self.batch_poll_seconds)
+            status = self.batch_client.status(batch_id)
+        log.info(f"Batch {batch_id} of an earlier run is {status}.")
+
+        if status == self.batch_client.COMPLETED:
+            lines = {line.get("custom_id"): line for line in self.batch_client.results(batch_id)}
+            paper_hashes, question_hashes = self._hashes()
+            questions = {str(question.id): question for question in self.questions}
+
+            decisions = []
+            for custom_id, call in batch["calls"].items():
+                content, error = self.batch_client.content(lines.get(custom_id))
+                if error is not None:
+                    continue
+                try:
+                    results = self._split_response(call["paper_ids"], self.parser.parse(content))
+                except Exception as e:
+                    log.error(f"Unparsable completion for {custom_id} in batch {batch_id}: {e}")
+                    continue
+
+                # Papers no longer screened by the LLM, e.g. now decided by the prescreen, are left out
+                results = [result for result in results if result["paper_id"] in paper_hashes]
+                call_questions = [questions[question_id] for question_id in call["question_ids"] if question_id in questions]
+                decisions.extend(self._decisions(results, call_questions, paper_hashes, question_hashes, batch["tier"]))
+            ScreeningDecision.bulk_record(decisions)
+            log.info(f"Collected {len(decisions)} decisions from batch {batch_id}.")
+
+        if self.on_batch:
+            self.on_batch({"batch_id": batch_id, "status": status, "collected": True})
+        return status
+
+
+    def _hashes(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """ The hashes decisions are stored under: of every paper the LLM screens, and of every question """
+
+        paper_hashes    = {paper_id: ScreeningDecision.hash(paper) for paper_id, paper in self.paper_data}
+        question_hashes = {str(question.id): ScreeningDecision.hash(self._parse_qna([question])) for question in self.questions}
+        return paper_hashes, question_hashes
+
+
+    async def _report_batch(self, batch: Dict[str, Any]) -> None:
+        if self.on_batch:
+            await sync_to_async(self.on_batch)(batch)
+
+
+    async def _run_batch(
+        self,
+        tier: ScreeningTier,
+        calls: Dict[int, Tuple[List[Tuple[str, str]], str, List[FilterResponse]]]
+    ) -> Tuple[str, str, Dict[str, Dict[str, Any]], float]:
+        """
+        Write the calls to a batch file, submit it and poll until the batch is done.
+        Returns the batch id, its final status, its result lines by custom id and how long it took.
         """
-        all_paper_data = []
-        for paper in paper_data:
-            if isinstance(paper, PublicationMetadata):
-                paper_data_dict = paper.to_dict(show_publication=True)
-                paper_id = paper.publication_id
+        started_at = time.perf_counter()
+        path = await asyncio.to_thread(self._write_batch, tier, calls)
+        batch_id = await asyncio.to_thread(self.batch_client.submit, path)
+        log.info(f"Submitted batch {batch_id} of {len(calls)} calls to {tier.backend.name} from {path}.")
+        await self._report_batch({
+            "batch_id": batch_id,
+            "tier": tier.backend.name,
+            "path": path,
+            "calls": {
+                f"call-{index}": {
+                    "paper_ids": [paper_id for paper_id, _ in group],
+                    "question_ids": [str(question.id) for question in questions],
+                }
+                for index, (group, _, questions) in calls.items()
+            },
+            "collected": False,
+        })
+
+        status = await asyncio.to_thread(self.batch_client.status, batch_id)
+        while status not in self.batch_client.TERMINAL_STATUSES:
+            await asyncio.sleep(self.batch_poll_seconds)
+            status = await asyncio.to_thread(self.batch_client.status, batch_id)
+        log.info(f"Batch {batch_id} is {status}.")
+
+        lines = []
+        if status == self.batch_client.COMPLETED:
+            lines = await asyncio.to_thread(self.batch_client.results, batch_id)
+        return batch_id, status, {line.get("custom_id"): line for line in lines}, time.perf_counter() - started_at
+
+
+    def _write_batch(self, tier: ScreeningTier, calls: Dict[int, Tuple[List[Tuple[str, str]], str, List[FilterResponse]]]) -> str:
+        """ Write the calls of a tier to a batch file, one request per call, returning its path """
+
+        os.makedirs(settings.LLM_BATCH_DIR, exist_ok=True)
+        path = os.path.join(settings.LLM_BATCH_DIR, f"screening-{tier.backend.name}-{uuid.uuid4().hex[:12]}.jsonl")
+        with open(path, "w") as file:
+            for index, (group, qna, _) in calls.items():
+                prompt = self.prompt_builder.prompt.format(**self.prompt_builder.inputs(qna, group))
+                request = self.batch_client.request(f"call-{index}", tier.backend.name, prompt, tier.backend.max_tokens)
+                file.write(json.dumps(request) + "\n")
+        return path
+
+
+    def _decisions(
+        self,
+        results: List[Dict[str, Any]],
+        questions: List[FilterResponse],
+        paper_hashes: Dict[str, str],
+        question_hashes: Dict[str, str],
+        model_name: str
+    ) -> List[ScreeningDecision]:
+        """ The decisions to store for the answers of a call, ignoring answers to questions that were not asked """
+
+        asked = {str(question.id) for question in questions}
+        decisions = []
+        for result in results:
+            for answer in result.get("response", []):
+                question_id = str(answer.get("id"))
+                if question_id not in asked:
+                    continue
+                decisions.append(ScreeningDecision(
+                    paper_hash     = paper_hashes[result["paper_id"]],
+                    question_hash  = question_hashes[question_id],
+                    model          = model_name,
+                    prompt_version = self.prompt_builder.VERSION,
+                    paper_id       = result["paper_id"],
+                    question_id    = question_id,
+                    answer         = str(answer.get("answer", "")),
+                    confidence     = self._confidence(answer),
+                ))
+        return decisions
+
+
+    def _merge_answers(self, paper_id: str, answers: Dict[str, Dict[str, Any]], error: Optional[str]) -> Dict[str, Any]:
+        """ The answers of a paper in question order, noting the highest tier that answered """
+
+        response = [answers[str(question.id)] for question in self.questions if str(question.id) in answers]
+        merged = {"paper_id": paper_id, "response": response}
+
+        tier_names = [tier.backend.name for tier in self.tiers]
+        if response:
+            merged["tier"] = max((answer["tier"] for answer in response), key=tier_names.index)
+        if error:
+            merged["error"] = error
+        return merged
+
+
+    def _confident(self, answer: Optional[Dict[str, Any]]) -> bool:
+        """ Whether an answer is confident enough to skip the next tier; answers without a confidence are not """
+
+        confidence = self._confidence(answer) if answer is not None else None
+        return confidence is not None and confidence >= self.escalation_confidence
+
+    @staticmethod
+    def _confidence(answer: Dict[str, Any]) -> Optional[float]:
+        try:
+            return float(answer.get("confidence"))
+        except (TypeError, ValueError):
+            return None
+
+
+    def _split_response(self, paper_ids: List[str], response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """ Split the answers of a call into one response per paper, in the order of `paper_ids` """
+
+        results = response.get("results", []) if isinstance(response, dict) else []
+        by_paper_id = {result.get("paper_id"): result for result in results if isinstance(result, dict)}
+
+        # A single paper answered under a mangled id is still unambiguous
+        if len(paper_ids) == 1 and len(results) == 1 and paper_ids[0] not in by_paper_id:
+            by_paper_id = {paper_ids[0]: results[0]}
+
+        split = []
+        for paper_id in paper_ids:
+            if (result := by_paper_id.get(paper_id)) is None:
+                split.append({"paper_id": paper_id, "response": [], "error": "No answer for the paper in the LLM response."})
             else:
-                paper_data_dict = paper.to_dict()
-                paper_id = paper.paper_id
-            paper_data_str = "\n".join([f"{field}: {value}" for field, value in paper_data_dict.items()])
-            all_paper_data.append((paper_id, paper_data_str))
-        return all_paper_data
-        
+                split.append({**result, "paper_id": paper_id})
+        return split
+
+
+    def _token_usage(self, message: Any, inputs: Dict[str, str]) -> Tuple[int, int]:
+        """ The prompt and completion tokens of a call, as reported by the model or else estimated """
+
+        if usage := getattr(message, "usage_metadata", None):
+            return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        if usage := (getattr(message, "response_metadata", None) or {}).get("token_usage"):
+            return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+        content = getattr(message, "content", message)
+        return (
+            self.prompt_builder.estimate_tokens(self.prompt_builder.prompt.format(**inputs)),
+            self.prompt_builder.estimate_tokens(str(content))
+        )
+
+    def _estimate_tokens(self, inputs: Dict[str, str], backend: LLMBackend) -> int:
+        """ Estimate the tokens a call counts against the quota: the prompt plus the completion budget """
+
+        prompt = self.prompt_builder.prompt.format(**inputs)
+        return self.prompt_builder.estimate_tokens(prompt) + (backend.max_tokens or 0)
+
     def _parse_qna(self, qna: List[FilterResponse]):
         """ 
         Parse the question and answers in the format:
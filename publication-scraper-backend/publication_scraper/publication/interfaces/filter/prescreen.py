@@ -0,0 +1,217 @@
+import re
+import threading
+from collections import Counter
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from publication.models import Publication, PublicationMetadata
+from scraping.interfaces.extract_metadata import NO_ABSTRACT
+from scraping.interfaces.query_index import QueryIndex
+from utils import Logger, Profiler
+
+log = Logger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class PrescreenDecision(str, Enum):
+    INCLUDE = 'INCLUDE'
+    EXCLUDE = 'EXCLUDE'
+    UNCERTAIN = 'UNCERTAIN'
+
+
+class CorpusStatistics:
+    """
+    Document frequency of every word of the titles and abstracts in PublicationMetadata, with
+    the number of documents and their average length in words.
+
+    The statistics of the current corpus are computed on first use and recomputed once the
+    corpus version changes, so fitting a prescreen does not read the corpus on every call.
+
+    Example Usage:
+
+        statistics = CorpusStatistics.current()
+        statistics.document_frequency.get("review", 0)
+    """
+
+    _lock = threading.Lock()
+    _current: Optional['CorpusStatistics'] = None
+
+    def __init__(self, document_frequency: Dict[str, int], n_documents: int, avg_length: float, signature: Tuple = ()):
+        self.document_frequency = document_frequency
+        self.n_documents        = n_documents
+        self.avg_length         = avg_length
+        self.signature          = signature
+
+    @classmethod
+    def current(cls) -> 'CorpusStatistics':
+        """ The statistics of the corpus as it is now, recomputing them if the corpus changed since. """
+
+        signature = QueryIndex.corpus_signature()
+        with cls._lock:
+            if cls._current is None or cls._current.signature != signature:
+                cls._current = cls.from_metadata(signature)
+            return cls._current
+
+    @classmethod
+    @Profiler("Lexical Prescreen - Corpus Statistics")
+    def from_metadata(cls, signature: Tuple = ()) -> 'CorpusStatistics':
+        """ Count the words of every title and abstract in PublicationMetadata. """
+
+        document_frequency = Counter()
+        n_documents = total_length = 0
+        for title, abstract in PublicationMetadata.objects.values_list('paper_title', 'abstract').iterator(chunk_size=2000):
+            tokens = TOKEN_PATTERN.findall(f"{title} {abstract if abstract != NO_ABSTRACT else ''}".lower())
+            document_frequency.update(set(tokens))
+            n_documents  += 1
+            total_length += len(tokens)
+
+        log.info(f"Counted {len(document_frequency)} words in {n_documents} documents.")
+        return cls(dict(document_frequency), n_documents, total_length / n_documents if n_documents else 0.0, signature)
+
+
+class LexicalPrescreen:
+    """
+    Cheap lexical screening ahead of the LLM.
+
+    Papers are scored by BM25 against the required concepts over their title and abstract,
+    with document frequencies taken from every title and abstract in PublicationMetadata.
+    Scores are divided by the score of an average-length paper mentioning every term once and
+    capped at 1, so they read as the idf-weighted share of the concepts a paper covers,
+    whatever the corpus. Papers scoring below `exclude_below` are
+    excluded, papers from `include_above` on are included, and the rest are UNCERTAIN and
+    left to the LLM. With `require_abstract`, papers without an abstract are excluded. Until the
+    prescreen is fitted on a corpus holding the terms, it cannot tell papers apart and every
+    paper is UNCERTAIN.
+
+    Multi-word terms are split into words.
+
+    Example Usage:
+
+        prescreen = LexicalPrescreen(["code review", "automation"], exclude_below=0.1, include_above=0.8).fit_metadata()
+        decisions = prescreen.screen(papers)
+    """
+
+    def __init__(
+        self,
+        terms: List[str],
+        exclude_below: float = 0.1,
+        include_above: float = 0.8,
+        require_abstract: bool = True,
+        k1: float = 1.2,
+        b: float = 0.75
+    ):
+        self.terms            = list(dict.fromkeys(token for term in terms for token in self._tokenize(term)))
+        self.term_index       = {term: i for i, term in enumerate(self.terms)}
+        self.exclude_below    = exclude_below
+        self.include_above    = include_above
+        self.require_abstract = require_abstract
+        self.k1               = k1
+        self.b                = b
+
+        self.idf              = np.zeros(len(self.terms))
+        self.avg_length       = 1.0
+
+    def fit_metadata(self) -> 'LexicalPrescreen':
+        """ Fit the document frequencies on every title and abstract in PublicationMetadata, from their cached statistics. """
+
+        statistics = CorpusStatistics.current()
+        if statistics.n_documents == 0:
+            return self
+
+        document_frequency = np.array([statistics.document_frequency.get(term, 0) for term in self.terms], dtype=float)
+        self._fit_frequencies(document_frequency, statistics.n_documents, statistics.avg_length)
+        return self
+
+    def fit(self, documents: Iterable[str]) -> 'LexicalPrescreen':
+        """ Fit the document frequencies and the average document length on a corpus. """
+
+        counts, lengths = self._term_matrix(documents)
+        n_documents = counts.shape[0]
+        if n_documents == 0:
+            return self
+
+        document_frequency = np.bincount(counts.indices, minlength=len(self.terms))
+        self._fit_frequencies(document_frequency, n_documents, lengths.mean())
+        return self
+
+    def _fit_frequencies(self, document_frequency: np.ndarray, n_documents: int, avg_length: float) -> None:
+        self.idf = np.log1p((n_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+        self.avg_length = max(avg_length, 1.0)
+        log.info(f"Fitted the prescreen on {n_documents} documents.")
+
+    @property
+    def fitted(self) -> bool:
+        """ Whether the prescreen was fitted on a corpus in which the terms weigh anything. """
+        return self.idf.sum() > 0
+
+    def score(self, documents: List[str]) -> np.ndarray:
+        """ Normalized BM25 scores of the documents against the terms. """
+
+        counts, lengths = self._term_matrix(documents)
+        # An average-length paper mentioning every term once scores sum(idf)
+        full_score = self.idf.sum()
+        if counts.nnz == 0 or full_score == 0:
+            return np.zeros(len(documents))
+
+        # BM25 term weights, computed on the non-zero term counts only
+        rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+        norm = self.k1 * (1 - self.b + self.b * lengths[rows] / self.avg_length)
+        weights = counts.copy()
+        weights.data = self.idf[counts.indices] * counts.data * (self.k1 + 1) / (counts.data + norm)
+        return np.minimum(np.asarray(weights.sum(axis=1)).ravel() / full_score, 1.0)
+
+    def screen(self, papers: List[Union[PublicationMetadata, Publication]]) -> List[Tuple[PrescreenDecision, float]]:
+        """ Decide on every paper, returning its decision and score. """
+
+        if not self.fitted:
+            log.warning("The prescreen is not fitted, leaving every paper to the LLM.")
+            return [(PrescreenDecision.UNCERTAIN, 0.0) for _ in papers]
+
+        texts = [self._paper_text(paper) for paper in papers]
+        scores = self.score([text for text, _ in texts])
+
+        decisions = []
+        for (_, abstract), score in zip(texts, scores):
+            if self.require_abstract and not abstract:
+                decision = PrescreenDecision.EXCLUDE
+            elif score < self.exclude_below:
+                decision = PrescreenDecision.EXCLUDE
+            elif score >= self.include_above:
+                decision = PrescreenDecision.INCLUDE
+            else:
+                decision = PrescreenDecision.UNCERTAIN
+            decisions.append((decision, float(score)))
+        return decisions
+
+    def _term_matrix(self, documents: Iterable[str]) -> Tuple[sparse.csr_matrix, np.ndarray]:
+        """ Count the terms in every document: a documents x terms count matrix and the document lengths. """
+
+        indptr, indices, lengths = [0], [], []
+        for document in documents:
+            tokens = self._tokenize(document)
+            indices.extend(index for token in tokens if (index := self.term_index.get(token)) is not None)
+            indptr.append(len(indices))
+            lengths.append(len(tokens))
+
+        counts = sparse.csr_matrix(
+            (np.ones(len(indices)), np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(lengths), len(self.terms))
+        )
+        counts.sum_duplicates()
+        return counts, np.asarray(lengths, dtype=float)
+
+    def _paper_text(self, paper: Union[PublicationMetadata, Publication]) -> Tuple[str, Optional[str]]:
+        """ The title and abstract of a paper, and its abstract alone. """
+
+        if isinstance(paper, PublicationMetadata):
+            abstract = paper.abstract if paper.abstract != NO_ABSTRACT else None
+            return f"{paper.paper_title} {abstract or ''}", abstract
+        return paper.paper_title, None
+
+    @staticmethod
+    def _tokenize(text: Optional[str]) -> List[str]:
+        return TOKEN_PATTERN.findall((text or "").lower())
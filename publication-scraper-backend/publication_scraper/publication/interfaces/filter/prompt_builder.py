@@ -0,0 +1,116 @@
+from typing import Dict, List, Optional, Tuple, Union
+
+from langchain_core.output_parsers import BaseOutputParser
+from langchain_core.prompts import PromptTemplate
+from publication.models import Publication, PublicationMetadata
+
+
+class ScreeningPromptBuilder:
+    """
+    Builds the LLM screening prompts.
+
+    The shared block (instructions, questions and output format) comes first and the papers
+    last, so consecutive calls share a prompt prefix that providers can cache. Each paper only
+    contributes the fields needed for screening: title, abstract, venue and year.
+
+    Papers can be packed several to a call, up to a prompt token budget.
+
+    Example Usage:
+
+        builder = ScreeningPromptBuilder(parser)
+        papers = [builder.format_paper(paper) for paper in publications]
+        for group in builder.pack(papers, qna, question_count=3, token_budget=6000):
+            chain.invoke(builder.inputs(qna, group))
+    """
+
+    # Bump whenever the template changes, so stored screening decisions are not reused
+    VERSION = "2"
+
+    # Rough token estimates, used for packing and for the token-per-minute quota
+    CHARS_PER_TOKEN = 4
+    OUTPUT_TOKENS_PER_ANSWER = 40
+
+    TEMPLATE = (
+        "You are screening papers for a systematic literature review.\n"
+        "Answer every question below for each of the papers, choosing from the possible answers, "
+        "and give your confidence in each answer from 0 to 1.\n\n"
+        "Questions and possible answers:\n{qna}\n\n"
+        "{format_instructions}\n\n"
+        "Papers:\n{papers}"
+    )
+    PAPER_SEPARATOR = "\n---\n"
+
+    def __init__(self, parser: BaseOutputParser):
+        self.prompt = PromptTemplate(
+            template          = self.TEMPLATE,
+            input_variables   = ["qna", "papers"],
+            partial_variables = {"format_instructions": parser.get_format_instructions()}
+        )
+
+    @staticmethod
+    def format_paper(paper: Union[PublicationMetadata, Publication]) -> Tuple[str, str]:
+        """
+        Format the screening fields of a paper as:
+        - field_name: field_value
+
+        Returns the paper id and the formatted paper.
+        """
+        if isinstance(paper, PublicationMetadata):
+            paper_id = paper.publication_id
+            fields = {
+                "title": paper.paper_title,
+                "abstract": paper.abstract,
+                "venue": paper.conference_journal,
+                "year": paper.publication_date.year if paper.publication_date else "",
+            }
+        else:
+            paper_id = paper.paper_id
+            fields = { "title": paper.paper_title }
+
+        lines = [f"paper_id: {paper_id}"] + [f"{field}: {value}" for field, value in fields.items() if value]
+        return paper_id, "\n".join(lines)
+
+    def inputs(self, qna: str, papers: List[Tuple[str, str]]) -> Dict[str, str]:
+        """ The prompt inputs screening the given formatted papers. """
+        return { "qna": qna, "papers": self.PAPER_SEPARATOR.join(paper for _, paper in papers) }
+
+    def estimate_tokens(self, text: str) -> int:
+        """ Estimate the number of tokens of a text. """
+        return len(text) // self.CHARS_PER_TOKEN + 1
+
+    def pack(
+        self,
+        papers: List[Tuple[str, str]],
+        qna: str,
+        question_count: int,
+        token_budget: Optional[int] = None,
+        max_output_tokens: Optional[int] = None
+    ) -> List[List[Tuple[str, str]]]:
+        """
+        Group consecutive papers into calls whose prompt fits `token_budget` and whose expected
+        answers fit `max_output_tokens`. Without a budget, every paper gets its own call.
+        A paper larger than the budget still gets a call of its own.
+        """
+        if not token_budget:
+            return [[paper] for paper in papers]
+
+        prefix_tokens    = self.estimate_tokens(self.prompt.format(qna=qna, papers=""))
+        output_per_paper = question_count * self.OUTPUT_TOKENS_PER_ANSWER
+
+        groups = []
+        group, prompt_tokens, output_tokens = [], prefix_tokens, 0
+        for paper in papers:
+            paper_tokens = self.estimate_tokens(paper[1] + self.PAPER_SEPARATOR)
+            over_budget = prompt_tokens + paper_tokens > token_budget
+            over_output = max_output_tokens and output_tokens + output_per_paper > max_output_tokens
+            if group and (over_budget or over_output):
+                groups.append(group)
+                group, prompt_tokens, output_tokens = [], prefix_tokens, 0
+
+            group.append(paper)
+            prompt_tokens += paper_tokens
+            output_tokens += output_per_paper
+
+        if group:
+            groups.append(group)
+        return groups
@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from django.conf import settings
+from django.db import connection
+from publication.interfaces.filter.llm_filter import FilterResponse, LLMFilter
+from publication.interfaces.filter.prescreen import LexicalPrescreen
+from publication.models import Publication, PublicationMetadata, ScreeningJob, ScreeningJobStatus, ScreeningRun
+from utils import Logger
+
+log = Logger(__name__)
+
+
+def load_papers(paper_ids: List[str]) -> List[Union[PublicationMetadata, Publication]]:
+    """ The metadata of the papers, falling back to the publication for papers without metadata. """
+
+    papers = list(PublicationMetadata.objects.filter(publication_id__in=paper_ids))
+    if len(papers) != len(paper_ids):
+        missing_papers = set(paper_ids) - set([p.publication_id for p in papers])
+        papers.extend(Publication.objects.filter(paper_id__in=missing_papers))
+    return papers
+
+
+def screen(request: Dict[str, Any], batch: bool = False, job: Optional[ScreeningJob] = None) -> Tuple[List[Dict[str, Any]], ScreeningRun]:
+    """
+    Screen the papers of a validated LLM filter request against its questions, returning the results and the usage of the run.
+
+    With a `job`, its batches are stored on it as they are submitted, and the batches an
+    interrupted run of the job left uncollected are collected first. A job whose batch ended
+    in any other status than completed fails.
+    """
+
+    papers = load_papers(request.get('paper_ids', []))
+    log.info(f"Filtering {len(papers)} publications.")
+
+    questions = [
+        FilterResponse(
+            id       = question['id'],
+            question = question['question'],
+            answer   = question['answer']
+        ) for question in request['questions']
+    ]
+
+    # Decide the clear-cut papers lexically, if asked to
+    prescreen = None
+    if prescreen_options := request.get('prescreen'):
+        prescreen = LexicalPrescreen(**prescreen_options).fit_metadata()
+
+    llm_filter = LLMFilter(prescreen=prescreen, batch=batch, on_batch=job.record_batch if job else None)
+    llm_filter.parse(papers, questions)
+
+    for submitted in (job.uncollected_batches() if job else []):
+        status = llm_filter.collect_batch(submitted)
+        if status != llm_filter.batch_client.COMPLETED:
+            raise RuntimeError(f"Batch {submitted['batch_id']} of the {submitted['tier']} tier is {status}.")
+
+    results = llm_filter.completion()
+    return results, llm_filter.run
+
+
+class BackgroundScreeningRunner:
+    """
+    Runs queued screening jobs through the batch API on background workers,
+    at most LLM_BATCH_MAX_JOBS at a time.
+
+    Jobs left PENDING or RUNNING by a restart are run again with `resume`, which picks up
+    the batches they had submitted instead of paying for them twice.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=settings.LLM_BATCH_MAX_JOBS, thread_name_prefix="batch-screening")
+
+    def queue(self, job: ScreeningJob) -> None:
+        """ Queue a pending job. """
+
+        log.info(f"Queued screening job {job.id}.")
+        self.executor.submit(self._run, job.id)
+
+    def resume(self) -> List[ScreeningJob]:
+        """ Queue the jobs a previous process left pending or running, returning them. """
+
+        jobs = list(ScreeningJob.objects.filter(status__in=[ScreeningJobStatus.PENDING, ScreeningJobStatus.RUNNING]).order_by('created_at'))
+        for job in jobs:
+            log.info(f"Resuming screening job {job.id} with {len(job.uncollected_batches())} uncollected batches.")
+            self.executor.submit(self._run, job.id)
+        return jobs
+
+    def _run(self, job_id) -> None:
+        """ Run a job on the worker thread, storing its results or why it failed. """
+        job = ScreeningJob.objects.get(id=job_id)
+        try:
+            job.status = ScreeningJobStatus.RUNNING
+            job.save(update_fields=['status', 'updated_at'])
+
+            job.results, job.run = screen(job.request, batch=True, job=job)
+            job.status = ScreeningJobStatus.COMPLETED
+            job.save(update_fields=['status', 'results', 'run', 'updated_at'])
+            log.info(f"Screening job {job_id} completed.")
+        except Exception as e:
+            log.error(f"Screening job {job_id} failed: {e}")
+            job.status = ScreeningJobStatus.FAILED
+            job.error  = str(e)
+            job.save(update_fields=['status', 'error', 'updated_at'])
+        finally:
+            connection.close()
+
+
+background_screening = BackgroundScreeningRunner()
@@ -0,0 +1,105 @@
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from publication.models import ScreeningCall, ScreeningRun
+from utils import Logger
+
+log = Logger(__name__)
+
+
+class ScreeningUsage:
+    """
+    Collects the token usage, latency, attempts and cost of the LLM calls of a screening run.
+
+    Costs are priced per model from `prices` (model -> {"input": USD, "output": USD} per million
+    tokens, LLM_PRICES_PER_MILLION_TOKENS by default); batch calls are charged at
+    LLM_BATCH_PRICE_FACTOR of that. Models without a price cost nothing.
+
+    Example Usage:
+
+        usage = ScreeningUsage()
+        usage.record("gpt-4", ["P1", "P2"], prompt_tokens=900, completion_tokens=120, latency=2.1, attempts=1)
+        run = usage.save(papers=2, duration=2.3)
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Dict[str, float]]] = None):
+        self.prices = prices if prices is not None else settings.LLM_PRICES_PER_MILLION_TOKENS
+        self.calls: List[ScreeningCall] = []
+        self.unpriced = set()
+
+    def record(
+        self,
+        model: str,
+        paper_ids: List[str],
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency: float = 0.0,
+        attempts: int = 1,
+        batch: bool = False,
+        error: Optional[str] = None
+    ) -> ScreeningCall:
+        """ Record a call, pricing its tokens. """
+
+        call = ScreeningCall(
+            model             = model,
+            paper_ids         = list(paper_ids),
+            prompt_tokens     = prompt_tokens,
+            completion_tokens = completion_tokens,
+            cost              = self.cost(model, prompt_tokens, completion_tokens, batch),
+            latency           = latency,
+            attempts          = attempts,
+            batch             = batch,
+            error             = error,
+        )
+        self.calls.append(call)
+        return call
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int, batch: bool = False) -> float:
+        """ The cost of the tokens on the model, in USD. """
+
+        if (price := self.prices.get(model)) is None:
+            if model not in self.unpriced:
+                self.unpriced.add(model)
+                log.warning(f"No price for {model}, its calls are reported at no cost.")
+            return 0.0
+
+        cost = (prompt_tokens * price.get("input", 0.0) + completion_tokens * price.get("output", 0.0)) / 1_000_000
+        return cost * settings.LLM_BATCH_PRICE_FACTOR if batch else cost
+
+    def per_paper(self) -> Dict[str, Dict[str, Any]]:
+        """ The usage of every paper; a call screening several papers is shared evenly between them. """
+
+        usage = {}
+        for call in self.calls:
+            share = 1 / max(len(call.paper_ids), 1)
+            for paper_id in call.paper_ids:
+                paper_usage = usage.setdefault(paper_id, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0})
+                paper_usage["calls"]             += 1
+                paper_usage["prompt_tokens"]     += call.prompt_tokens * share
+                paper_usage["completion_tokens"] += call.completion_tokens * share
+                paper_usage["cost"]              += call.cost * share
+
+        for paper_usage in usage.values():
+            paper_usage["prompt_tokens"]     = round(paper_usage["prompt_tokens"])
+            paper_usage["completion_tokens"] = round(paper_usage["completion_tokens"])
+            paper_usage["cost"]              = round(paper_usage["cost"], 6)
+        return usage
+
+    def save(self, papers: int, duration: float) -> ScreeningRun:
+        """ Persist the run and its calls. """
+
+        run = ScreeningRun.objects.create(
+            papers            = papers,
+            calls             = len(self.calls),
+            failed_calls      = sum(1 for call in self.calls if call.error),
+            retries           = sum(call.attempts - 1 for call in self.calls),
+            prompt_tokens     = sum(call.prompt_tokens for call in self.calls),
+            completion_tokens = sum(call.completion_tokens for call in self.calls),
+            cost              = sum(call.cost for call in self.calls),
+            duration          = duration,
+        )
+        for call in self.calls:
+            call.run = run
+        ScreeningCall.objects.bulk_create(self.calls, batch_size=500)
+        log.info(f"Screening run {run.id}: {run.calls} calls, {run.prompt_tokens + run.completion_tokens} tokens, ${run.cost:.4f}.")
+        return run
@@ -1,9 +1,9 @@
-from typing import List
+from typing import List, Optional
 
 from utils import Profiler
 from utils.logger import Logger
 
-from ..models import Publication, PublicationReference, PublicationReferenceType
+from ..models import Publication, PublicationReferenceType
 from .snowballing_search import SnowballingSearch
 
 log = Logger(__name__)
@@ -13,10 +13,11 @@ class ForwardSearch(SnowballingSearch):
   def __init__(
       self, 
       publications: List[Publication], 
-      show_metadata: bool = False
+      show_metadata: bool = False,
+      max_edges: Optional[int] = None
   ):
     """ Initialize the forward search. """
-    super().__init__()
+    super().__init__(max_edges=max_edges)
     self.publications: List[Publication] = publications
     self.show_metadata: bool = show_metadata
     self.load_publications()
@@ -37,6 +38,10 @@ class ForwardSearch(SnowballingSearch):
     """
     Performs a forward search, acquiring all references of the paper(s).
     """
+    paper_dois = [result["doi"] for result in self.results if result["doi"]]
+    references = self.get_references(paper_dois, [PublicationReferenceType.REFERENCE])
+
+    seed_references = []
     for i in range(len(self.results)):
       log.info(f"Searching for references of {self.results[i]['title']}")
       publication = self.results[i]
@@ -46,34 +51,15 @@ class ForwardSearch(SnowballingSearch):
         log.warn(f"WARNING: Paper with title {publication['title']} does not have a DOI. Skipping.")
         continue
       
-      sch_paper = self.sch.get_paper(paper_doi)
-      references = sch_paper.references
-      
-      if references is None:
+      paper_references = references.get(paper_doi)
+      if not paper_references:
         log.warn(f"Skipped Paper | No references: {publication['title']}")
         continue
 
-      for referenced_paper in references:
-        if referenced_paper.externalIds is None or referenced_paper.externalIds.get("DOI") is None:  
-          log.warn(f"Publication with no DOI: {referenced_paper.title}")
-          log.warn(f"External IDs: {referenced_paper.externalIds}")
-          continue
-
-        reference = PublicationReference(
-            src = self.publications[i],
-            src_doi = paper_doi,
-            ref_paper_title = referenced_paper.title,
-            ref_doi = referenced_paper.externalIds.get("DOI"),
-            ref_url = referenced_paper.url,
-            type = PublicationReferenceType.REFERENCE
-        )
+      seed_references.append((i, paper_references))
 
-        log.debug(f"Reference: {referenced_paper}")
-        reference_publication = self.post_process_results(reference)
-        if reference_publication is None:
-          continue
-        reference_publication = self._get_publication_data(reference_publication, self.show_metadata)
-        self.results[i]["references"].append(reference_publication)
+    # Resolve the references of all seeds at once
+    self.attach_references(seed_references, "references")
     return self.results
 
   def _get_ref_doi(self, external_ids: dict) -> str:
@@ -1,27 +1,41 @@
+from typing import Optional
+
 import environ
+from django.conf import settings
 from langchain_openai import AzureChatOpenAI
 
+from .backend import LLMBackend
+
 env = environ.Env()
 environ.Env.read_env()
 
 
-class AzureLLM:
+class AzureLLM(LLMBackend):
   
-    def __init__(self):
+    def __init__(self, deployment_name: Optional[str] = None):
+        super().__init__()
         self.llm: AzureChatOpenAI = None
 
         self.BASE_URL = f"https://{env('AZURE_RESOURCE_NAME')}.openai.azure.com/"
         self.API_KEY = env('AZURE_API_KEY')
-        self.DEPLOYMENT_NAME = env('AZURE_DEPLOYMENT_NAME')
+        self.DEPLOYMENT_NAME = deployment_name or env('AZURE_DEPLOYMENT_NAME')
+        self.name = self.DEPLOYMENT_NAME
 
         self.init_llm()
 
 
     def init_llm(
       self, 
-      max_tokens: int = 2000, 
-      model_name: str = "gpt-4"
+      max_tokens: Optional[int] = None, 
+      model_name: Optional[str] = None
     ):
+        """ Create the chat model, capped and named as configured for the deployment in LLM_DEPLOYMENTS by default. """
+
+        deployment = settings.LLM_DEPLOYMENTS.get(self.DEPLOYMENT_NAME, {})
+        max_tokens = max_tokens or deployment.get("max_tokens", settings.LLM_MAX_TOKENS)
+        model_name = model_name or deployment.get("model_name", self.DEPLOYMENT_NAME)
+
+        self.max_tokens = max_tokens
         self.llm = AzureChatOpenAI(
                 azure_endpoint      = self.BASE_URL,
                 openai_api_version  = "2023-05-15",
@@ -0,0 +1,47 @@
+from typing import List, Optional
+
+from langchain_core.runnables import Runnable
+
+
+class LLMBackend:
+    """
+    An LLM the screening pipeline can run on.
+
+    Backends expose a LangChain runnable taking a prompt and returning a chat message, the
+    name decisions are stored under, and the completion token budget of a call.
+    """
+
+    def __init__(self):
+        self.llm: Runnable = None
+        self.name: str = ""
+        self.max_tokens: Optional[int] = None
+
+
+def get_backend(name: str, deployment: Optional[str] = None) -> LLMBackend:
+    """
+    Create the LLM backend configured under the given name, i.e., "azure" or "stub",
+    on the given deployment or on the default one.
+    """
+
+    # Backends are imported on demand, so the stub runs without the Azure settings
+    if name == "azure":
+        from .azure import AzureLLM
+        return AzureLLM(deployment)
+    if name == "stub":
+        from .stub import StubLLM
+        return StubLLM(name=deployment or "stub")
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+def get_batch_client(name: str, backends: List[LLMBackend]):
+    """
+    Create the batch client of the LLM backend configured under the given name. The stub
+    runs its batches locally on the given backends.
+    """
+    from .batch import AzureBatchClient, LocalBatchClient
+
+    if name == "azure":
+        return AzureBatchClient()
+    if name == "stub":
+        return LocalBatchClient(backends)
+    raise ValueError(f"Unknown LLM backend: {name}")
@@ -0,0 +1,185 @@
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import environ
+from langchain_core.prompt_values import StringPromptValue
+
+from .backend import LLMBackend
+
+env = environ.Env()
+environ.Env.read_env()
+
+
+class BatchClient:
+    """
+    Submits files of chat completion requests as batch jobs and fetches their results.
+
+    Batch files are JSONL in the OpenAI batch format, one request per line:
+
+        {"custom_id": "call-0", "method": "POST", "url": "/chat/completions", "body": {"model": ..., "messages": [...]}}
+
+    and results come back as one line per request with the same `custom_id`.
+    """
+
+    ENDPOINT = "/chat/completions"
+
+    # Batch statuses after which the batch no longer changes
+    COMPLETED = "completed"
+    TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+    @staticmethod
+    def request(custom_id: str, model: str, prompt: str, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """ The batch file line requesting a completion of the prompt. """
+
+        body = {"model": model, "messages": [{"role": "user", "content": prompt}]}
+        if max_tokens:
+            body["max_tokens"] = max_tokens
+        return {"custom_id": custom_id, "method": "POST", "url": BatchClient.ENDPOINT, "body": body}
+
+    @staticmethod
+    def content(result: Optional[Dict[str, Any]]) -> Tuple[Optional[str], Optional[str]]:
+        """ The completion of a batch result line, or the error that prevented it. """
+
+        if result is None:
+            return None, "No result for the request in the batch output."
+        if result.get("error"):
+            return None, str(result["error"].get("message", result["error"]))
+
+        response = result.get("response") or {}
+        if response.get("status_code") != 200:
+            return None, f"Request failed with status code {response.get('status_code')}."
+        try:
+            return response["body"]["choices"][0]["message"]["content"], None
+        except (KeyError, IndexError, TypeError):
+            return None, "Malformed completion in the batch output."
+
+    @staticmethod
+    def usage(result: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+        """ The prompt and completion tokens a batch result line was charged for. """
+
+        usage = (((result or {}).get("response") or {}).get("body") or {}).get("usage") or {}
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+    def submit(self, path: str) -> str:
+        """ Submit a batch file, returning the batch id. """
+        raise NotImplementedError
+
+    def status(self, batch_id: str) -> str:
+        """ The status of a batch. """
+        raise NotImplementedError
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        """ The result lines of a completed batch, including the failed requests. """
+        raise NotImplementedError
+
+
+class AzureBatchClient(BatchClient):
+    """ Runs batch files on the Azure OpenAI batch API, within its 24 hour completion window. """
+
+    def __init__(self):
+        from openai import AzureOpenAI
+
+        self.client = AzureOpenAI(
+            azure_endpoint = f"https://{env('AZURE_RESOURCE_NAME')}.openai.azure.com/",
+            api_key        = env('AZURE_API_KEY'),
+            api_version    = "2024-07-01-preview",
+        )
+
+    def submit(self, path: str) -> str:
+        with open(path, "rb") as file:
+            input_file = self.client.files.create(file=file, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id     = input_file.id,
+            endpoint          = self.ENDPOINT,
+            completion_window = "24h",
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        batch = self.client.batches.retrieve(batch_id)
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                lines.extend(json.loads(line) for line in self.client.files.content(file_id).text.splitlines() if line.strip())
+        return lines
+
+
+class LocalBatchClient(BatchClient):
+    """
+    Local stand-in for the batch API, for offline runs and tests.
+
+    Submitted files are run in the background against the backends, routed by the `model` of
+    each request, and their results are kept in memory in the batch output format.
+
+    Example Usage:
+
+        client = LocalBatchClient([StubLLM(name="gpt-4")])
+        batch_id = client.submit("screening.jsonl")
+    """
+
+    def __init__(self, backends: List[LLMBackend], max_workers: int = 4):
+        self.backends = {backend.name: backend for backend in backends}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="local-batch")
+        self.lock     = threading.Lock()
+        self.batches: Dict[str, Dict[str, Any]] = {}
+
+    def submit(self, path: str) -> str:
+        with open(path) as file:
+            requests = [json.loads(line) for line in file if line.strip()]
+
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        with self.lock:
+            self.batches[batch_id] = {"status": "in_progress", "results": []}
+        self.executor.submit(self._run, batch_id, requests)
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        with self.lock:
+            return self.batches[batch_id]["status"]
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            return list(self.batches[batch_id]["results"])
+
+    def _run(self, batch_id: str, requests: List[Dict[str, Any]]) -> None:
+        """ Complete every request of a batch, one line per request as the batch API returns them. """
+
+        results = [self._complete(request) for request in requests]
+        with self.lock:
+            self.batches[batch_id] = {"status": self.COMPLETED, "results": results}
+
+    def _complete(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        body   = request["body"]
+        result = {"id": f"response_{uuid.uuid4().hex}", "custom_id": request["custom_id"], "response": None, "error": None}
+
+        if (backend := self.backends.get(body["model"])) is None:
+            result["error"] = {"code": "model_not_found", "message": f"Unknown model: {body['model']}"}
+            return result
+
+        prompt = "\n".join(message["content"] for message in body["messages"])
+        try:
+            message = backend.llm.invoke(StringPromptValue(text=prompt))
+        except Exception as e:
+            result["error"] = {"code": "server_error", "message": str(e)}
+            return result
+
+        usage = getattr(message, "usage_metadata", None) or {}
+        result["response"] = {
+            "status_code": 200,
+            "body": {
+                "model": body["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": message.content}}],
+                "usage": {
+                    "prompt_tokens": usage.get("input_tokens", 0),
+                    "completion_tokens": usage.get("output_tokens", 0),
+                    "total_tokens": usage.get("total_tokens", 0),
+                },
+            },
+        }
+        return result
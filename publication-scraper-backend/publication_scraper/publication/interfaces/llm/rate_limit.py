@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+
+class TokenRateLimiter:
+    """
+    Async token bucket enforcing a tokens-per-minute quota.
+
+    The bucket starts full and refills continuously at `tokens_per_minute / 60` tokens per
+    second. `acquire` waits until enough tokens are available, so concurrent requests are
+    spread out instead of all hitting the quota at once.
+
+    Example Usage:
+
+        limiter = TokenRateLimiter(tokens_per_minute=80000)
+        await limiter.acquire(estimated_tokens)
+        response = await chain.ainvoke(inputs)
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity    = tokens_per_minute
+        self.rate        = tokens_per_minute / 60
+        self.tokens      = float(tokens_per_minute)
+        self.updated_at  = time.monotonic()
+        self.lock        = asyncio.Lock()
+
+    async def acquire(self, tokens: int) -> None:
+        """ Wait until `tokens` tokens are available and take them. Requests above the quota take the whole bucket. """
+
+        tokens = min(tokens, self.capacity)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import RunnableLambda
+
+from .backend import LLMBackend
+
+# Answers a question about a paper: (formatted paper, question, possible answers) -> answer
+AnswerRule = Callable[[str, str, List[str]], str]
+
+
+class StubLLMError(RuntimeError):
+    """ Raised by the stub to simulate a failed LLM call. """
+
+
+class StubLLM(LLMBackend):
+    """
+    Local stand-in for the screening LLM, for offline runs, profiling and load tests.
+
+    Answers every question about every paper of a prompt built by ScreeningPromptBuilder,
+    either from `answers` (question id -> canned answer) or from `rule`; by default it picks
+    one of the possible answers from a hash of the paper and the question. Answers come with
+    the given `confidence`, or by default one between 0.5 and 1 from the same hash, mostly
+    close to 1 as for easy screening decisions. Calls take
+    `latency` seconds (plus up to `jitter`) and fail with probability `error_rate`.
+
+    Behaviour is deterministic for a given `seed`: latency and failures are drawn from the
+    prompt and how many times it was sent, so retries of a failed prompt can succeed.
+    Every call is recorded in `calls` as (seconds, input tokens, output tokens, failed).
+
+    Example Usage:
+
+        backend = StubLLM(latency=0.2, error_rate=0.05)
+        llm_filter = LLMFilter(backend=backend)
+    """
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        answers: Optional[Dict[str, str]] = None,
+        rule: Optional[AnswerRule] = None,
+        seed: int = 0,
+        name: str = "stub",
+        confidence: Optional[float] = None
+    ):
+        super().__init__()
+        self.latency    = latency
+        self.jitter     = jitter
+        self.error_rate = error_rate
+        self.answers    = answers or {}
+        self.rule       = rule or self._hash_rule
+        self.seed       = seed
+        self.name       = name
+        self.confidence = confidence
+
+        self.calls: List[Tuple[float, int, int, bool]] = []
+        self.attempts: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.llm = RunnableLambda(self._invoke, afunc=self._ainvoke)
+
+    def _invoke(self, prompt: PromptValue) -> AIMessage:
+        """ Answer a prompt, blocking for the simulated latency. """
+
+        rng, started_at = self._start(prompt)
+        time.sleep(self._delay(rng))
+        return self._finish(prompt, rng, started_at)
+
+    async def _ainvoke(self, prompt: PromptValue) -> AIMessage:
+        """ Answer a prompt without blocking the event loop. """
+
+        rng, started_at = self._start(prompt)
+        await asyncio.sleep(self._delay(rng))
+        return self._finish(prompt, rng, started_at)
+
+    def _start(self, prompt: PromptValue) -> Tuple[random.Random, float]:
+        """ Seed the draws of a call from the prompt and its attempt number. """
+
+        text = prompt.to_string()
+        key  = hashlib.sha256(text.encode()).hexdigest()
+        with self.lock:
+            attempt = self.attempts.get(key, 0)
+            self.attempts[key] = attempt + 1
+        return random.Random(f"{self.seed}:{key}:{attempt}"), time.perf_counter()
+
+    def _delay(self, rng: random.Random) -> float:
+        return self.latency + rng.uniform(0, self.jitter)
+
+    def _finish(self, prompt: PromptValue, rng: random.Random, started_at: float) -> AIMessage:
+        """ Fail or answer the prompt, recording the call. """
+
+        text = prompt.to_string()
+        input_tokens = len(text) // self.CHARS_PER_TOKEN + 1
+
+        if rng.random() < self.error_rate:
+            self._record(started_at, input_tokens, 0, failed=True)
+            raise StubLLMError("Simulated LLM failure.")
+
+        content = json.dumps({ "results": self._answer(text) })
+        output_tokens = len(content) // self.CHARS_PER_TOKEN + 1
+        self._record(started_at, input_tokens, output_tokens, failed=False)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            }
+        )
+
+    def _record(self, started_at: float, input_tokens: int, output_tokens: int, failed: bool) -> None:
+        with self.lock:
+            self.calls.append((time.perf_counter() - started_at, input_tokens, output_tokens, failed))
+
+    def _answer(self, text: str) -> List[Dict]:
+        """ Answer every question of a screening prompt for every paper in it. """
+
+        questions_block, _, papers_block = text.partition("\nPapers:\n")
+        questions_block = questions_block.partition("Questions and possible answers:\n")[2].split("\n\n")[0]
+        questions = re.findall(r"^([^:\n]+): (.*)\n(.*)$", questions_block, re.M)
+
+        results = []
+        for paper in papers_block.split("\n---\n"):
+            paper_id = re.search(r"^paper_id: (.*)$", paper, re.M)
+            if paper_id is None:
+                continue
+            results.append({
+                "paper_id": paper_id.group(1),
+                "response": [
+                    {
+                        "id": question_id,
+                        "question": question,
+                        "answer": self.answers.get(question_id) or self.rule(paper, question, [option.strip() for option in options.split(",")]),
+                        "confidence": self.confidence if self.confidence is not None else self._hash_confidence(paper, question),
+                    }
+                    for question_id, question, options in questions
+                ],
+            })
+        return results
+
+    @staticmethod
+    def _hash_rule(paper: str, question: str, options: List[str]) -> str:
+        """ Pick one of the possible answers from a hash of the paper and the question. """
+
+        digest = hashlib.sha256(f"{paper}\n{question}".encode()).digest()
+        return options[digest[0] % len(options)] if options else ""
+
+    @staticmethod
+    def _hash_confidence(paper: str, question: str) -> float:
+        """ A confidence between 0.5 and 1 from a hash of the paper and the question, skewed towards 1. """
+
+        digest = hashlib.sha256(f"{paper}\n{question}".encode()).digest()
+        draw = int.from_bytes(digest[1:3], "big") / 0xFFFF
+        return round(1 - 0.5 * draw ** 8, 2)
@@ -0,0 +1,171 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Value
+from django.db.models.functions import Concat
+
+from scraping.interfaces.refresh_metadata import MetadataRefresher
+from utils import Profiler
+from utils.logger import Logger
+
+from ..models import Publication, PublicationMetadata, PublicationReference, PublicationReferenceType
+from .snowballing_search import SnowballingSearch
+
+log = Logger(__name__)
+
+class InvalidCursor(ValueError):
+    """ Raised when a page cursor cannot be decoded. """
+
+
+class SnowballingPager(SnowballingSearch):
+    """
+    Two-phase snowballing: seed summaries first, then one seed's edges a page at a time.
+
+    `summarize` only asks Semantic Scholar for the reference and citation counts of the
+    seeds, in one batch request, and counts what is already stored locally. `page` expands
+    a single seed on its first page, up to `max_edges` edges (SNOWBALLING_PAGE_MAX_EDGES by
+    default), and serves every page from the edge table with keyset pagination, resolving
+    only the papers on the page.
+
+    Example Usage:
+
+        pager = SnowballingPager()
+        summaries = pager.summarize(publications)
+        page = pager.page(publication, PublicationReferenceType.REFERENCE, page_size=50, fields=["paper_title", "doi"])
+        next_page = pager.page(publication, PublicationReferenceType.REFERENCE, cursor=page["next_cursor"])
+    """
+
+    DEFAULT_FIELDS = ["paper_id", "paper_title", "doi"]
+    PUBLICATION_FIELDS = [field.name for field in Publication._meta.fields]
+    METADATA_FIELDS = [field.name for field in PublicationMetadata._meta.fields if field.name not in ['id', 'publication']]
+
+    def __init__(self, max_edges: Optional[int] = None):
+        """ :param max_edges (int): Cap on the edges a seed is expanded with, SNOWBALLING_PAGE_MAX_EDGES if None. """
+        super().__init__(max_edges=max_edges or settings.SNOWBALLING_PAGE_MAX_EDGES)
+
+    @Profiler("Snowballing Pager - Summarizing")
+    def summarize(self, publications: List[Publication]) -> List[Dict[str, Any]]:
+        """
+        Summarize the seeds without expanding them.
+
+        reference_count / citation_count come from Semantic Scholar (None if unavailable),
+        stored_* count the edges in the edge table, and known_* those edges whose paper
+        is already a local publication. Seeds without metadata are left out, see `split_seeds`.
+        """
+        publications, _ = self.split_seeds(publications)
+        counts = self._fetch_counts(publications)
+
+        dois = [publication.metadata.doi for publication in publications if publication.metadata.doi]
+        known_paper = Publication.objects.filter(paper_id=Concat(Value("DOI:"), OuterRef("ref_doi")))
+        edge_counts = (
+            PublicationReference.objects
+                .filter(src_doi__in=dois)
+                .values('src_doi', 'type')
+                .annotate(stored=Count('pk'), known=Count('pk', filter=Exists(known_paper)))
+        )
+        stored = {(row['src_doi'], row['type']): row for row in edge_counts}
+
+        summaries = []
+        for publication in publications:
+            doi = publication.metadata.doi
+            sch_paper = counts.get(publication.paper_id) or {}
+            summary = {
+                "paper_id": publication.paper_id,
+                "title": publication.paper_title,
+                "doi": doi,
+                "reference_count": sch_paper.get("referenceCount"),
+                "citation_count": sch_paper.get("citationCount"),
+            }
+            for ref_type, key in [(PublicationReferenceType.REFERENCE, "references"), (PublicationReferenceType.CITATION, "citations")]:
+                row = stored.get((doi, ref_type.value), {})
+                summary[f"stored_{key}"] = row.get("stored", 0)
+                summary[f"known_{key}"] = row.get("known", 0)
+            summaries.append(summary)
+        return summaries
+
+    def page(
+        self,
+        publication: Publication,
+        reference_type: PublicationReferenceType,
+        cursor: Optional[str] = None,
+        page_size: int = 50,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get a page of the references or citations of a seed.
+
+        The first page (no cursor) expands the seed if its stored edges are stale, up to
+        `max_edges` of them; every page is read from the edge table, so a listing stays
+        consistent while it is paged through. `total` counts the stored edges.
+
+        :param cursor (str): `next_cursor` of the previous page.
+        :param fields (List[str]): Publication and metadata fields to return, `DEFAULT_FIELDS` if None.
+        :rettype Dict[str, Any]: The page results, the total number of edges and the next cursor (None on the last page).
+        """
+        doi = publication.metadata.doi
+        after = self.decode_cursor(cursor) if cursor else 0
+        if not cursor:
+            self.expand_stale([doi], [reference_type])
+
+        edges = PublicationReference.objects.filter(src_doi=doi, type=reference_type)
+        page_edges = list(edges.filter(pk__gt=after).order_by('pk')[:page_size + 1])
+        has_next = len(page_edges) > page_size
+        page_edges = page_edges[:page_size]
+
+        fields = fields or self.DEFAULT_FIELDS
+        publications = self.expand_references(page_edges)
+        results = []
+        for reference in page_edges:
+            if (ref_publication := publications.get(self._get_reference_id(reference))) is not None:
+                results.append(self._project(ref_publication, fields))
+
+        return {
+            "results": results,
+            "total": edges.count(),
+            "next_cursor": self.encode_cursor(page_edges[-1].pk) if has_next else None,
+        }
+
+    @staticmethod
+    def encode_cursor(after: int) -> str:
+        """ Encode the last edge of a page into an opaque cursor. """
+        return base64.urlsafe_b64encode(json.dumps({ "after": after }).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        """ Decode a cursor into the last edge of the previous page. """
+        try:
+            return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["after"])
+        except (ValueError, TypeError, KeyError) as e:
+            raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+    def _fetch_counts(self, publications: List[Publication]) -> Dict[str, Dict[str, Any]]:
+        """ Fetch the reference and citation counts of the seeds from the Semantic Scholar batch API. """
+
+        refresher = MetadataRefresher()
+        metadata  = [publication.metadata for publication in publications]
+        counts    = {}
+        for start in range(0, len(metadata), refresher.batch_size):
+            batch = metadata[start:start + refresher.batch_size]
+            paper_ids = [f"DOI:{md.doi}" if md.doi else md.publication_id for md in batch]
+            sch_papers = refresher.fetch_batch(
+                paper_ids, fields=["referenceCount", "citationCount"], max_retries=1, timeout=settings.METADATA_REQUEST_TIMEOUT_SECONDS
+            )
+            if sch_papers is None:
+                log.warn("Could not fetch reference and citation counts.")
+                continue
+            for md, sch_paper in zip(batch, sch_papers):
+                counts[md.publication_id] = sch_paper
+        return counts
+
+    def _project(self, publication: Publication, fields: List[str]) -> Dict[str, Any]:
+        """ Serialize only the requested fields of a publication and its metadata. """
+
+        data = {}
+        for field in fields:
+            if field in self.PUBLICATION_FIELDS:
+                data[field] = getattr(publication, field)
+            elif field in self.METADATA_FIELDS:
+                data[field] = getattr(publication.metadata, field)
+        return data
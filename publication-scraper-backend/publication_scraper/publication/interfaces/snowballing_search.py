@@ -1,21 +1,37 @@
-from typing import Any, Dict, Optional
+from datetime import timedelta
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from semanticscholar import SemanticScholar
+from semanticscholar.Paper import Paper
 
 from publication.models import (
     Publication,
     PublicationMetadata,
     PublicationReference,
+    PublicationReferenceType,
     PublicationStatus,
 )
 from scraping.interfaces.extract_metadata import PublicationMetadataExtractor
 from scraping.models import SearchEngineType
+from utils import Profiler
 from utils.logger import Logger
 
+from .citation_ranking import CitationRanker
+
 log = Logger(__name__)
 
 class SnowballingSearch:
-    def __init__(self):
+    # Paper fields requested for every reference or citation, and the largest page the API serves
+    REFERENCE_FIELDS = ["externalIds", "title", "url"]
+    PAGE_SIZE = 1000
+
+    def __init__(self, max_edges: Optional[int] = None):
+        """ :param max_edges (int): Cap on the references and on the citations fetched per paper, unlimited if None. """
+        self.max_edges = max_edges
         self.columns = [
           'referenced_paper_title',
           'referenced_doi',
@@ -23,7 +39,7 @@ class SnowballingSearch:
           'from_doi',
         ]
         self.results = []
-        self.sch = SemanticScholar()
+        self.sch = SemanticScholar(api_key=settings.SEMANTIC_SCHOLAR_API_KEY)
     
 
     def load_publications(self):
@@ -36,58 +52,246 @@ class SnowballingSearch:
         raise NotImplementedError
     
     
-    def post_process_results(self, reference: PublicationReference) -> Optional[Publication]:
+    def get_references(
+        self, 
+        paper_dois: List[str], 
+        reference_types: List[PublicationReferenceType]
+    ) -> Dict[str, List[PublicationReference]]:
+        """
+        Get the references and/or citations of the given papers.
+
+        Edges fetched within SNOWBALLING_REFRESH_AFTER_DAYS (under a cap no lower than
+        `max_edges`) are served from the edge table; only papers that are stale or were never
+        expanded are fetched from Semantic Scholar, and their edges are stored for the next run.
+
+        :rettype Dict[str, List[PublicationReference]]: paper DOI -> edges.
         """
-        Post-process the results.
+        paper_dois = list(dict.fromkeys(paper_dois))
+        fresh_dois, fetched = self.expand_stale(paper_dois, reference_types)
+
+        references = {doi: [] for doi in paper_dois}
+        edge_counts = {}
+        for reference in PublicationReference.objects.filter(src_doi__in=fresh_dois, type__in=reference_types).order_by('pk'):
+            key = (reference.src_doi, reference.type)
+            edge_counts[key] = edge_counts.get(key, 0) + 1
+            if self.max_edges is None or edge_counts[key] <= self.max_edges:
+                references[reference.src_doi].append(reference)
+
+        references.update(fetched)
+        return references
+
 
-        Adds the results to the database if they do not already exist.
-        Also populates the database with the metadata of the results.
+    def expand_stale(
+        self, 
+        paper_dois: List[str], 
+        reference_types: List[PublicationReferenceType]
+    ) -> Tuple[Set[str], Dict[str, List[PublicationReference]]]:
         """
+        Fetch and store the edges of the papers that are stale or were never expanded, leaving
+        the edges of the fresh ones in the edge table.
 
-        log.debug(f"Processing reference: {reference}")
-        paper_doi = f"DOI:{reference.ref_doi}"
-        publication = Publication.objects.filter(paper_id=paper_doi)
+        :rettype Tuple[Set[str], Dict[str, List[PublicationReference]]]: The fresh DOIs, and paper DOI -> fetched edges.
+        """
+        max_age    = timedelta(days=settings.SNOWBALLING_REFRESH_AFTER_DAYS)
+        fresh_dois = PublicationReference.fresh_dois(paper_dois, reference_types, max_age, self.max_edges)
+
+        stale_dois = [doi for doi in paper_dois if doi not in fresh_dois]
+        log.info(f"Serving {len(fresh_dois)} papers from stored edges, fetching {len(stale_dois)}.")
         
-        if publication.exists():
-            log.info(f"Publication with DOI {paper_doi} already exists.")
-            publication = publication.first()
-            try: 
-                metadata = publication.metadata
-            except PublicationMetadata.DoesNotExist:
-                metadata = None
-            
-            if metadata is None:
-                try:
-                    metadata = self._get_metadata(paper_doi)
-                except IndexError:
-                    log.error(f"Metadata not found for {paper_doi}")
-                    return None
-
-                publication.metadata = metadata
-                publication.save()
+        fetched = self.fetch_all_references(stale_dois, reference_types)
+        PublicationReference.bulk_replace(fetched, reference_types, self.max_edges)
+        return fresh_dois, fetched
+
+
+    def fetch_all_references(
+        self, 
+        paper_dois: List[str], 
+        reference_types: List[PublicationReferenceType]
+    ) -> Dict[str, List[PublicationReference]]:
+        """ Fetch the edges of the given papers from Semantic Scholar, one paper at a time. """
+
+        return {doi: self.fetch_references(doi, reference_types) for doi in paper_dois}
+
+
+    def fetch_references(
+        self, 
+        paper_doi: str, 
+        reference_types: List[PublicationReferenceType]
+    ) -> List[PublicationReference]:
+        """
+        Fetch the references and/or citations of a paper from Semantic Scholar.
+        Papers without a DOI are skipped.
+
+        :param paper_doi (str): The DOI of the paper.
+        :param reference_types: REFERENCE for the papers it cites, CITATION for the papers citing it.
+        """
+        references = []
+
+        for reference_type in reference_types:
+            for referenced_paper in self._stream_referenced_papers(paper_doi, reference_type):
+                if referenced_paper.externalIds is None or referenced_paper.externalIds.get("DOI") is None:
+                    log.debug(f"Publication with no DOI: {referenced_paper.title}")
+                    continue
+
+                references.append(PublicationReference(
+                    src_doi = paper_doi,
+                    ref_paper_title = referenced_paper.title or "",
+                    ref_doi = referenced_paper.externalIds.get("DOI"),
+                    ref_url = referenced_paper.url or "",
+                    type = reference_type
+                ))
+        return references
+
+
+    def _stream_referenced_papers(self, paper_doi: str, reference_type: PublicationReferenceType) -> Iterator[Paper]:
+        """
+        Stream the papers a paper references or is cited by through the paginated
+        `/references` and `/citations` endpoints, one page at a time.
+        No further pages are requested once `max_edges` papers have been read.
+        """
+        page_size = min(self.max_edges or self.PAGE_SIZE, self.PAGE_SIZE)
+        paper_id  = f"DOI:{paper_doi}"
+
+        if reference_type == PublicationReferenceType.REFERENCE:
+            pages = self.sch.get_paper_references(paper_id, fields=self.REFERENCE_FIELDS, limit=page_size)
         else:
-            publication = Publication.objects.create(
-                paper_id = paper_doi,
-                paper_title = reference.ref_paper_title,
-                search_string = reference.type.value,
-                searched_from = SearchEngineType.SEMANTIC_SCHOLAR,
-                formatted_search_string = reference.type.value,
-                status = PublicationStatus.NEW,
+            pages = self.sch.get_paper_citations(paper_id, fields=self.REFERENCE_FIELDS, limit=page_size)
+
+        papers = (item.paper for item in pages if item.paper is not None)
+        return islice(papers, self.max_edges)
+
+
+    def attach_references(
+        self, 
+        seed_references: List[Tuple[int, List[PublicationReference]]], 
+        result_key: str
+    ) -> None:
+        """
+        Expand the references of every seed in bulk and attach them to the seed results.
+
+        :param seed_references: (result index, references) for each seed.
+        :param result_key (str): The result field to attach to, i.e., "references" or "citations".
+        """
+        all_references = [reference for _, references in seed_references for reference in references]
+        publications   = self.expand_references(all_references)
+
+        for i, references in seed_references:
+            for reference in references:
+                publication = publications.get(self._get_reference_id(reference))
+                if publication is None:
+                    continue
+                self.results[i][result_key].append(self._get_publication_data(publication, self.show_metadata))
+
+
+    def expand_references(self, references: List[PublicationReference]) -> Dict[str, Publication]:
+        """
+        Resolve references into publications with metadata, in bulk.
+
+        References shared between seeds are processed once. Known publications and their
+        metadata are loaded with one IN query, missing publications are bulk created, and
+        missing metadata is fetched through Semantic Scholar batch lookups and bulk created.
+        References whose metadata cannot be found are left out.
+
+        :rettype Dict[str, Publication]: paper_id -> publication with metadata.
+        """
+        unique_references = {}
+        for reference in references:
+            unique_references.setdefault(self._get_reference_id(reference), reference)
+
+        publications = {
+            publication.paper_id: publication 
+            for publication in Publication.objects.filter(paper_id__in=unique_references.keys()).select_related('metadata')
+        }
+        new_publications = [
+            Publication(
+                paper_id                = paper_id,
+                paper_title             = reference.ref_paper_title or "",
+                search_string           = PublicationReferenceType(reference.type).value,
+                searched_from           = SearchEngineType.SEMANTIC_SCHOLAR,
+                formatted_search_string = PublicationReferenceType(reference.type).value,
+                status                  = PublicationStatus.NEW,
             )
-            metadata = self._get_metadata(paper_doi)
-            publication.metadata = metadata
-            metadata.save()
-            publication.save()
-            
-        return publication
-    
+            for paper_id, reference in unique_references.items()
+            if paper_id not in publications
+        ]
+        with transaction.atomic():
+            Publication.objects.bulk_create(new_publications, ignore_conflicts=True)
+        publications.update({publication.paper_id: publication for publication in new_publications})
+        new_paper_ids = {publication.paper_id for publication in new_publications}
+
+        log.info(f"Expanding {len(unique_references)} references: {len(new_publications)} new publications.")
+
+        with_metadata = {
+            paper_id for paper_id, publication in publications.items() 
+            if paper_id not in new_paper_ids and hasattr(publication, 'metadata')
+        }
+        without_metadata = [paper_id for paper_id in publications if paper_id not in with_metadata]
+        if without_metadata:
+            extractor = PublicationMetadataExtractor(without_metadata, extract=False)
+            metadata  = extractor.extract_batch()
+            with transaction.atomic():
+                PublicationMetadata.objects.bulk_create(metadata)
+            for md in metadata:
+                publications[md.publication_id].metadata = md
+                with_metadata.add(md.publication_id)
+
+        return { paper_id: publications[paper_id] for paper_id in with_metadata }
+
+
+    @Profiler("Snowballing Search - Ranking")
+    def rank_candidates(self, result_key: str) -> List[Dict[str, Any]]:
+        """
+        Rank the candidates found for all seeds by their place in the stored citation graph.
+
+        Every stored edge touching a seed or a candidate is used, so edges kept from earlier
+        searches and crawls sharpen the co-citation and coupling signals. The per-seed lists
+        are reordered by score as well.
+
+        :param result_key (str): The result field holding the candidates, i.e., "references" or "citations".
+        :rettype List[Dict[str, Any]]: Unique candidates with their score and signals, best first.
+        """
+        seed_dois  = [result["doi"] for result in self.results if result["doi"]]
+        candidates = {}
+        for result in self.results:
+            for candidate in result[result_key]:
+                candidates.setdefault(candidate["paper_id"], candidate)
+        if not candidates:
+            return []
+
+        dois  = seed_dois + [paper_id.removeprefix("DOI:") for paper_id in candidates]
+        edges = PublicationReference.objects.filter(Q(src_doi__in=dois) | Q(ref_doi__in=dois)).values_list('src_doi', 'ref_doi', 'type')
+        scores = CitationRanker().rank(seed_dois, CitationRanker.citation_pairs(edges))
+
+        unscored = { "score": 0.0, **{ signal: 0.0 for signal in CitationRanker.SIGNALS } }
+        def candidate_score(candidate: Dict[str, Any]) -> Dict[str, float]:
+            return scores.get(candidate["paper_id"].removeprefix("DOI:").lower(), unscored)
+
+        for result in self.results:
+            result[result_key].sort(key=lambda candidate: candidate_score(candidate)["score"], reverse=True)
+
+        ranked = [{ **candidate, **candidate_score(candidate) } for candidate in candidates.values()]
+        ranked.sort(key=lambda candidate: candidate["score"], reverse=True)
+        return ranked
+
+
+    def _get_reference_id(self, reference: PublicationReference) -> str:
+        """ Get the paper ID of a reference. """
+        return f"DOI:{reference.ref_doi}"
+
 
-    def _get_metadata(self, paper_doi: str) -> PublicationMetadata:
-        """ Get metadata for a given DOI. """
+    @staticmethod
+    def split_seeds(publications: List[Publication]) -> Tuple[List[Publication], List[str]]:
+        """ The seeds with metadata to snowball from, and the paper ids of those without, which are skipped. """
 
-        log.info(f"Getting metadata for {paper_doi}")
-        extractor = PublicationMetadataExtractor(paper_doi)
-        return extractor.extracted_metadata[0]
+        seeds, skipped = [], []
+        for publication in publications:
+            if hasattr(publication, 'metadata'):
+                seeds.append(publication)
+            else:
+                skipped.append(publication.paper_id)
+        if skipped:
+            log.warn(f"Skipping {len(skipped)} seeds without metadata: {', '.join(skipped)}")
+        return seeds, skipped
         
 
     def _get_publication_data(self, publication: Publication, show_metadata: bool) -> Dict[str, Any]:
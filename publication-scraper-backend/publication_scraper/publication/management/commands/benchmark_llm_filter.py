@@ -0,0 +1,122 @@
+import time
+import uuid
+from datetime import date
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from publication.interfaces.filter.llm_filter import FilterResponse, LLMFilter
+from publication.interfaces.llm.batch import LocalBatchClient
+from publication.interfaces.llm.stub import StubLLM
+from publication.models import PublicationMetadata, ScreeningDecision, ScreeningRun
+
+
+class Command(BaseCommand):
+    """
+    Benchmark LLM screening throughput against the local stub backend.
+
+    Runs synthetic papers through the full LLMFilter parse -> completion path, including the
+    decision cache, and reports papers per second, call latency and tokens per paper. The
+    decisions are stored under a model name unique to the run and deleted afterwards.
+
+    With `--cascade`, a small stub tier at a quarter of the latency answers first and the
+    answers below the escalation confidence are re-asked with the full-latency tier.
+
+        python manage.py benchmark_llm_filter --papers 500 --latency 0.5 --error-rate 0.02 --concurrency 16
+        python manage.py benchmark_llm_filter --papers 500 --cascade --escalation-confidence 0.8
+
+    With `--batch`, every tier is screened as one batch file on the local batch stand-in.
+    """
+    help = "Measure LLM screening throughput, latency and token usage with the stub backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--papers", type=int, default=500, help="Number of papers to screen.")
+        parser.add_argument("--questions", type=int, default=3, help="Number of screening questions.")
+        parser.add_argument("--latency", type=float, default=0.5, help="Base latency of a stub call in seconds.")
+        parser.add_argument("--jitter", type=float, default=0.2, help="Maximum extra latency of a stub call in seconds.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a stub call failing.")
+        parser.add_argument("--concurrency", type=int, default=None, help="Calls made at once (LLM_FILTER_MAX_CONCURRENCY).")
+        parser.add_argument("--token-budget", type=int, default=None, help="Prompt token budget for packing papers (LLM_FILTER_TOKEN_BUDGET).")
+        parser.add_argument("--cascade", action="store_true", help="Screen with a small stub tier first, escalating to the large one.")
+        parser.add_argument("--large-price", type=float, nargs=2, default=[30.0, 60.0], metavar=("INPUT", "OUTPUT"), help="USD per million tokens of the large tier.")
+        parser.add_argument("--small-price", type=float, nargs=2, default=[0.15, 0.6], metavar=("INPUT", "OUTPUT"), help="USD per million tokens of the small tier.")
+        parser.add_argument("--batch", action="store_true", help="Screen through the local batch stand-in instead of online calls.")
+        parser.add_argument("--escalation-confidence", type=float, default=None, help="Confidence below which answers are escalated (LLM_FILTER_ESCALATION_CONFIDENCE).")
+
+    def handle(self, *args, **options):
+        run_id  = uuid.uuid4().hex[:8]
+        backend = StubLLM(
+            latency    = options["latency"],
+            jitter     = options["jitter"],
+            error_rate = options["error_rate"],
+            name       = f"stub-benchmark-{run_id}",
+        )
+        backends = [backend]
+        if options["cascade"]:
+            backends.insert(0, StubLLM(
+                latency    = options["latency"] / 4,
+                jitter     = options["jitter"] / 4,
+                error_rate = options["error_rate"],
+                name       = f"stub-benchmark-small-{run_id}",
+            ))
+        questions = [
+            FilterResponse(id=str(i), question=f"Does the paper address research question {i}?", answer="yes, no, unclear")
+            for i in range(1, options["questions"] + 1)
+        ]
+
+        llm_filter = LLMFilter(
+            max_concurrency       = options["concurrency"],
+            tokens_per_minute     = 10 ** 9,
+            token_budget          = options["token_budget"],
+            cascade               = backends,
+            escalation_confidence = options["escalation_confidence"],
+            batch_client          = LocalBatchClient(backends) if options["batch"] else None,
+            batch_poll_seconds    = 1,
+            prices                = {
+                backend.name: dict(zip(("input", "output"), options["large_price"])),
+                backends[0].name: dict(zip(("input", "output"), options["small_price"])),
+            } if options["cascade"] else {
+                backend.name: dict(zip(("input", "output"), options["large_price"])),
+            },
+        )
+        try:
+            start_time = time.perf_counter()
+            llm_filter.parse(self._papers(options["papers"]), questions)
+            results = llm_filter.completion()
+            elapsed = time.perf_counter() - start_time
+            usage   = llm_filter.run.summary()
+        finally:
+            ScreeningDecision.objects.filter(model__in=[tier.name for tier in backends]).delete()
+            ScreeningRun.objects.filter(screening_calls__model__in=[tier.name for tier in backends]).delete()
+
+        calls      = [call for tier in backends for call in tier.calls]
+        papers     = len(results)
+        failed     = sum(1 for result in results if result.get("error"))
+        latencies  = np.array([seconds for seconds, _, _, _ in calls])
+        tokens     = sum(input_tokens + output_tokens for _, input_tokens, output_tokens, _ in calls)
+        call_count = len(calls)
+
+        self.stdout.write(f"Screened {papers} papers with {len(questions)} questions in {elapsed:.2f}s")
+        self.stdout.write(f"  Calls:            {call_count} ({sum(1 for call in calls if call[3])} failed, {failed} papers unanswered)")
+        if options["cascade"]:
+            escalated = sum(1 for result in results if result.get("tier") == backend.name)
+            self.stdout.write(f"  Tiers:            {len(backends[0].calls)} small calls, {len(backend.calls)} large calls, {escalated} papers escalated")
+        self.stdout.write(f"  Throughput:       {papers / elapsed:.1f} papers/s")
+        if call_count:
+            self.stdout.write(f"  Call latency:     p50 {np.percentile(latencies, 50):.3f}s, p95 {np.percentile(latencies, 95):.3f}s")
+        self.stdout.write(f"  Tokens per paper: {tokens / max(papers, 1):.0f}")
+        self.stdout.write(f"  Cost:             ${usage['cost']:.4f} (${usage['cost'] / max(papers, 1) * 1000:.3f} per 1000 papers)")
+
+    def _papers(self, count: int):
+        """ Unsaved synthetic papers with metadata. """
+
+        return [
+            PublicationMetadata(
+                publication_id     = f"BENCH:{i}",
+                paper_title        = f"An empirical study of technique {i}",
+                abstract           = "We study the effect of the technique on developer productivity. " * 8,
+                conference_journal = "International Conference on Software Engineering",
+                publication_date   = date(2020, 1, 1),
+                citation_count     = i,
+            ) for i in range(count)
+        ]
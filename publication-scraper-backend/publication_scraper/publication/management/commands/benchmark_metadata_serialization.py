@@ -0,0 +1,83 @@
+import time
+from typing import Any, Tuple
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from publication.models import Publication, PublicationMetadata
+
+
+class Command(BaseCommand):
+    """
+    Benchmark PublicationMetadata serialization throughput.
+
+    Compares the JSON columns read by `to_dict` against the legacy `str(list)` columns,
+    which were decoded with `eval` on every serialization. Rows are inserted in a
+    transaction that is rolled back, so the database is left untouched.
+
+        python manage.py benchmark_metadata_serialization --rows 10000
+    """
+    help = "Compare metadata serialization throughput of JSON columns against legacy eval-decoded columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="Number of metadata rows to serialize.")
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+
+        with transaction.atomic():
+            self._populate(rows)
+            queryset = PublicationMetadata.objects.filter(publication__paper_id__startswith="BENCH:")
+
+            fetch_time, metadata = self._time(lambda: list(queryset))
+            json_time, _         = self._time(lambda: [md.to_dict() for md in metadata])
+
+            # Legacy rows held the `str(list)` form of both columns
+            for md in metadata:
+                md.authors          = str(md.authors)
+                md.publication_type = str(md.publication_type)
+            legacy_time, _       = self._time(lambda: [self._legacy_to_dict(md) for md in metadata])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Serialized {rows} rows (fetched in {fetch_time:.3f}s)")
+        self.stdout.write(f"  JSON columns:   {json_time:.3f}s ({rows / json_time:,.0f} rows/s)")
+        self.stdout.write(f"  Legacy eval():  {legacy_time:.3f}s ({rows / legacy_time:,.0f} rows/s)")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {legacy_time / json_time:.2f}x"))
+
+    def _populate(self, rows: int) -> None:
+        """ Insert synthetic publications with metadata. """
+
+        authors = [
+            { "name": f"Author {i}", "affiliation": [f"University {i}"] }
+            for i in range(5)
+        ]
+        Publication.objects.bulk_create([
+            Publication(paper_id=f"BENCH:{i}", paper_title=f"Paper {i}", search_string="benchmark", searched_from="benchmark")
+            for i in range(rows)
+        ], batch_size=1000)
+        PublicationMetadata.objects.bulk_create([
+            PublicationMetadata(
+                publication_id   = f"BENCH:{i}",
+                paper_title      = f"Paper {i}",
+                authors          = authors,
+                abstract         = "Lorem ipsum " * 50,
+                publication_date = "2020-01-01",
+                publication_type = ["journalarticle"],
+                citation_count   = i,
+            ) for i in range(rows)
+        ], batch_size=1000)
+
+    def _legacy_to_dict(self, md: PublicationMetadata):
+        """ Serialize as before the JSON migration: columns held `str(list)` and were eval'd on read. """
+
+        md_dict = md.to_dict()
+        for field in ["authors", "publication_type"]:
+            md_dict[field] = eval(md_dict[field])
+        return md_dict
+
+    def _time(self, func) -> Tuple[float, Any]:
+        """ Time a function call, returning the elapsed seconds and its result. """
+
+        start_time = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start_time, result
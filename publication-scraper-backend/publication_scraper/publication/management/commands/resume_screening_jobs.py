@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from publication.interfaces.filter.screening_job import background_screening
+
+
+class Command(BaseCommand):
+    """
+    Resume the batch screening jobs a deploy or worker restart interrupted, waiting for the
+    batches they had submitted and failing the jobs whose batch failed, expired or was cancelled.
+    Intended to run once the previous workers are gone, e.g. after every deploy:
+
+        python manage.py resume_screening_jobs
+    """
+    help = "Resume the pending and running batch screening jobs, collecting the batches they submitted."
+
+    def handle(self, *args, **options):
+        jobs = background_screening.resume()
+        background_screening.executor.shutdown(wait=True)
+
+        for job in jobs:
+            job.refresh_from_db()
+            self.stdout.write(f"{job.id}: {job.status}" + (f" ({job.error})" if job.error else ""))
+        self.stdout.write(self.style.SUCCESS(f"Resumed {len(jobs)} screening jobs."))
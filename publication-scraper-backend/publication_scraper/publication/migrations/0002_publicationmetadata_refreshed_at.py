@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-19 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publicationmetadata',
+            name='refreshed_at',
+            field=models.DateTimeField(db_index=True, default=None, null=True),
+        ),
+    ]
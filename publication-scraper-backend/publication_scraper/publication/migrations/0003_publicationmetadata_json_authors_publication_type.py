@@ -0,0 +1,64 @@
+# Generated by Django 4.2.14 on 2026-10-19 06:42
+
+import ast
+import json
+import re
+
+from django.db import migrations, models
+
+
+AUTHOR_NAME_PATTERN = re.compile(r"""['"]name['"]\s*:\s*['"]([^'"]*)['"]""")
+
+
+def parse_legacy_value(field, value):
+    """ Parse a `str(list)` value, salvaging author names from values truncated at 200 characters. """
+
+    if not value:
+        return []
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        if field == 'authors':
+            return [{ "name": name, "affiliation": ["No Affiliation"] } for name in AUTHOR_NAME_PATTERN.findall(value)]
+        return [value]
+
+
+def legacy_to_json(apps, schema_editor):
+    PublicationMetadata = apps.get_model('publication', 'PublicationMetadata')
+
+    rows = list(PublicationMetadata.objects.only('authors', 'publication_type'))
+    for row in rows:
+        row.authors          = json.dumps(parse_legacy_value('authors', row.authors))
+        row.publication_type = json.dumps(parse_legacy_value('publication_type', row.publication_type))
+    PublicationMetadata.objects.bulk_update(rows, ['authors', 'publication_type'], batch_size=500)
+
+
+def json_to_legacy(apps, schema_editor):
+    PublicationMetadata = apps.get_model('publication', 'PublicationMetadata')
+
+    rows = list(PublicationMetadata.objects.only('authors', 'publication_type'))
+    for row in rows:
+        row.authors          = str(json.loads(row.authors)) if row.authors else ""
+        row.publication_type = str(json.loads(row.publication_type)) if row.publication_type else ""
+    PublicationMetadata.objects.bulk_update(rows, ['authors', 'publication_type'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0002_publicationmetadata_refreshed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(legacy_to_json, json_to_legacy),
+        migrations.AlterField(
+            model_name='publicationmetadata',
+            name='authors',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AlterField(
+            model_name='publicationmetadata',
+            name='publication_type',
+            field=models.JSONField(default=list),
+        ),
+    ]
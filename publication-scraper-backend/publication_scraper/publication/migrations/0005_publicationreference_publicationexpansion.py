@@ -0,0 +1,46 @@
+# Generated by Django 4.2.14 on 2026-10-19 06:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0004_author'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicationExpansion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doi', models.CharField(max_length=200)),
+                ('type', models.CharField(choices=[('CITATION', 'CITATION'), ('REFERENCE', 'REFERENCE')], max_length=200)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PublicationReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('src_doi', models.CharField(max_length=200)),
+                ('ref_doi', models.CharField(max_length=200)),
+                ('ref_paper_title', models.TextField(default='')),
+                ('ref_url', models.CharField(default='', max_length=200)),
+                ('type', models.CharField(choices=[('CITATION', 'CITATION'), ('REFERENCE', 'REFERENCE')], max_length=200)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['src_doi', 'type', 'fetched_at'], name='reference_src_type_idx'), models.Index(fields=['ref_doi'], name='reference_dst_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='publicationreference',
+            constraint=models.UniqueConstraint(fields=('src_doi', 'ref_doi', 'type'), name='unique_reference_edge'),
+        ),
+        migrations.AddConstraint(
+            model_name='publicationexpansion',
+            constraint=models.UniqueConstraint(fields=('doi', 'type'), name='unique_expansion'),
+        ),
+    ]
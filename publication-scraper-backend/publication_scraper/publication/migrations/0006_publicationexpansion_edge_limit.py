@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-19 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0005_publicationreference_publicationexpansion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publicationexpansion',
+            name='edge_limit',
+            field=models.PositiveIntegerField(default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.14 on 2026-10-19 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0006_publicationexpansion_edge_limit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningDecision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('paper_hash', models.CharField(max_length=64)),
+                ('question_hash', models.CharField(max_length=64)),
+                ('model', models.CharField(max_length=200)),
+                ('prompt_version', models.CharField(max_length=50)),
+                ('paper_id', models.CharField(max_length=200)),
+                ('question_id', models.CharField(max_length=200)),
+                ('answer', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='screeningdecision',
+            constraint=models.UniqueConstraint(fields=('paper_hash', 'question_hash', 'model', 'prompt_version'), name='unique_screening_decision'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-19 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0007_screeningdecision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screeningdecision',
+            name='confidence',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
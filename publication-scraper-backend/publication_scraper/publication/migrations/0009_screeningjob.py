@@ -0,0 +1,27 @@
+# Generated by Django 4.2.14 on 2026-10-19 07:08
+
+from django.db import migrations, models
+import publication.models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0008_screeningdecision_confidence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('PENDING', 'PENDING'), ('RUNNING', 'RUNNING'), ('COMPLETED', 'COMPLETED'), ('FAILED', 'FAILED')], default=publication.models.ScreeningJobStatus['PENDING'], max_length=200)),
+                ('request', models.JSONField()),
+                ('results', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.14 on 2026-10-19 07:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0009_screeningjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('papers', models.IntegerField(default=0)),
+                ('calls', models.IntegerField(default=0)),
+                ('failed_calls', models.IntegerField(default=0)),
+                ('retries', models.IntegerField(default=0)),
+                ('prompt_tokens', models.IntegerField(default=0)),
+                ('completion_tokens', models.IntegerField(default=0)),
+                ('cost', models.FloatField(default=0.0)),
+                ('duration', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScreeningCall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=200)),
+                ('paper_ids', models.JSONField(default=list)),
+                ('prompt_tokens', models.IntegerField(default=0)),
+                ('completion_tokens', models.IntegerField(default=0)),
+                ('cost', models.FloatField(default=0.0)),
+                ('latency', models.FloatField(default=0.0)),
+                ('attempts', models.IntegerField(default=1)),
+                ('batch', models.BooleanField(default=False)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='screening_calls', to='publication.screeningrun')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='screeningjob',
+            name='run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='publication.screeningrun'),
+        ),
+    ]
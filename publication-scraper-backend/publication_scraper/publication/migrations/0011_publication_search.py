@@ -0,0 +1,112 @@
+from django.db import migrations
+
+# Full-text index over the title, abstract, author names and venue of every publication.
+#
+# FTS5 rows are keyed by the id of a stable publication_searchdocument row per paper id, and
+# triggers keep them in sync with publications and their metadata, including bulk writes that
+# bypass model signals.
+
+ABSTRACT = "CASE WHEN {row}.abstract = 'No abstract available.' THEN '' ELSE coalesce({row}.abstract, '') END"
+AUTHORS = (
+    "CASE WHEN json_valid({row}.authors) THEN coalesce(("
+    "SELECT group_concat(CASE author.type WHEN 'object' THEN json_extract(author.value, '$.name') ELSE author.value END, ' ') "
+    "FROM json_each({row}.authors) AS author), '') "
+    "ELSE coalesce({row}.authors, '') END"
+)
+DOCUMENT = "(SELECT id FROM publication_searchdocument WHERE paper_id = {paper_id})"
+
+
+def metadata_update(row: str) -> str:
+    return f"""
+        UPDATE publication_search
+        SET abstract = {ABSTRACT.format(row=row)},
+            authors  = {AUTHORS.format(row=row)},
+            venue    = coalesce({row}.conference_journal, '')
+        WHERE rowid = {DOCUMENT.format(paper_id=f"{row}.publication_id")};
+    """
+
+
+CREATE_SQL = [
+    """
+    CREATE TABLE publication_searchdocument (
+        id INTEGER PRIMARY KEY,
+        paper_id VARCHAR(200) NOT NULL UNIQUE
+    );
+    """,
+    """
+    CREATE VIRTUAL TABLE publication_search USING fts5(
+        title, abstract, authors, venue,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    );
+    """,
+    """
+    INSERT INTO publication_searchdocument (paper_id)
+    SELECT paper_id FROM publication_publication;
+    """,
+    f"""
+    INSERT INTO publication_search (rowid, title, abstract, authors, venue)
+    SELECT document.id, publication.paper_title,
+           {ABSTRACT.format(row="metadata")}, {AUTHORS.format(row="metadata")}, coalesce(metadata.conference_journal, '')
+    FROM publication_publication AS publication
+    JOIN publication_searchdocument AS document ON document.paper_id = publication.paper_id
+    LEFT JOIN publication_publicationmetadata AS metadata ON metadata.publication_id = publication.paper_id;
+    """,
+    f"""
+    CREATE TRIGGER publication_search_publication_insert AFTER INSERT ON publication_publication BEGIN
+        INSERT OR IGNORE INTO publication_searchdocument (paper_id) VALUES (NEW.paper_id);
+        INSERT INTO publication_search (rowid, title, abstract, authors, venue)
+        VALUES ({DOCUMENT.format(paper_id="NEW.paper_id")}, NEW.paper_title, '', '', '');
+    END;
+    """,
+    f"""
+    CREATE TRIGGER publication_search_publication_update AFTER UPDATE OF paper_title ON publication_publication
+    WHEN NEW.paper_title IS NOT OLD.paper_title BEGIN
+        UPDATE publication_search SET title = NEW.paper_title WHERE rowid = {DOCUMENT.format(paper_id="NEW.paper_id")};
+    END;
+    """,
+    f"""
+    CREATE TRIGGER publication_search_publication_delete AFTER DELETE ON publication_publication BEGIN
+        DELETE FROM publication_search WHERE rowid = {DOCUMENT.format(paper_id="OLD.paper_id")};
+        DELETE FROM publication_searchdocument WHERE paper_id = OLD.paper_id;
+    END;
+    """,
+    f"""
+    CREATE TRIGGER publication_search_metadata_insert AFTER INSERT ON publication_publicationmetadata BEGIN
+        {metadata_update("NEW")}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER publication_search_metadata_update
+    AFTER UPDATE OF abstract, authors, conference_journal ON publication_publicationmetadata BEGIN
+        {metadata_update("NEW")}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER publication_search_metadata_delete AFTER DELETE ON publication_publicationmetadata BEGIN
+        UPDATE publication_search SET abstract = '', authors = '', venue = ''
+        WHERE rowid = {DOCUMENT.format(paper_id="OLD.publication_id")};
+    END;
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS publication_search_metadata_delete;",
+    "DROP TRIGGER IF EXISTS publication_search_metadata_update;",
+    "DROP TRIGGER IF EXISTS publication_search_metadata_insert;",
+    "DROP TRIGGER IF EXISTS publication_search_publication_delete;",
+    "DROP TRIGGER IF EXISTS publication_search_publication_update;",
+    "DROP TRIGGER IF EXISTS publication_search_publication_insert;",
+    "DROP TABLE IF EXISTS publication_search;",
+    "DROP TABLE IF EXISTS publication_searchdocument;",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0010_screening_usage'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, reverse_sql=DROP_SQL),
+    ]
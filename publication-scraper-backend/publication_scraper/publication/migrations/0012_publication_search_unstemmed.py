@@ -0,0 +1,44 @@
+import importlib
+
+from django.db import migrations
+
+# The porter stemmer indexes "Automated" as "autom", so prefix queries longer than the stem,
+# like automat*, matched nothing. The index is rebuilt with unicode61 tokens only, so that
+# prefixes match the words as they are written. The triggers keep writing to the table by name.
+
+publication_search = importlib.import_module("publication.migrations.0011_publication_search")
+
+
+def rebuild_sql(tokenize: str):
+    return [
+        "DROP TABLE publication_search;",
+        f"""
+        CREATE VIRTUAL TABLE publication_search USING fts5(
+            title, abstract, authors, venue,
+            tokenize = '{tokenize}'
+        );
+        """,
+        f"""
+        INSERT INTO publication_search (rowid, title, abstract, authors, venue)
+        SELECT document.id, publication.paper_title,
+               {publication_search.ABSTRACT.format(row="metadata")}, {publication_search.AUTHORS.format(row="metadata")},
+               coalesce(metadata.conference_journal, '')
+        FROM publication_publication AS publication
+        JOIN publication_searchdocument AS document ON document.paper_id = publication.paper_id
+        LEFT JOIN publication_publicationmetadata AS metadata ON metadata.publication_id = publication.paper_id;
+        """,
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0011_publication_search'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            rebuild_sql('unicode61 remove_diacritics 2'),
+            reverse_sql=rebuild_sql('porter unicode61 remove_diacritics 2'),
+        ),
+    ]
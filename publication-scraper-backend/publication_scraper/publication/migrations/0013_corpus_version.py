@@ -0,0 +1,70 @@
+from django.db import migrations
+
+# A counter bumped whenever the title of a publication or the abstract of its metadata is
+# added, changed or removed, including bulk writes that bypass model signals and updates that
+# leave refreshed_at alone. Indexes built over the corpus compare it to know when to rebuild.
+
+BUMP = "UPDATE publication_corpusversion SET version = version + 1;"
+
+CREATE_SQL = [
+    """
+    CREATE TABLE publication_corpusversion (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );
+    """,
+    "INSERT INTO publication_corpusversion (id, version) VALUES (1, 0);",
+    f"""
+    CREATE TRIGGER publication_corpusversion_publication_insert AFTER INSERT ON publication_publication BEGIN
+        {BUMP}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER publication_corpusversion_publication_update AFTER UPDATE OF paper_title ON publication_publication
+    WHEN NEW.paper_title IS NOT OLD.paper_title BEGIN
+        {BUMP}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER publication_corpusversion_publication_delete AFTER DELETE ON publication_publication BEGIN
+        {BUMP}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER publication_corpusversion_metadata_insert AFTER INSERT ON publication_publicationmetadata BEGIN
+        {BUMP}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER publication_corpusversion_metadata_update AFTER UPDATE OF abstract ON publication_publicationmetadata
+    WHEN NEW.abstract IS NOT OLD.abstract BEGIN
+        {BUMP}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER publication_corpusversion_metadata_delete AFTER DELETE ON publication_publicationmetadata BEGIN
+        {BUMP}
+    END;
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS publication_corpusversion_metadata_delete;",
+    "DROP TRIGGER IF EXISTS publication_corpusversion_metadata_update;",
+    "DROP TRIGGER IF EXISTS publication_corpusversion_metadata_insert;",
+    "DROP TRIGGER IF EXISTS publication_corpusversion_publication_delete;",
+    "DROP TRIGGER IF EXISTS publication_corpusversion_publication_update;",
+    "DROP TRIGGER IF EXISTS publication_corpusversion_publication_insert;",
+    "DROP TABLE IF EXISTS publication_corpusversion;",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0012_publication_search_unstemmed'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, reverse_sql=DROP_SQL),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+# The lexical prescreen counts the words of metadata titles, which the corpus version did not
+# follow, so it is also bumped when the title of a metadata row changes.
+
+CREATE_SQL = """
+    CREATE TRIGGER publication_corpusversion_metadata_title_update AFTER UPDATE OF paper_title ON publication_publicationmetadata
+    WHEN NEW.paper_title IS NOT OLD.paper_title BEGIN
+        UPDATE publication_corpusversion SET version = version + 1;
+    END;
+"""
+
+DROP_SQL = "DROP TRIGGER IF EXISTS publication_corpusversion_metadata_title_update;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0013_corpus_version'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, reverse_sql=DROP_SQL),
+    ]
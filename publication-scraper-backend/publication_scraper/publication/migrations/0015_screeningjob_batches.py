@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-19 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publication', '0014_corpus_version_metadata_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screeningjob',
+            name='batches',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
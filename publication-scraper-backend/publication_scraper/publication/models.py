@@ -1,8 +1,14 @@
+import hashlib
 import json
+import unicodedata
+import uuid
+from datetime import timedelta
 from enum import Enum
-from typing import List
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from django.db import models, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
 
 from scraping.infrastructure.data_export.exportable import Exportable
 from utils import Logger
@@ -104,7 +110,7 @@ class PublicationMetadata(models.Model):
     publication             = models.OneToOneField(Publication, on_delete=models.CASCADE, related_name='metadata')
     paper_title             = models.CharField(max_length=200, default="")
     doi                     = models.CharField(max_length=200, default="")
-    authors                 = models.CharField(max_length=200, default="")
+    authors                 = models.JSONField(default=list)
     abstract                = models.TextField()
     publisher               = models.CharField(max_length=200, default="")
     semantic_scholar_url    = models.CharField(max_length=200, default="")
@@ -112,10 +118,18 @@ class PublicationMetadata(models.Model):
     publication_date        = models.DateField()
     field_of_study          = models.CharField(max_length=200, default="")
     conference_journal      = models.CharField(max_length=200, default="")
-    publication_type        = models.CharField(max_length=200, default="")
+    publication_type        = models.JSONField(default=list)
     search_string           = models.CharField(max_length=200, default="")
     citation_count          = models.IntegerField()
     searched_from           = models.CharField(max_length=200, default="")
+    refreshed_at            = models.DateTimeField(null=True, default=None, db_index=True)
+    
+    def is_stale(self, max_age: timedelta) -> bool:
+        """ Check whether the metadata was last refreshed more than `max_age` ago. """
+        
+        if self.refreshed_at is None:
+            return True
+        return timezone.now() - self.refreshed_at > max_age
     
     def to_dict(self, show_publication: bool = False):
         fields  = [field.name for field in self._meta.fields]
@@ -125,16 +139,6 @@ class PublicationMetadata(models.Model):
             if field not in ['id', 'publication']
         }
 
-        # Eval-able fields
-        evaluable_fields = ['authors', 'publication_type']
-        for field in evaluable_fields:
-            if isinstance(md_dict[field], str):
-                try:
-                    md_dict[field] = eval(md_dict[field])
-                except Exception as e:
-                    print(f"Error evaluating field {field}: {e}")
-                    pass
-
         if not(show_publication):
             return md_dict
         return { **md_dict, **self.publication.to_dict() }   
@@ -181,28 +185,105 @@ class PublicationMetadata(models.Model):
         log.info(f"──────── Bulk upserted {len(to_update)}, created {len(to_create)} publications ────────")
 
 
+class Author(models.Model):
+    """
+    Author affiliations gathered from every Crossref and Semantic Scholar record seen so far,
+    keyed by the normalized "given family" name of the author.
+    """
+    name_key        = models.CharField(max_length=200, unique=True)
+    name            = models.CharField(max_length=200, default="")
+    affiliations    = models.JSONField(default=list)
+    updated_at      = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} - {self.affiliations}"
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        """
+        Normalize an author name to its lowercase "given family" key.
+
+        >>> Author.normalize_name("J. R. R. Tolkien")
+        "j tolkien"
+        """
+        name = unicodedata.normalize("NFKD", name or "")
+        name = "".join(char for char in name if not unicodedata.combining(char))
+        components = name.replace(".", " ").replace(",", " ").lower().split()
+        if not components:
+            return ""
+        return f"{components[0]} {components[-1]}"
+
+    @staticmethod
+    def bulk_record(affiliations: Dict[str, List[str]]) -> None:
+        """ Merge the given author name -> affiliations into the table. """
+
+        by_key = {}
+        for name, affils in affiliations.items():
+            key = Author.normalize_name(name)
+            if key and affils:
+                entry = by_key.setdefault(key, (name, []))
+                entry[1].extend(affil for affil in affils if affil and affil not in entry[1])
+        if not by_key:
+            return
+
+        existing  = {author.name_key: author for author in Author.objects.filter(name_key__in=by_key.keys())}
+        to_update = []
+        to_create = []
+
+        for key, (name, affils) in by_key.items():
+            if author := existing.get(key):
+                new_affils = [affil for affil in affils if affil not in author.affiliations]
+                if new_affils:
+                    author.affiliations = author.affiliations + new_affils
+                    author.updated_at   = timezone.now()
+                    to_update.append(author)
+            else:
+                to_create.append(Author(name_key=key, name=name, affiliations=affils))
+
+        with transaction.atomic():
+            if to_update:
+                Author.objects.bulk_update(to_update, ['affiliations', 'updated_at'])
+            if to_create:
+                # Another extraction may have recorded the same author concurrently
+                Author.objects.bulk_create(to_create, ignore_conflicts=True)
+
+    @staticmethod
+    def lookup(names: List[str]) -> Dict[str, List[str]]:
+        """ Get the known affiliations of the given author names in a single query, keyed by normalized name. """
+
+        keys = {Author.normalize_name(name) for name in names} - {""}
+        if not keys:
+            return {}
+        return dict(Author.objects.filter(name_key__in=keys).values_list('name_key', 'affiliations'))
+
+
 class PublicationReferenceType(str, Enum):
     CITATION = 'CITATION'
     REFERENCE = 'REFERENCE'
 
 
-class PublicationReference:
-
-    def __init__(
-        self,
-        src: Publication,
-        src_doi: str,
-        ref_paper_title: str,
-        ref_doi: str,
-        ref_url: str,
-        type: PublicationReferenceType
-    ):
-        self.src = src
-        self.src_doi = src_doi
-        self.ref_paper_title = ref_paper_title
-        self.ref_doi = ref_doi
-        self.ref_url = ref_url
-        self.type = type
+class PublicationReference(models.Model):
+    """
+    A citation edge found while snowballing, persisted so repeat runs can be served locally.
+    
+    src_doi - DOI of the paper that was expanded
+    ref_doi - DOI of the paper it references (REFERENCE) or is cited by (CITATION)
+    """
+    src_doi         = models.CharField(max_length=200)
+    ref_doi         = models.CharField(max_length=200)
+    ref_paper_title = models.TextField(default="")
+    ref_url         = models.CharField(max_length=200, default="")
+    type            = models.CharField(max_length=200, choices=[(ref_type.value, ref_type.name) for ref_type in PublicationReferenceType])
+    fetched_at      = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['src_doi', 'ref_doi', 'type'], name='unique_reference_edge')
+        ]
+        indexes = [
+            models.Index(fields=['src_doi', 'type', 'fetched_at'], name='reference_src_type_idx'),
+            models.Index(fields=['ref_doi'], name='reference_dst_idx'),
+        ]
     
     def to_dict(self):
         return {
@@ -213,7 +294,283 @@ class PublicationReference:
         }
     
     def __str__(self) -> str:
-        __all_fields__ = [field for field in self.__dict__]
-        return f"PublicationReference({', '.join([f'{field}={getattr(self, field)}' for field in __all_fields__])})"
-    
-    
\ No newline at end of file
+        return f"PublicationReference({self.type}: {self.src_doi} -> {self.ref_doi})"
+
+    @staticmethod
+    def fresh_dois(
+        dois: List[str], 
+        reference_types: List[PublicationReferenceType], 
+        max_age: timedelta, 
+        max_edges: Optional[int] = None
+    ) -> Set[str]:
+        """
+        DOIs whose edges of every given type were fetched within `max_age`,
+        and with at least `max_edges` edges per type, or all of them if None.
+        """
+
+        expansions = PublicationExpansion.objects.filter(
+            doi__in=dois, 
+            type__in=reference_types, 
+            fetched_at__gte=timezone.now() - max_age
+        )
+        if max_edges is None:
+            expansions = expansions.filter(edge_limit__isnull=True)
+        else:
+            expansions = expansions.filter(Q(edge_limit__isnull=True) | Q(edge_limit__gte=max_edges))
+
+        expanded_types = {}
+        for doi, ref_type in expansions.values_list('doi', 'type'):
+            expanded_types.setdefault(doi, set()).add(ref_type)
+        return {doi for doi, types in expanded_types.items() if len(types) == len(set(reference_types))}
+
+    @staticmethod
+    def bulk_replace(
+        references: Dict[str, List['PublicationReference']], 
+        reference_types: List[PublicationReferenceType],
+        edge_limit: Optional[int] = None
+    ) -> None:
+        """
+        Replace the stored edges of the given expanded DOIs and mark them as expanded now.
+        `edge_limit` is the per-type cap the edges were fetched with, if any.
+        """
+
+        if not references:
+            return
+        
+        now = timezone.now()
+        new_references = [reference for edges in references.values() for reference in edges]
+        for reference in new_references:
+            reference.fetched_at = now
+
+        with transaction.atomic():
+            PublicationReference.objects.filter(src_doi__in=references.keys(), type__in=reference_types).delete()
+            PublicationReference.objects.bulk_create(new_references, batch_size=1000, ignore_conflicts=True)
+            PublicationExpansion.objects.bulk_create(
+                [
+                    PublicationExpansion(doi=doi, type=ref_type, fetched_at=now, edge_limit=edge_limit) 
+                    for doi in references for ref_type in reference_types
+                ],
+                update_conflicts=True,
+                unique_fields=['doi', 'type'],
+                update_fields=['fetched_at', 'edge_limit'],
+            )
+        
+        log.info(f"──────── Stored {len(new_references)} edges of {len(references)} papers ────────")
+
+
+class PublicationExpansion(models.Model):
+    """
+    When the references or citations of a paper were last fetched, including papers without any.
+    `edge_limit` is the per-type cap the edges were fetched with, None if uncapped.
+    """
+    doi         = models.CharField(max_length=200)
+    type        = models.CharField(max_length=200, choices=[(ref_type.value, ref_type.name) for ref_type in PublicationReferenceType])
+    fetched_at  = models.DateTimeField(default=timezone.now)
+    edge_limit  = models.PositiveIntegerField(null=True, default=None)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['doi', 'type'], name='unique_expansion')
+        ]
+
+
+class ScreeningDecision(models.Model):
+    """
+    An LLM screening answer for one paper and one question.
+
+    Decisions are keyed by hashes of the rendered paper and of the question, the model and
+    the prompt version, so an answer is reused until any of them changes. The confidence the
+    model gave decides whether a screening cascade re-asks a larger model.
+    """
+    paper_hash      = models.CharField(max_length=64)
+    question_hash   = models.CharField(max_length=64)
+    model           = models.CharField(max_length=200)
+    prompt_version  = models.CharField(max_length=50)
+    paper_id        = models.CharField(max_length=200)
+    question_id     = models.CharField(max_length=200)
+    answer          = models.TextField()
+    confidence      = models.FloatField(null=True, blank=True)
+    created_at      = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['paper_hash', 'question_hash', 'model', 'prompt_version'], name='unique_screening_decision')
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.paper_id} - {self.question_id}: {self.answer}"
+
+    @staticmethod
+    def hash(text: str) -> str:
+        """ Hash a rendered paper or question. """
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    @staticmethod
+    def lookup(
+        paper_hashes: List[str],
+        question_hashes: List[str],
+        model: str,
+        prompt_version: str
+    ) -> Dict[Tuple[str, str], Tuple[str, Optional[float]]]:
+        """
+        Get the stored answers and confidences of the given papers and questions in one query,
+        keyed by (paper hash, question hash).
+        """
+
+        decisions = ScreeningDecision.objects.filter(
+            paper_hash__in=set(paper_hashes),
+            question_hash__in=set(question_hashes),
+            model=model,
+            prompt_version=prompt_version,
+        ).values_list('paper_hash', 'question_hash', 'answer', 'confidence')
+        return {
+            (paper_hash, question_hash): (answer, confidence)
+            for paper_hash, question_hash, answer, confidence in decisions
+        }
+
+    @staticmethod
+    def bulk_record(decisions: List['ScreeningDecision']) -> None:
+        """ Store new decisions, keeping the existing answer of a decision made concurrently. """
+
+        if decisions:
+            ScreeningDecision.objects.bulk_create(decisions, batch_size=500, ignore_conflicts=True)
+
+
+class ScreeningRun(models.Model):
+    """
+    The LLM usage of a screening run: totals over its calls, each stored as a ScreeningCall.
+
+    id - Auto-generated UUID field
+    papers - the papers the run screened, including the prescreened and cached ones
+    retries - attempts beyond the first, over all calls
+    cost - in USD, at LLM_PRICES_PER_MILLION_TOKENS
+    duration - wall time of the run, in seconds
+    """
+    id                  = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    papers              = models.IntegerField(default=0)
+    calls               = models.IntegerField(default=0)
+    failed_calls        = models.IntegerField(default=0)
+    retries             = models.IntegerField(default=0)
+    prompt_tokens       = models.IntegerField(default=0)
+    completion_tokens   = models.IntegerField(default=0)
+    cost                = models.FloatField(default=0.0)
+    duration            = models.FloatField(default=0.0)
+    created_at          = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.id} - {self.calls} calls - ${self.cost:.4f}"
+
+    def summary(self) -> Dict[str, object]:
+        """ The totals of the run, with call latency percentiles and a breakdown by model. """
+
+        latencies = sorted(self.screening_calls.values_list('latency', flat=True))
+        models_usage = self.screening_calls.values('model').annotate(
+            calls             = Count('id'),
+            prompt_tokens     = Sum('prompt_tokens'),
+            completion_tokens = Sum('completion_tokens'),
+            cost              = Sum('cost'),
+        )
+        return {
+            "run_id": self.id,
+            "papers": self.papers,
+            "calls": self.calls,
+            "failed_calls": self.failed_calls,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": round(self.cost, 6),
+            "duration": round(self.duration, 3),
+            "latency": {
+                "p50": self._percentile(latencies, 0.5),
+                "p95": self._percentile(latencies, 0.95),
+                "max": self._percentile(latencies, 1.0),
+            },
+            "models": {
+                usage.pop('model'): {**usage, "cost": round(usage["cost"] or 0.0, 6)} for usage in models_usage
+            },
+        }
+
+    @staticmethod
+    def _percentile(values: List[float], quantile: float) -> Optional[float]:
+        if not values:
+            return None
+        return round(values[round(quantile * (len(values) - 1))], 3)
+
+
+class ScreeningCall(models.Model):
+    """
+    One LLM call of a screening run: the papers it screened, its token usage and cost,
+    the latency of its request and how many attempts it took. Batch calls report the
+    time their batch took as latency.
+    """
+    run                 = models.ForeignKey(ScreeningRun, on_delete=models.CASCADE, related_name='screening_calls')
+    model               = models.CharField(max_length=200)
+    paper_ids           = models.JSONField(default=list)
+    prompt_tokens       = models.IntegerField(default=0)
+    completion_tokens   = models.IntegerField(default=0)
+    cost                = models.FloatField(default=0.0)
+    latency             = models.FloatField(default=0.0)
+    attempts            = models.IntegerField(default=1)
+    batch               = models.BooleanField(default=False)
+    error               = models.TextField(null=True, blank=True)
+    created_at          = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.model} - {len(self.paper_ids)} papers - {self.prompt_tokens + self.completion_tokens} tokens"
+
+
+class ScreeningJobStatus(str, Enum):
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    COMPLETED = 'COMPLETED'
+    FAILED = 'FAILED'
+
+
+class ScreeningJob(models.Model):
+    """
+    A batch screening run, queued by the LLM filter batch endpoint and run in the background.
+
+    id - Auto-generated UUID field
+    request - the paper ids, questions and prescreen options of the run
+    results - the screening results, once the run completed
+    error - why the run failed, if it did
+    run - the LLM usage of the run
+    batches - the batches submitted for the run: their id, tier, batch file path and calls,
+              the status they reached, and whether their answers were collected, so that a
+              run interrupted by a restart resumes from them (see `resume_screening_jobs`)
+    """
+    id          = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status      = models.CharField(max_length=200, default=ScreeningJobStatus.PENDING, choices=[(status.value, status.name) for status in ScreeningJobStatus])
+    request     = models.JSONField()
+    results     = models.JSONField(null=True, blank=True)
+    error       = models.TextField(null=True, blank=True)
+    run         = models.ForeignKey(ScreeningRun, null=True, blank=True, on_delete=models.SET_NULL)
+    batches     = models.JSONField(default=list, blank=True)
+    created_at  = models.DateTimeField(auto_now_add=True)
+    updated_at  = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.id} - {self.status}"
+
+    def record_batch(self, batch: Dict[str, Any]) -> None:
+        """ Store a submitted batch, or merge what changed about one already stored, by its batch id. """
+
+        batches = [stored for stored in self.batches if stored["batch_id"] != batch["batch_id"]]
+        previous = next((stored for stored in self.batches if stored["batch_id"] == batch["batch_id"]), {})
+        self.batches = batches + [{**previous, **batch}]
+        self.save(update_fields=['batches', 'updated_at'])
+
+    def uncollected_batches(self) -> List[Dict[str, Any]]:
+        """ The submitted batches whose answers were never collected, e.g. because the worker restarted. """
+        return [batch for batch in self.batches if not batch.get("collected")]
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "results": self.results,
+            "error": self.error,
+            "usage": self.run.summary() if self.run else None,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from scraping.serializers.core_serializers import QuerySerializer
 
+from .interfaces.snowballing_pager import SnowballingPager
+
 
 class PublicationSnowballingSerializer(serializers.Serializer):
   SEARCH_CHOICES = (
@@ -10,6 +12,42 @@ class PublicationSnowballingSerializer(serializers.Serializer):
   publication_ids = serializers.ListField(child=serializers.CharField())
   search_type = serializers.ChoiceField(choices=SEARCH_CHOICES, default='forward')
   show_metadata = serializers.BooleanField(default=False)
+  max_edges = serializers.IntegerField(default=None, allow_null=True, min_value=1)
+  
+class PublicationSnowballingSummarySerializer(serializers.Serializer):
+  publication_ids = serializers.ListField(child=serializers.CharField())
+
+class PublicationSnowballingPageSerializer(serializers.Serializer):
+  SEARCH_CHOICES = (
+    ('forward', 'Forward'),
+    ('backward', 'Backward'),
+  )
+  paper_id = serializers.CharField()
+  search_type = serializers.ChoiceField(choices=SEARCH_CHOICES, default='forward')
+  cursor = serializers.CharField(default=None, allow_null=True)
+  page_size = serializers.IntegerField(default=50, min_value=1, max_value=500)
+  fields = serializers.CharField(default="", allow_blank=True)
+
+  def validate_fields(self, value):
+    """ Parse the comma separated field names. """
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    allowed = SnowballingPager.PUBLICATION_FIELDS + SnowballingPager.METADATA_FIELDS
+    if unknown := [field for field in fields if field not in allowed]:
+      raise serializers.ValidationError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+class PublicationCitationCrawlSerializer(serializers.Serializer):
+  DIRECTION_CHOICES = (
+    ('forward', 'Forward'),
+    ('backward', 'Backward'),
+    ('both', 'Both'),
+  )
+  publication_ids = serializers.ListField(child=serializers.CharField())
+  direction = serializers.ChoiceField(choices=DIRECTION_CHOICES, default='forward')
+  depth = serializers.IntegerField(default=2, min_value=1, max_value=5)
+  max_nodes = serializers.IntegerField(default=1000, min_value=1)
+  max_edges = serializers.IntegerField(default=None, allow_null=True, min_value=1)
+  show_metadata = serializers.BooleanField(default=False)
   
 class PublicationValidationSerializer(serializers.Serializer):
 
@@ -25,7 +63,20 @@ class LLMFilterQuestionSerializer(serializers.Serializer):
     question = serializers.CharField()
     answer = serializers.CharField()
 
+class LLMFilterPrescreenSerializer(serializers.Serializer):
+
+  terms = serializers.ListField(child=serializers.CharField(), allow_empty=False)
+  exclude_below = serializers.FloatField(default=0.1, min_value=0, max_value=1)
+  include_above = serializers.FloatField(default=0.8, min_value=0, max_value=1)
+  require_abstract = serializers.BooleanField(default=True)
+
+  def validate(self, data):
+    if data['exclude_below'] > data['include_above']:
+      raise serializers.ValidationError("exclude_below must not be greater than include_above.")
+    return data
+
 class PublicationLLMFilterSerializer(serializers.Serializer):
 
   questions = serializers.ListField(child=LLMFilterQuestionSerializer())
-  paper_ids = serializers.ListField(child=serializers.CharField(), default=[])
\ No newline at end of file
+  paper_ids = serializers.ListField(child=serializers.CharField(), default=[])
+  prescreen = LLMFilterPrescreenSerializer(required=False)
\ No newline at end of file
@@ -1,13 +1,21 @@
 from django.urls import path
 
 from .views import (
+  PublicationCitationCrawlView,
+  PublicationLLMFilterBatchView,
   PublicationLLMFilterView,
+  PublicationSnowballingPageView,
+  PublicationSnowballingSummaryView,
   PublicationSnowballingView,
   PublicationValidationView,
 )
 
 urlpatterns = [
   path('snowballing', PublicationSnowballingView.as_view(), name='snowballing'),
+  path('snowballing/summary', PublicationSnowballingSummaryView.as_view(), name='snowballing-summary'),
+  path('snowballing/references', PublicationSnowballingPageView.as_view(), name='snowballing-references'),
+  path('snowballing/crawl', PublicationCitationCrawlView.as_view(), name='snowballing-crawl'),
   path('validation', PublicationValidationView.as_view(), name='validation'),
   path('llm-filter', PublicationLLMFilterView.as_view(), name='llm-filter'),
+  path('llm-filter/batch', PublicationLLMFilterBatchView.as_view(), name='llm-filter-batch'),
 ]
\ No newline at end of file
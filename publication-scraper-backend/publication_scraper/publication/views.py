@@ -2,18 +2,24 @@ import logging
 from itertools import product
 
 from django.http import JsonResponse
-from rest_framework.status import HTTP_400_BAD_REQUEST
+from django.shortcuts import get_object_or_404
+from rest_framework.status import HTTP_202_ACCEPTED, HTTP_400_BAD_REQUEST
 from rest_framework.views import APIView
 from utils import Logger
 
 from .interfaces.backward_search import BackwardSearch
-from .interfaces.filter.llm_filter import FilterResponse, LLMFilter
+from .interfaces.citation_crawler import CitationCrawler
+from .interfaces.filter.screening_job import background_screening, screen
 from .interfaces.forward_search import ForwardSearch
+from .interfaces.snowballing_pager import InvalidCursor, SnowballingPager
 from .interfaces.validation import PublicationValidator
-from .models import Publication, PublicationMetadata
+from .models import Publication, PublicationReferenceType, ScreeningJob
 from .serializers import (
+    PublicationCitationCrawlSerializer,
     PublicationLLMFilterSerializer,
+    PublicationSnowballingPageSerializer,
     PublicationSnowballingSerializer,
+    PublicationSnowballingSummarySerializer,
     PublicationValidationSerializer,
 )
 
@@ -28,19 +34,98 @@ class PublicationSnowballingView(APIView):
             publication_ids = serializer.validated_data.get('publication_ids')  
             search_type = serializer.validated_data.get('search_type')
             show_metadata = serializer.validated_data.get('show_metadata')
-            publications = Publication.objects.filter(paper_id__in=publication_ids)
+            max_edges = serializer.validated_data.get('max_edges')
+            publications = Publication.objects.filter(paper_id__in=publication_ids).select_related('metadata')
 
             log.info(f"Snowballing {search_type} search for {len(publications)} publications.")
             
             if search_type == 'forward':
-                fs = ForwardSearch(publications, show_metadata=show_metadata)
-                results = fs.search()
+                search = ForwardSearch(publications, show_metadata=show_metadata, max_edges=max_edges)
+                result_key = "references"
 
             elif search_type == 'backward':
-                bs = BackwardSearch(publications, show_metadata=show_metadata)
-                results = bs.search()
+                search = BackwardSearch(publications, show_metadata=show_metadata, max_edges=max_edges)
+                result_key = "citations"
+
+            results = search.search()
+            candidates = search.rank_candidates(result_key)
                 
-            return JsonResponse({ "results": results})
+            return JsonResponse({ "results": results, "candidates": candidates })
+        return JsonResponse(serializer.errors, status=HTTP_400_BAD_REQUEST)
+
+
+class PublicationSnowballingSummaryView(APIView):
+
+    def post(self, request):
+        """
+        Summarize the seeds without expanding them: reference and citation counts,
+        and how many of those edges are already stored and known locally.
+        """
+        serializer = PublicationSnowballingSummarySerializer(data=request.data)
+        if serializer.is_valid():
+
+            publication_ids = serializer.validated_data.get('publication_ids')
+            publications = Publication.objects.filter(paper_id__in=publication_ids).select_related('metadata')
+            seeds, skipped = SnowballingPager.split_seeds(publications)
+
+            log.info(f"Summarizing {len(seeds)} snowballing seeds.")
+            return JsonResponse({ "results": SnowballingPager().summarize(seeds), "skipped": skipped })
+        return JsonResponse(serializer.errors, status=HTTP_400_BAD_REQUEST)
+
+
+class PublicationSnowballingPageView(APIView):
+
+    def get(self, request):
+        """
+        Get a page of a seed's references (forward) or citations (backward).
+        Pass the returned `next_cursor` as `cursor` to get the next page.
+        """
+        serializer = PublicationSnowballingPageSerializer(data=request.query_params)
+        if serializer.is_valid():
+
+            publication = get_object_or_404(Publication.objects.select_related('metadata'), paper_id=serializer.validated_data['paper_id'])
+            if not hasattr(publication, 'metadata') or not publication.metadata.doi:
+                return JsonResponse({ "error": "Publication has no DOI to snowball from." }, status=HTTP_400_BAD_REQUEST)
+
+            if serializer.validated_data['search_type'] == 'forward':
+                reference_type = PublicationReferenceType.REFERENCE
+            else:
+                reference_type = PublicationReferenceType.CITATION
+
+            try:
+                page = SnowballingPager().page(
+                    publication,
+                    reference_type,
+                    cursor    = serializer.validated_data['cursor'],
+                    page_size = serializer.validated_data['page_size'],
+                    fields    = serializer.validated_data['fields'],
+                )
+            except InvalidCursor as e:
+                return JsonResponse({ "error": str(e) }, status=HTTP_400_BAD_REQUEST)
+            return JsonResponse(page)
+        return JsonResponse(serializer.errors, status=HTTP_400_BAD_REQUEST)
+
+
+class PublicationCitationCrawlView(APIView):
+
+    def post(self, request):
+        serializer = PublicationCitationCrawlSerializer(data=request.data)
+        if serializer.is_valid():
+
+            publication_ids = serializer.validated_data.get('publication_ids')
+            publications = Publication.objects.filter(paper_id__in=publication_ids).select_related('metadata')
+
+            log.info(f"Crawling {serializer.validated_data['direction']} citations of {len(publications)} publications.")
+
+            crawler = CitationCrawler(
+                publications,
+                depth         = serializer.validated_data['depth'],
+                direction     = serializer.validated_data['direction'],
+                max_nodes     = serializer.validated_data['max_nodes'],
+                max_edges     = serializer.validated_data['max_edges'],
+                show_metadata = serializer.validated_data['show_metadata'],
+            )
+            return JsonResponse({ "results": crawler.search() })
         return JsonResponse(serializer.errors, status=HTTP_400_BAD_REQUEST)
 
 
@@ -65,30 +150,36 @@ class PublicationLLMFilterView(APIView):
     def post(self, request):
         serializer = PublicationLLMFilterSerializer(data=request.data)
         if serializer.is_valid():
-            
-            questions = serializer.validated_data['questions']
-            paper_ids = serializer.validated_data.get('paper_ids')
-
-            # Data transformation
-            publications = list(PublicationMetadata.objects.filter(publication_id__in=paper_ids))
-            log.info(f"Filtering {len(publications)} publications.")
-            if len(publications) != len(paper_ids):
-                missing_papers = set(paper_ids) - set([p.publication_id for p in publications])
-                missing_publications = Publication.objects.filter(paper_id__in=missing_papers)
-                publications.extend(missing_publications)
-            
-            questions = [
-                FilterResponse(
-                    id       = question['id'],
-                    question = question['question'],
-                    answer   = question['answer']
-                ) for question in questions
-            ]
 
             # Filter publications by questions
-            llm_filter = LLMFilter()
-            llm_filter.parse(publications, questions)
-            results = llm_filter.completion()
+            results, run = screen(serializer.validated_data)
+
+            return JsonResponse({ "results" : results, "usage": run.summary() })
+        return JsonResponse(serializer.errors, status=HTTP_400_BAD_REQUEST)
+
+
+class PublicationLLMFilterBatchView(APIView):
+
+    def post(self, request):
+        """
+        Queue a screening job run through the batch API, for large runs
+        """
+        serializer = PublicationLLMFilterSerializer(data=request.data)
+        if serializer.is_valid():
+
+            job = ScreeningJob.objects.create(request=serializer.validated_data)
+            background_screening.queue(job)
+
+            return JsonResponse(job.to_dict(), status=HTTP_202_ACCEPTED)
+        return JsonResponse(serializer.errors, status=HTTP_400_BAD_REQUEST)
+
+    def get(self, request):
+        """
+        Get the status of a screening job, and its results once completed
+        """
+        job_id = request.query_params.get('id')
+        if job_id is None:
+            return JsonResponse({ "error": "Job ID is required." }, status=HTTP_400_BAD_REQUEST)
 
-            return JsonResponse({ "results" : results })
-        
+        job = get_object_or_404(ScreeningJob, id=job_id)
+        return JsonResponse(job.to_dict())
@@ -142,4 +142,90 @@ STATIC_URL = 'static/'
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Publication metadata refresh
+# Cached metadata older than this is served immediately and refreshed in the background
+
+METADATA_REFRESH_AFTER_DAYS = env.int('METADATA_REFRESH_AFTER_DAYS', default=30)
+
+# Batch lookups made while serving a request are tried once, and give up after this many seconds
+METADATA_REQUEST_TIMEOUT_SECONDS = env.float('METADATA_REQUEST_TIMEOUT_SECONDS', default=5.0)
+
+# Snowballing edges fetched more recently than this are served from the local edge table
+SNOWBALLING_REFRESH_AFTER_DAYS = env.int('SNOWBALLING_REFRESH_AFTER_DAYS', default=30)
+
+# Most references or citations the paged snowballing view expands a seed with, one Semantic Scholar page by default
+SNOWBALLING_PAGE_MAX_EDGES = env.int('SNOWBALLING_PAGE_MAX_EDGES', default=1000)
+
+SEMANTIC_SCHOLAR_API_KEY = env('SEMANTIC_SCHOLAR_API_KEY', default=None)
+
+
+# LLM screening
+# Backend screening runs on: "azure", or "stub" for offline runs without any LLM
+
+LLM_BACKEND = env('LLM_BACKEND', default='azure')
+
+# Calls made at once, the token-per-minute quota of the deployment, attempts per call,
+# and the prompt token budget for packing several papers into one call (0 screens one paper per call)
+
+LLM_FILTER_MAX_CONCURRENCY = env.int('LLM_FILTER_MAX_CONCURRENCY', default=8)
+LLM_FILTER_TOKENS_PER_MINUTE = env.int('LLM_FILTER_TOKENS_PER_MINUTE', default=80000)
+LLM_FILTER_MAX_RETRIES = env.int('LLM_FILTER_MAX_RETRIES', default=3)
+LLM_FILTER_TOKEN_BUDGET = env.int('LLM_FILTER_TOKEN_BUDGET', default=0)
+
+# Cascade of deployments of the backend to screen with, cheapest first, e.g. "gpt-4o-mini,gpt-4"
+# (empty screens with the default deployment only). Answers below the confidence are re-asked
+# with the next deployment.
+
+LLM_FILTER_CASCADE = env.list('LLM_FILTER_CASCADE', default=[])
+LLM_FILTER_ESCALATION_CONFIDENCE = env.float('LLM_FILTER_ESCALATION_CONFIDENCE', default=0.8)
+
+# Completion token cap and model of each deployment, as JSON, e.g.
+# {"gpt-4o-mini": {"max_tokens": 300, "model_name": "gpt-4o-mini"}}. Unlisted deployments are
+# capped at LLM_MAX_TOKENS, room for the JSON answers to about a dozen questions at 40 tokens
+# each, and take their deployment name as model name. The cap is reserved against the
+# token-per-minute quota on every call.
+
+LLM_MAX_TOKENS = env.int('LLM_MAX_TOKENS', default=500)
+LLM_DEPLOYMENTS = env.json('LLM_DEPLOYMENTS', default={})
+
+# Batch screening: where batch files are written, how often submitted batches are polled,
+# and how many batch screening jobs run at once
+
+LLM_BATCH_DIR = env('LLM_BATCH_DIR', default=str(BASE_DIR / 'llm_batches'))
+LLM_BATCH_POLL_SECONDS = env.int('LLM_BATCH_POLL_SECONDS', default=60)
+LLM_BATCH_MAX_JOBS = env.int('LLM_BATCH_MAX_JOBS', default=2)
+
+# Prices of the screening models in USD per million tokens, as JSON, e.g.
+# {"gpt-4": {"input": 30, "output": 60}}, and the share of the price batch calls are charged
+
+LLM_PRICES_PER_MILLION_TOKENS = env.json('LLM_PRICES_PER_MILLION_TOKENS', default={})
+LLM_BATCH_PRICE_FACTOR = env.float('LLM_BATCH_PRICE_FACTOR', default=0.5)
+
+
+# Search terms
+# Precomputed WordNet synonym index, built with `python manage.py build_synonym_index`
+
+SYNONYM_INDEX_PATH = env('SYNONYM_INDEX_PATH', default=str(BASE_DIR / 'synonyms.idx'))
+
+# thesaurus.com synonyms are cached for this many days; misses are fetched this many at once,
+# each within the timeout
+
+THESAURUS_CACHE_DAYS = env.int('THESAURUS_CACHE_DAYS', default=90)
+THESAURUS_MAX_WORKERS = env.int('THESAURUS_MAX_WORKERS', default=8)
+THESAURUS_TIMEOUT_SECONDS = env.float('THESAURUS_TIMEOUT_SECONDS', default=3.0)
+
+
+# Search estimates
+# Count-only probes sent at once and their timeout, and the seconds each engine takes per
+# result fetched on top of its requests, as JSON by engine
+
+SEARCH_ESTIMATE_MAX_WORKERS = env.int('SEARCH_ESTIMATE_MAX_WORKERS', default=8)
+SEARCH_ESTIMATE_TIMEOUT_SECONDS = env.float('SEARCH_ESTIMATE_TIMEOUT_SECONDS', default=10.0)
+SEARCH_ESTIMATE_SECONDS_PER_RESULT = env.json('SEARCH_ESTIMATE_SECONDS_PER_RESULT', default={
+    "DBLP": 0.002,
+    "SEMANTIC_SCHOLAR": 0.002,
+    "WEB_OF_SCIENCE": 0.01,
+})
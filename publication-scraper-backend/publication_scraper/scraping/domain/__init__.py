@@ -1,5 +1,5 @@
 from .query.search_query import SearchQuery, SearchQueryType
-from .query.search_query_parser import SearchQueryParser
+from .query.search_query_parser import SearchQueryParser, SearchQuerySyntaxError
 from .search_engine import (
   DBLPEngine,
   SearchEngine,
@@ -1,5 +1,7 @@
 from enum import Enum
-from typing import List
+from typing import List, Optional
+
+from .search_query_parser import SearchQueryParser
 
 
 class SearchQueryType(str, Enum):
@@ -21,7 +23,11 @@ class SearchQuery:
         self.start_year = start_year
         self.end_year = end_year
 
+        # Compiled once here and shared by every engine searching with this query
+        self.parsed_query: Optional[SearchQueryParser] = None
+
         if advanced_search:
             self.search_type = SearchQueryType.ADVANCED
+            self.parsed_query = SearchQueryParser.compile(advanced_search)
         else:
-            self.search_type = SearchQueryType.SIMPLE
\ No newline at end of file
+            self.search_type = SearchQueryType.SIMPLE
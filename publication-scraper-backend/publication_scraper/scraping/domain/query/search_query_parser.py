@@ -1,5 +1,8 @@
-import ast
+import re
+from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple, Union
 
 from scraping.models import SearchEngineType
 from utils.logger import Logger
@@ -11,74 +14,257 @@ class SearchQueryOperator(str, Enum):
     OR = "OR"
     NOT = "NOT"
 
+
+class SearchQuerySyntaxError(ValueError):
+    """ An advanced search query that does not follow the query grammar. """
+
+    def __init__(self, message: str, expr: str, position: int):
+        super().__init__(f"{message} at position {position} of: {expr}")
+        self.expr     = expr
+        self.position = position
+
+
+@dataclass(frozen=True)
+class Term:
+    """ A search term; `phrase` if it was quoted in the query. """
+    text: str
+    phrase: bool = False
+
+
+@dataclass(frozen=True)
+class Operation:
+    """ An AND or OR of two or more operands, or the NOT of a single one. """
+    operator: SearchQueryOperator
+    operands: Tuple["QueryNode", ...]
+
+
+QueryNode = Union[Term, Operation]
+
+
+class _Tokenizer:
+    """
+    Splits a query into parentheses, quoted phrases, operators and terms.
+
+    Terms run until whitespace, a parenthesis or a quote, so hyphens, slashes and other
+    punctuation stay part of the term. AND, OR and NOT are operators in any case.
+    """
+
+    TOKEN = re.compile(r"""
+        \s*(?:
+            (?P<paren>[()])
+            | "(?P<double>[^"]*)"
+            | '(?P<single>[^']*)'
+            | (?P<term>[^\s()"']+(?:'[^\s()"']+)*)
+        )
+    """, re.VERBOSE)
+
+    def __init__(self, expr: str):
+        self.expr = expr
+
+    def __iter__(self) -> Iterator[Tuple[str, str, int]]:
+        """ (kind, value, position) of every token, ending with an ("end", "", len) token. """
+
+        position = 0
+        while self.expr[position:].strip():
+            match = self.TOKEN.match(self.expr, position)
+            if match is None:
+                start = len(self.expr) - len(self.expr[position:].lstrip())
+                raise SearchQuerySyntaxError("Unterminated quote", self.expr, start)
+
+            start = match.start(match.lastgroup)
+            if match.lastgroup == "paren":
+                yield match.group("paren"), match.group("paren"), start
+            elif match.lastgroup in ("double", "single"):
+                yield "phrase", match.group(match.lastgroup), start
+            elif match.group("term").upper() in SearchQueryOperator.__members__:
+                yield "operator", match.group("term").upper(), start
+            else:
+                yield "term", match.group("term"), start
+            position = match.end()
+        yield "end", "", len(self.expr)
+
+
+class _Grammar:
+    """
+    Recursive descent over the tokens of a query, NOT binding tighter than AND, and AND than OR:
+
+        query   := or end
+        or      := and ("OR" and)*
+        and     := unary (["AND"] unary)*        adjacent terms are ANDed
+        unary   := "NOT" unary | primary
+        primary := "(" or ")" | term | phrase
+    """
+
+    def __init__(self, expr: str):
+        self.expr   = expr
+        self.tokens = list(_Tokenizer(expr))
+        self.index  = 0
+
+    def parse(self) -> QueryNode:
+        if self._peek()[0] == "end":
+            raise SearchQuerySyntaxError("Empty query", self.expr, 0)
+        node = self._or()
+        self._expect("end", "Unexpected token")
+        return node
+
+    def _or(self) -> QueryNode:
+        operands = [self._and()]
+        while self._accept_operator(SearchQueryOperator.OR):
+            operands.append(self._and())
+        return self._combine(SearchQueryOperator.OR, operands)
+
+    def _and(self) -> QueryNode:
+        operands = [self._unary()]
+        while True:
+            if self._accept_operator(SearchQueryOperator.AND):
+                operands.append(self._unary())
+                continue
+            kind, value, _ = self._peek()
+            if kind in ("term", "phrase", "(") or (kind == "operator" and value == SearchQueryOperator.NOT):
+                operands.append(self._unary())
+                continue
+            return self._combine(SearchQueryOperator.AND, operands)
+
+    def _unary(self) -> QueryNode:
+        if self._accept_operator(SearchQueryOperator.NOT):
+            return Operation(SearchQueryOperator.NOT, (self._unary(),))
+        return self._primary()
+
+    def _primary(self) -> QueryNode:
+        kind, value, position = self._next()
+        if kind == "(":
+            node = self._or()
+            self._expect(")", "Missing closing parenthesis")
+            return node
+        if kind == "term":
+            return Term(value)
+        if kind == "phrase":
+            if not value.strip():
+                raise SearchQuerySyntaxError("Empty phrase", self.expr, position)
+            return Term(" ".join(value.split()), phrase=True)
+        got = repr(value) if value else "the end of the query"
+        raise SearchQuerySyntaxError(f"Expected a term, got {got}", self.expr, position)
+
+    @staticmethod
+    def _combine(operator: SearchQueryOperator, operands: List[QueryNode]) -> QueryNode:
+        """ A single operand as is, otherwise their operation, flattening nested ones of the same operator. """
+
+        if len(operands) == 1:
+            return operands[0]
+        flattened = []
+        for operand in operands:
+            if isinstance(operand, Operation) and operand.operator == operator:
+                flattened.extend(operand.operands)
+            else:
+                flattened.append(operand)
+        return Operation(operator, tuple(flattened))
+
+    def _peek(self) -> Tuple[str, str, int]:
+        return self.tokens[self.index]
+
+    def _next(self) -> Tuple[str, str, int]:
+        token = self.tokens[self.index]
+        if token[0] != "end":
+            self.index += 1
+        return token
+
+    def _accept_operator(self, operator: SearchQueryOperator) -> bool:
+        kind, value, _ = self._peek()
+        if kind == "operator" and value == operator:
+            self.index += 1
+            return True
+        return False
+
+    def _expect(self, kind: str, message: str) -> None:
+        token_kind, value, position = self._next()
+        if token_kind != kind:
+            raise SearchQuerySyntaxError(f"{message} {value!r}" if value else message, self.expr, position)
+
+
 class SearchQueryParser:
     """
     A class to parse search queries.
-    Supported operators: AND, OR, NOT
+    Supported operators: AND, OR, NOT (in any case), parentheses and quoted phrases
     Supported formats: Semantic Scholar, DBLP, Web of Science
 
+    The query is compiled once into an immutable tree of `Term` and `Operation` nodes, and its
+    rendering for each search engine is memoized. Use `SearchQueryParser.compile` to share the
+    compiled query between everything that searches with the same expression.
+
     Attributes:
     expr (str): The search query to parse.
-    tree (ast.AST): The abstract syntax tree of the search query
+    tree (QueryNode): The compiled search query
     """
 
     def __init__(self, expr: str):
         self.expr = expr
-        self.tree = ast.parse(expr, mode='eval').body
+        self.tree = _Grammar(expr).parse()
+        self.rendered: Dict[SearchEngineType, str] = {}
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def compile(cls, expr: str) -> "SearchQueryParser":
+        """ The compiled query of an expression, parsed once per distinct expression. """
+        return cls(expr)
 
     def parse(self, format_type) -> str:
-        """ 
-        Main method to parse the search query. 
+        """
+        Main method to parse the search query.
 
         >>> expr = "A and B and C and (D or E and not F)"
         >>> parser = SearchQueryParser(expr)
         >>> parser.parse("SEMANTIC_SCHOLAR")
-        "A + B + C + (D | E - F)"
+        "A + B + C + (D | E + -F)"
+        >>> SearchQueryParser("A and not (B and C)").parse("SEMANTIC_SCHOLAR")
+        "A + -(B + C)"
+        """
+        format_type = SearchEngineType(format_type)
+        if format_type not in self.rendered:
+            self.rendered[format_type] = self._build_expression(self.tree, format_type)
+        return self.rendered[format_type]
+
+    def terms(self) -> List[str]:
+        """ The distinct terms and phrases of the query, in order, whether negated or not. """
+        return list(dict.fromkeys(term.text for term in self._terms(self.tree)))
+
+    def _terms(self, node: QueryNode) -> Iterator[Term]:
+        if isinstance(node, Term):
+            yield node
+        else:
+            for operand in node.operands:
+                yield from self._terms(operand)
+
+    def _build_expression(self, node: QueryNode, format_type: SearchEngineType) -> str:
         """
-        return self._build_expression(self.tree, format_type)
+        Recursively build the search expression.
 
-    
-    def _build_expression(self, node: ast.AST, format_type: SearchEngineType) -> str:
-        """ 
-        Recursively build the search expression. 
-        
         Args:
-            node (ast.AST): The current node in the AST.
+            node (QueryNode): The current node in the query tree.
             format_type (str): The format type to generate the search string for.
         """
-        if isinstance(node, ast.BoolOp):
-            if isinstance(node.op, ast.And):
-                return self._format_operator(SearchQueryOperator.AND, node.values, format_type)
-            elif isinstance(node.op, ast.Or):
-                return self._format_operator(SearchQueryOperator.OR, node.values, format_type)
-            
-        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
-            return self._format_not_operator(self._build_expression(node.operand, format_type), format_type)
-        
-        elif isinstance(node, ast.Name):
-            return self._format_phrase(node.id, format_type)
-        
-        elif isinstance(node, ast.Constant):  # Handles phrases
-            return self._format_phrase(node.value, format_type)
-        
-        elif isinstance(node, ast.Str):  # Handles string literals (Python < 3.8)
-            return self._format_phrase(node.s, format_type)
-        
-        else:
-            raise ValueError("Unsupported expression node")
-    
+        if isinstance(node, Term):
+            return self._format_phrase(node, format_type)
+
+        if node.operator == SearchQueryOperator.NOT:
+            operand = self._build_expression(node.operands[0], format_type)
+            # OR operands are parenthesized already, AND ones must be so the NOT covers all of them
+            if isinstance(node.operands[0], Operation) and node.operands[0].operator == SearchQueryOperator.AND:
+                operand = f"({operand})"
+            return self._format_not_operator(operand, format_type)
 
-    def _format_operator(self, operator: SearchQueryOperator, operands: list, format_type: SearchEngineType) -> str:
-        """ 
+        return self._format_operator(node.operator, node.operands, format_type)
+
+    def _format_operator(self, operator: SearchQueryOperator, operands: Tuple[QueryNode, ...], format_type: SearchEngineType) -> str:
+        """
         Format the operator and operands based on the format type.
-        
+
         Args:
             operator (str): The operator to format.
-            operands (list): The operands to format.
+            operands (tuple): The operands to format.
             format_type (str): The format type to generate the search string for.
         """
         formatted_operands = [self._build_expression(op, format_type) for op in operands]
-        
+
         if format_type == SearchEngineType.SEMANTIC_SCHOLAR:
             if operator == SearchQueryOperator.AND:
                 joined_operands = " + ".join(formatted_operands)
@@ -96,31 +282,36 @@ class SearchQueryParser:
                 joined_operands = " ".join(formatted_operands)
             elif operator == SearchQueryOperator.OR:
                 joined_operands = " OR ".join(formatted_operands)
-        
+
         # Add parentheses if this is an OR operator to ensure proper precedence
         if operator == SearchQueryOperator.OR:
             return f"({joined_operands})"
-        
+
         return joined_operands
-    
+
     def _format_not_operator(self, operand: str, format_type: SearchEngineType) -> str:
-        """ 
+        """
         Format the NOT operator based on the format type.
         """
-        
+
         if format_type == SearchEngineType.SEMANTIC_SCHOLAR:
             return f"-{operand}"
-        
+
         elif format_type == SearchEngineType.DBLP:
             return f"-{operand}"  # Assuming no specific NOT syntax, fallback to minus
-        
+
         elif format_type == SearchEngineType.WEB_OF_SCIENCE:
             return f"NOT {operand}"
 
-    def _format_phrase(self, phrase: str, format_type: SearchEngineType) -> str:
+    def _format_phrase(self, term: Term, format_type: SearchEngineType) -> str:
         if format_type == SearchEngineType.SEMANTIC_SCHOLAR:
-            return f'{phrase}'
+            # Semantic Scholar finds nothing for hyphenated terms, so they are searched as phrases
+            if term.phrase:
+                return f'"{term.text}"'
+            if "-" in term.text:
+                return f'"{term.text.replace("-", " ")}"'
+            return term.text
         if format_type == SearchEngineType.DBLP:
-            return f'{phrase}$'  # Append $ for DBLP
+            return f'"{term.text}"$' if term.phrase else f'{term.text}$'  # Append $ for DBLP
         if format_type == SearchEngineType.WEB_OF_SCIENCE:
-            return f'{phrase}'
\ No newline at end of file
+            return f'"{term.text}"' if term.phrase else term.text
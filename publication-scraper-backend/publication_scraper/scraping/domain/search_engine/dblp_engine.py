@@ -1,11 +1,11 @@
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 from urllib.parse import urlencode
 
 import requests
 
 from publication.models import Publication, PublicationStatus
-from scraping.domain import SearchQuery, SearchQueryParser, SearchQueryType
+from scraping.domain import SearchQuery, SearchQueryType
 from scraping.models import SearchEngineType
 from utils import Profiler
 from utils.logger import Logger as Logger
@@ -25,6 +25,7 @@ class DBLPEngine(SearchEngine):
             self.search_type: SearchQueryType   = search_query.search_type
             self.queries: List[str]             = search_query.search_strings
             self.advanced_query: str            = search_query.advanced_search
+            self.parsed_query                   = search_query.parsed_query
             self.year_start: str                = search_query.start_year
             self.year_end: str                  = search_query.end_year
             self.years: str                     = self._format_years(self.year_start, self.year_end)
@@ -49,7 +50,8 @@ class DBLPEngine(SearchEngine):
         
         log.info(f">>> DBLP total: {len(dblp_search_results)}")
         self._process_search_results(dblp_search_results, self.advanced_query, dblp_search_string)
-        self.save_search_results()
+        if self.save_on_search:
+            self.save_search_results()
         return self.results
     
     def _simple_search(self) -> List[Publication]:
@@ -66,7 +68,8 @@ class DBLPEngine(SearchEngine):
             log.info(f">>> DBLP total: {len(dblp_search_results)}")
             self._process_search_results(dblp_search_results, search_string, dblp_search_string)
         
-        self.save_search_results()    
+        if self.save_on_search:
+            self.save_search_results()
         return self.results
     
     def search_dblp(self, query: str) -> List[Dict[str, Any]]:
@@ -164,10 +167,18 @@ class DBLPEngine(SearchEngine):
     def _parse_search_string(self, query: List[str]) -> str:
 
         if self.search_type == SearchQueryType.ADVANCED:
-            parser = SearchQueryParser(self.advanced_query)
-            return parser.parse(SearchEngineType.DBLP)
+            return self.parsed_query.parse(SearchEngineType.DBLP)
 
         return ' '.join(f'"{keyword}"$ ' for keyword in query)
     
+    def count_results(self, search_string: List[str], timeout: float) -> Tuple[str, int]:
+        """ Count the hits of a search string, asking DBLP for none of them. """
+
+        dblp_search_string = self._parse_search_string(search_string) + self.years
+        options  = {'q': dblp_search_string, 'format': 'json', 'h': 0}
+        response = requests.get(f'{self.url}?{urlencode(options)}', timeout=timeout)
+        response.raise_for_status()
+        return dblp_search_string, int(response.json().get("result", {}).get("hits", {}).get("@total", 0))
+
     def save_results(self):
         return super().save_results()
\ No newline at end of file
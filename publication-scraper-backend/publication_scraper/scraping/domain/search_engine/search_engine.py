@@ -1,14 +1,23 @@
 from abc import abstractmethod
-from typing import List
+from typing import Any, List, Optional, Tuple
 
 from django.db import IntegrityError, transaction
 
 from publication.models import Publication
+from scraping.domain import SearchQueryType
 from scraping.models import SearchResult
 from utils import Profiler
 
 
 class SearchEngine:
+
+    # Results per request, and the most results a search fetches (None for all of them)
+    PAGE_SIZE: int = 1000
+    MAX_RESULTS: Optional[int] = None
+
+    # Whether a search saves its own results; engines searching on worker threads leave the
+    # writes to the caller, so that concurrent searches do not race on the same papers
+    save_on_search: bool = True
   
     def __init__(self):
       self.results: List[Publication] = []
@@ -22,6 +31,18 @@ class SearchEngine:
     def _parse_search_string(self, query: str) -> str:
       pass
 
+    @abstractmethod
+    def count_results(self, search_string: Any, timeout: float) -> Tuple[str, int]:
+      """ The formatted search string and how many results it has upstream, without fetching them. """
+      pass
+
+    def search_strings(self) -> List[Any]:
+        """ The search strings a search goes through: every combination, or the advanced query. """
+
+        if self.search_type == SearchQueryType.ADVANCED:
+            return [self.advanced_query]
+        return list(self.queries)
+
     @Profiler("Save Results")
     def save_results(self) -> List[Publication]:
         """ Saves the results of publications if not duplicated by paper title or id. """
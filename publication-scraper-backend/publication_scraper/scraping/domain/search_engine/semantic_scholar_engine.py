@@ -1,11 +1,11 @@
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
 from publication.models import Publication, PublicationStatus
-from scraping.domain import SearchQuery, SearchQueryParser, SearchQueryType
+from scraping.domain import SearchQuery, SearchQueryType
 from scraping.models import SearchEngineType
 from utils import Logger, Profiler
 
@@ -14,6 +14,9 @@ from .search_engine import SearchEngine
 log = Logger(__name__)
 class SemanticScholarEngine(SearchEngine):
     """ Search engine for Semantic Scholar. """
+
+    # A search only fetches the first page of the bulk search
+    MAX_RESULTS = 1000
     
     def __init__(self, search_query: SearchQuery = None): # queries: List[str], year: str):
         super().__init__()
@@ -37,6 +40,7 @@ class SemanticScholarEngine(SearchEngine):
             self.search_type                = search_query.search_type
             self.queries                    = search_query.search_strings
             self.advanced_query: str        = search_query.advanced_search
+            self.parsed_query               = search_query.parsed_query
             self.year                       = f"{search_query.start_year}-"
         
     def find_by_doi(self, doi: str) -> Optional[Publication]:
@@ -85,12 +89,13 @@ class SemanticScholarEngine(SearchEngine):
             return []
         
         self.process_search_results(search_results, self.advanced_query, sch_search_string)
-        self.save_search_results()
+        if self.save_on_search:
+            self.save_search_results()
         return self.results
         
     def _simple_search(self) -> List[Publication]:
         for idx, search_string in enumerate(self.queries):
-            sch_search_string = self._parse_search_string()
+            sch_search_string = self._parse_search_string(search_string)
             log.info(f"--- Searching for {sch_search_string} ({idx + 1}/{len(self.queries)}) ---")
             search_results    = self.search_semantic_scholar(
                                     search_string=sch_search_string, 
@@ -105,7 +110,8 @@ class SemanticScholarEngine(SearchEngine):
             
             self.process_search_results(search_results, search_string, sch_search_string)
         
-        self.save_search_results()    
+        if self.save_on_search:
+            self.save_search_results()
         return self.results
 
     def search_semantic_scholar(
@@ -241,10 +247,20 @@ class SemanticScholarEngine(SearchEngine):
         are only matched with the exact phrase.
         """
         if self.search_type == SearchQueryType.ADVANCED:
-            parser = SearchQueryParser(self.advanced_query)
-            return parser.parse(SearchEngineType.SEMANTIC_SCHOLAR)
+            return self.parsed_query.parse(SearchEngineType.SEMANTIC_SCHOLAR)
         
         return " + ".join(f"'{term}'" for term in search_string)
     
+    def count_results(self, search_string: List[str], timeout: float) -> Tuple[str, int]:
+        """
+        Count the papers of a search string. The bulk search cannot return no papers, so the
+        probe only asks for their ids and reads the total.
+        """
+        sch_search_string = self._parse_search_string(search_string)
+        search_params     = {"query": sch_search_string, "year": self.year, "fields": "paperId"}
+        response = requests.get(self.bulkUrl, headers=self.headers, params=search_params, timeout=timeout)
+        response.raise_for_status()
+        return sch_search_string, int(response.json().get("total", 0))
+
     def save_results(self):
         return super().save_results()
\ No newline at end of file
@@ -1,10 +1,10 @@
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 import requests
 
 from publication.models import Publication, PublicationStatus
-from scraping.domain import SearchQuery, SearchQueryParser, SearchQueryType
+from scraping.domain import SearchQuery, SearchQueryType
 from scraping.models import SearchEngineType
 from utils import Logger, Profiler
 
@@ -14,6 +14,8 @@ log = Logger(__name__)
 
 class WebOfScienceEngine(SearchEngine):
     """ Search engine for Web of Science. """
+
+    PAGE_SIZE = 100
     
     def __init__(self, search_query: SearchQuery):  # queries: List[str], start_year: int, end_year: int) -> None:
         super().__init__()
@@ -26,6 +28,7 @@ class WebOfScienceEngine(SearchEngine):
         self.wos_fields                 = []
         self.search_type                = search_query.search_type
         self.advanced_query             = search_query.advanced_search
+        self.parsed_query               = search_query.parsed_query
         self.queries                    = search_query.search_strings
         self.start_year                 = int(search_query.start_year)
         self.end_year                   = int(search_query.end_year)
@@ -54,7 +57,8 @@ class WebOfScienceEngine(SearchEngine):
         log.info(f">>> Web of Science total: {len(wos_search_results)}")
         
         self._process_search_results(wos_search_results, self.advanced_query, wos_search_string)
-        self.save_search_results()
+        if self.save_on_search:
+            self.save_search_results()
         return self.results
 
     def _simple_search(self) -> List[Publication]:
@@ -72,7 +76,8 @@ class WebOfScienceEngine(SearchEngine):
             
             self._process_search_results(wos_search_results, search_string, wos_search_string)
 
-        self.save_search_results()
+        if self.save_on_search:
+            self.save_search_results()
         return self.results
     
     def _process_search_results(self, search_results: List[Dict[str, Any]], search_string: str, formatted_search_string: str) -> None:
@@ -151,8 +156,7 @@ class WebOfScienceEngine(SearchEngine):
         """ Parse the search parameters for the Web of Science API. """
 
         if self.search_type == SearchQueryType.ADVANCED:
-            parser = SearchQueryParser(self.advanced_query)
-            search_string = parser.parse(SearchEngineType.WEB_OF_SCIENCE)
+            search_string = self.parsed_query.parse(SearchEngineType.WEB_OF_SCIENCE)
             title_search = f"TS=({search_string})"
         else:
             title_search = f"TS=({search_string})"
@@ -193,10 +197,18 @@ class WebOfScienceEngine(SearchEngine):
         """ Parse the search string for Web of Science. """
 
         if self.search_type == SearchQueryType.ADVANCED:
-            parser = SearchQueryParser(self.advanced_query)
-            return parser.parse(SearchEngineType.WEB_OF_SCIENCE)
+            return self.parsed_query.parse(SearchEngineType.WEB_OF_SCIENCE)
         
         return " ".join(f'"{term}"' for term in search_string)
     
+    def count_results(self, search_string: str, timeout: float) -> Tuple[str, int]:
+        """ Count the records of a search string, asking Web of Science for none of them. """
+
+        search_params = self._parse_search_params(search_string, start_record=1)
+        search_params['count'] = 0
+        response = requests.get(self.url, headers=self.headers, params=search_params, timeout=timeout)
+        response.raise_for_status()
+        return search_params['usrQuery'], int(response.json().get("QueryResult", {}).get("RecordsFound", 0))
+
     def save_results(self):
         return super().save_results()
\ No newline at end of file
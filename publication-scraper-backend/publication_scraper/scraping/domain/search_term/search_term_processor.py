@@ -1,21 +1,17 @@
-import requests
 from dataclasses import dataclass, field
 from typing import List, Tuple
 
-from bs4 import BeautifulSoup
-import nltk
-
-nltk.download('wordnet')
-
 from breame.spelling import (
     american_spelling_exists,
     british_spelling_exists,
     get_american_spelling,
     get_british_spelling,
 )
-from nltk.corpus import wordnet as wn
 from utils import Logger
 
+from .synonym_index import synonym_index
+from .thesaurus import ThesaurusClient
+
 log = Logger(__name__)
 
 @dataclass
@@ -52,9 +48,11 @@ class SearchTermProcessor:
     def generate_variants(self) -> List[str]:
         """ Generates American and British variants of the search term. """
 
+        # Thesaurus lookups are cached and fetched concurrently for all words at once
+        thesaurus_synonyms = ThesaurusClient().synonyms([word.word for word in self.all_search_words])
         for word in self.all_search_words:
             self._get_all_variants(word)
-            self._get_synonyms(word)
+            self._get_synonyms(word, thesaurus_synonyms[word.word])
 
     def _get_all_search_words(self, search_terms: List[Tuple[str, str, str]]) -> List[SearchTerm]:
         """ Returns all search words from the search terms. """
@@ -84,44 +82,17 @@ class SearchTermProcessor:
             search_term.variants.append(british_word)
 
 
-    def _get_synonyms(self, search_term: SearchTerm):
-        """ Generates synonyms of the search term with nltk and thesaurus.com. """
-        
-        sym_thesaurus = self._get_thesaurus_synonym(search_term)
-        sym_nltk = self._get_nltk_synonyms(search_term)
+    def _get_synonyms(self, search_term: SearchTerm, sym_thesaurus: List[str]):
+        """ Generates synonyms of the search term with thesaurus.com, falling back to nltk. """
         
         if sym_thesaurus:
             search_term.synonyms = sym_thesaurus
         else:
-            search_term.synonyms = sym_nltk
+            search_term.synonyms = self._get_nltk_synonyms(search_term)
 
 
     def _get_nltk_synonyms(self, search_term: SearchTerm) -> List[str]:
-        """ Generates synonyms of the search term with breame. """
-
-        log.info(f"Getting synonyms for {search_term.word} from nltk...")
-        word = search_term.word
-        all_synonyms = set()
-        synonyms = wn.synsets(word)
+        """ Generates synonyms of the search term from the precomputed WordNet index. """
 
-        for synonym in synonyms:
-            for lemma in synonym.lemmas():
-                all_synonyms.add(lemma.name())
-        
-        all_synonyms.discard(word)
-        return list(all_synonyms)
-
-
-    def _get_thesaurus_synonym(self, search_term: SearchTerm) -> List[str]:
-        """ Acquires synonyms of the search term from thesaurus.com. """
-        
-        log.info(f"Getting synonyms for {search_term.word} from thesaurus.com...")
-        data = requests.get(f"https://www.thesaurus.com/browse/{search_term.word}")
-        soup = BeautifulSoup(data.text, "html.parser")
-        try:
-            focus = soup.find("div", {"data-type": "synonym-and-antonym-card"})
-            synonyms = focus.find_all("a")
-            return [synonym.text for synonym in synonyms]
-        except Exception as e:
-            log.error(f"Failed to get synonyms for {search_term.word}.")
-            return []
\ No newline at end of file
+        log.info(f"Getting synonyms for {search_term.word} from WordNet...")
+        return synonym_index.synonyms(search_term.word)
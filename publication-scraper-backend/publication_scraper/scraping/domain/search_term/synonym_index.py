@@ -0,0 +1,201 @@
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from utils import Logger
+
+log = Logger(__name__)
+
+
+class SynonymIndex:
+    """
+    Precomputed WordNet synonyms, memory-mapped from a sorted string table.
+
+    The table maps every word WordNet resolves (lemmas, their inflections and irregular forms)
+    to the lemma names of its synsets, exactly as `wn.synsets(word)` would find them. It is
+    built once with `python manage.py build_synonym_index`, opened on the first lookup, and
+    looked up by binary search over the sorted keys without reading the table into memory.
+
+    Without the table, lookups fall back to the NLTK WordNet corpus if it is installed locally.
+
+    File layout, in native byte order:
+
+        magic, key count and value count (uint32)
+        key offsets (key count + 1), value id of each key, value offsets (value count + 1) (uint32)
+        keys sorted by their UTF-8 bytes, then values: synonyms separated by newlines
+
+    Example Usage:
+
+        SynonymIndex.build(wordnet_entries(), "synonyms.idx")
+        SynonymIndex("synonyms.idx").synonyms("review")
+    """
+
+    MAGIC  = b"SYNIDX01"
+    HEADER = struct.Struct("=8sII")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path   = path
+        self.lock   = threading.Lock()
+        self.loaded = False
+        self.mm: Optional[mmap.mmap] = None
+        self.warned = False
+
+    def synonyms(self, word: str) -> List[str]:
+        """ The synonyms of a word, without the word itself. """
+
+        if self._load():
+            synonyms = self._lookup(word.lower())
+        else:
+            synonyms = self._wordnet_synonyms(word)
+        return [synonym for synonym in synonyms if synonym != word]
+
+    def __len__(self) -> int:
+        return self.key_count if self._load() else 0
+
+    def _load(self) -> bool:
+        """ Memory-map the table on first use; False if there is none. """
+
+        if self.loaded:
+            return self.mm is not None
+        with self.lock:
+            if not self.loaded:
+                path = self.path or settings.SYNONYM_INDEX_PATH
+                if os.path.exists(path):
+                    self._open(path)
+                    log.info(f"Loaded the synonym index of {self.key_count} words from {path}.")
+                self.loaded = True
+        return self.mm is not None
+
+    def _open(self, path: str) -> None:
+        with open(path, "rb") as file:
+            mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, key_count, value_count = self.HEADER.unpack_from(mm)
+        if magic != self.MAGIC:
+            raise ValueError(f"{path} is not a synonym index.")
+
+        # uint32 views straight into the mapped file
+        view   = memoryview(mm)
+        offset = self.HEADER.size
+        self.key_offsets   = view[offset:offset + 4 * (key_count + 1)].cast("I")
+        offset += 4 * (key_count + 1)
+        self.key_values    = view[offset:offset + 4 * key_count].cast("I")
+        offset += 4 * key_count
+        self.value_offsets = view[offset:offset + 4 * (value_count + 1)].cast("I")
+        offset += 4 * (value_count + 1)
+
+        self.keys_start   = offset
+        self.values_start = offset + self.key_offsets[-1]
+        self.key_count    = key_count
+        self.mm           = mm
+        self.sorted_keys  = _SortedKeys(self)
+
+    def _key(self, index: int) -> bytes:
+        start = self.keys_start + self.key_offsets[index]
+        end   = self.keys_start + self.key_offsets[index + 1]
+        return self.mm[start:end]
+
+    def _lookup(self, word: str) -> List[str]:
+        """ Binary search the sorted keys for the word. """
+
+        key   = word.encode()
+        index = bisect_left(self.sorted_keys, key)
+        if index == self.key_count or self._key(index) != key:
+            return []
+
+        value = self.key_values[index]
+        start = self.values_start + self.value_offsets[value]
+        end   = self.values_start + self.value_offsets[value + 1]
+        return self.mm[start:end].decode().split("\n")
+
+    def _wordnet_synonyms(self, word: str) -> List[str]:
+        """ Look the word up in the local NLTK WordNet corpus, which is never downloaded here. """
+
+        try:
+            from nltk.corpus import wordnet as wn
+            synsets = wn.synsets(word)
+        except LookupError:
+            if not self.warned:
+                self.warned = True
+                log.warning("No synonym index and no local WordNet corpus; run `python manage.py build_synonym_index`.")
+            return []
+        return sorted({lemma.name() for synset in synsets for lemma in synset.lemmas()})
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[str, Iterable[str]]], path: str) -> int:
+        """
+        Write the table of the given (word, synonyms) entries, keeping the first entry of a
+        word. Identical synonym lists are stored once. Returns the number of words.
+        """
+        synonyms_of: Dict[bytes, int] = {}
+        values: Dict[Tuple[str, ...], int] = {}
+        for word, synonyms in entries:
+            key = word.lower().encode()
+            if key in synonyms_of:
+                continue
+            value = tuple(sorted(set(synonyms)))
+            if not value:
+                continue
+            synonyms_of[key] = values.setdefault(value, len(values))
+
+        keys          = sorted(synonyms_of)
+        value_blobs   = [("\n".join(value)).encode() for value in values]
+        key_offsets   = array("I", [0, *accumulate(len(key) for key in keys)])
+        value_offsets = array("I", [0, *accumulate(len(value) for value in value_blobs)])
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, len(keys), len(values)))
+            file.write(key_offsets.tobytes())
+            file.write(array("I", [synonyms_of[key] for key in keys]).tobytes())
+            file.write(value_offsets.tobytes())
+            file.write(b"".join(keys))
+            file.write(b"".join(value_blobs))
+        os.replace(tmp_path, path)
+        return len(keys)
+
+
+class _SortedKeys:
+    """ The keys of a synonym index as a sequence, for `bisect`. """
+
+    def __init__(self, index: SynonymIndex):
+        self.index = index
+
+    def __len__(self) -> int:
+        return self.index.key_count
+
+    def __getitem__(self, position: int) -> bytes:
+        return self.index._key(position)
+
+
+def wordnet_entries() -> Iterator[Tuple[str, List[str]]]:
+    """
+    Every word the NLTK WordNet corpus resolves, with the lemma names of its synsets.
+
+    Besides the lemmas themselves, these are the irregular forms of the exception lists and the
+    inflections WordNet's morphology rules reduce to a lemma, so that the index answers exactly
+    what `wn.synsets` would.
+    """
+    from nltk.corpus import wordnet as wn
+
+    words = set()
+    for pos, substitutions in wn.MORPHOLOGICAL_SUBSTITUTIONS.items():
+        lemmas = set(wn.all_lemma_names(pos))
+        words.update(lemmas)
+        words.update(getattr(wn, "_exception_map", {}).get(pos, {}))
+        for lemma in lemmas:
+            for inflected, base in substitutions:
+                if lemma.endswith(base):
+                    words.add(lemma[:len(lemma) - len(base)] + inflected)
+
+    for word in sorted(words):
+        yield word, [lemma.name() for synset in wn.synsets(word) for lemma in synset.lemmas()]
+
+
+synonym_index = SynonymIndex()
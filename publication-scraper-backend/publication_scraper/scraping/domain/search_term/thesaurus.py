@@ -0,0 +1,109 @@
+import math
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import lxml.html
+import requests
+from django.conf import settings
+from lxml.etree import ParserError
+from requests.adapters import HTTPAdapter
+from scraping.models import ThesaurusSynonyms
+from utils import Logger, Profiler
+
+log = Logger(__name__)
+
+
+class ThesaurusClient:
+    """
+    Looks synonyms up on thesaurus.com through the ThesaurusSynonyms cache.
+
+    Cached words do not hit the network again until their entry is older than `max_age`.
+    The misses are fetched concurrently, `max_workers` at a time, each within `timeout`
+    seconds, and parsed with lxml. Failed fetches are not cached, so they are retried by
+    the next lookup.
+
+    Example Usage:
+
+        synonyms = ThesaurusClient().synonyms(["review", "automation"])
+    """
+
+    URL        = "https://www.thesaurus.com/browse/{word}"
+    CARD_XPATH = '//div[@data-type="synonym-and-antonym-card"]'
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_age: Optional[timedelta] = None
+    ):
+        self.max_workers = max_workers or settings.THESAURUS_MAX_WORKERS
+        self.timeout     = timeout or settings.THESAURUS_TIMEOUT_SECONDS
+        self.max_age     = max_age or timedelta(days=settings.THESAURUS_CACHE_DAYS)
+
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=self.max_workers))
+
+    @Profiler("Thesaurus - Synonyms")
+    def synonyms(self, words: List[str]) -> Dict[str, List[str]]:
+        """ The synonyms of every word; empty for words without any or whose fetch failed. """
+
+        keys    = list(dict.fromkeys(word.lower() for word in words))
+        cached  = ThesaurusSynonyms.fresh(keys, self.max_age)
+        fetched = self._fetch_all([key for key in keys if key not in cached])
+        ThesaurusSynonyms.bulk_store(fetched)
+
+        log.info(f"Thesaurus synonyms: {len(cached)} of {len(keys)} words cached, {len(fetched)} fetched.")
+        found = {**cached, **fetched}
+        return {word: found.get(word.lower(), []) for word in words}
+
+    def _fetch_all(self, words: List[str]) -> Dict[str, List[str]]:
+        """ Fetch the words concurrently, returning the synonyms of those fetched in time. """
+
+        if not words:
+            return {}
+
+        # Every fetch gets the timeout, including the ones queued behind a busy pool
+        deadline = self.timeout * math.ceil(len(words) / self.max_workers)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="thesaurus")
+        futures  = {executor.submit(self._fetch, word): word for word in words}
+        done, not_done = wait(futures, timeout=deadline)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        if not_done:
+            log.error(f"Thesaurus lookups timed out for {sorted(futures[future] for future in not_done)}.")
+        return {
+            futures[future]: synonyms for future in done
+            if (synonyms := future.result()) is not None
+        }
+
+    def _fetch(self, word: str) -> Optional[List[str]]:
+        """ The synonyms of a word from thesaurus.com, or None if the fetch failed. """
+
+        try:
+            response = self.session.get(self.URL.format(word=word), timeout=self.timeout)
+        except requests.RequestException as e:
+            log.error(f"Failed to get synonyms for {word}: {e}")
+            return None
+
+        # Words thesaurus.com does not know have no synonyms
+        if response.status_code == 404:
+            return []
+        if response.status_code != 200:
+            log.error(f"Failed to get synonyms for {word} with status code {response.status_code}.")
+            return None
+
+        try:
+            return self.parse(response.content)
+        except ParserError as e:
+            log.error(f"Failed to parse the synonyms of {word}: {e}")
+            return None
+
+    @classmethod
+    def parse(cls, html: bytes) -> List[str]:
+        """ The synonyms on a thesaurus.com page: the links of its first synonym card. """
+
+        cards = lxml.html.fromstring(html).xpath(cls.CARD_XPATH)
+        if not cards:
+            return []
+        return [link.text_content() for link in cards[0].iter("a")]
@@ -1,6 +1,9 @@
 
 import django_filters as dfilter
 from publication.models import Publication, PublicationStatus
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from scraping.interfaces.full_text_search import PublicationSearch
 
 
 class PublicationFilter(dfilter.FilterSet):
@@ -14,4 +17,24 @@ class PublicationFilter(dfilter.FilterSet):
 
     class Meta:
         model = Publication
-        fields = ['paper_id', 'paper_title', 'search_string', 'searched_from', 'status']
\ No newline at end of file
+        fields = ['paper_id', 'paper_title', 'search_string', 'searched_from', 'status']
+
+
+class PublicationFullTextFilter(BaseFilterBackend):
+    """
+    Filters publications by a full-text `search` query over their title, abstract, authors and
+    venue, through the FTS5 index instead of scanning the table.
+
+    GET ./publication?search="code review" AND (LLM OR automat*)
+    """
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param)
+        if not query:
+            return queryset
+        try:
+            return queryset.filter(paper_id__in=PublicationSearch.matching_ids(query))
+        except ValueError as e:
+            raise ValidationError({self.search_param: [str(e)]})
@@ -69,7 +69,7 @@ class BibtexExporter(DataExporter):
             field_name = self.field_mapping[field_name]
 
             if field_name == 'author':
-                authors = [author.get("name") for author in field_value]
+                authors = [author.get("name") for author in field_value or []]
                 field_value = ' AND '.join(authors)
 
             if field_name == 'year':
@@ -31,6 +31,28 @@ class RisExporter(DataExporter):
             'conference_journal':       'JO',  # Conference/Journal
             'publication_type':         'TY',  # Type of Publication
         }
+        # Stored publication types to RIS reference types, JOUR for any other: Semantic Scholar
+        # types lowercased without hyphens, and Crossref types as they are
+        self.type_mapping = {
+            'journalarticle':           'JOUR',
+            'journal-article':          'JOUR',
+            'conference':               'CONF',
+            'proceedings-article':      'CONF',
+            'proceedings':              'CONF',
+            'book':                     'BOOK',
+            'monograph':                'BOOK',
+            'reference-book':           'BOOK',
+            'edited-book':              'EDBOOK',
+            'booksection':              'CHAP',
+            'book-chapter':             'CHAP',
+            'book-section':             'CHAP',
+            'book-part':                'CHAP',
+            'dissertation':             'THES',
+            'report':                   'RPRT',
+            'dataset':                  'DATA',
+            'news':                     'NEWS',
+            'posted-content':           'UNPB',
+        }
         
     def export(self, exportable: Exportable) -> None:
         """
@@ -43,21 +65,19 @@ class RisExporter(DataExporter):
         output = io.StringIO()
         
         for item in self.data:
-            # Assuming 'TY' is a default type
-            output.write("TY  - JOUR\n")
-            data = zip(self.headers, item)
-            
-            for (field_name, field_value) in data:
+            data = dict(zip(self.headers, item))
+            # TY must be the first tag of a reference
+            output.write(f"TY  - {self.map_to_ris_type(data.get('publication_type'))}\n")
+
+            for (field_name, field_value) in data.items():
 
                 if field_name == "authors":
-                    try:
-                        authors = eval(field_value)
-                        for author in authors:
-                            if name := author.get("name"):
-                                output.write(f"AU  - {name}\n")
-                    except Exception as e:
-                        print(f"Error: {e}")
-                        output.write(f"AU  - {field_value}\n")
+                    for author in field_value or []:
+                        if name := author.get("name"):
+                            output.write(f"AU  - {name}\n")
+
+                elif field_name == "publication_type":
+                    continue
 
                 elif ris_tag := self.map_to_ris_tag(field_name):
                     output.write(f"{ris_tag}  - {field_value}\n")
@@ -75,3 +95,17 @@ class RisExporter(DataExporter):
         :rettype str: The RIS tag.
         """
         return self.field_mapping.get(field_name, '')
+
+    def map_to_ris_type(self, publication_types) -> str:
+        """
+        Map the publication types of a publication to a single RIS reference type.
+
+        :param publication_types (list): The publication types, most specific first.
+        :rettype str: The RIS reference type, JOUR by default.
+        """
+        if isinstance(publication_types, str):
+            publication_types = [publication_types]
+        for publication_type in publication_types or []:
+            if ris_type := self.type_mapping.get(publication_type.lower()):
+                return ris_type
+        return 'JOUR'
@@ -1 +1,3 @@
-from .extract_metadata import *
\ No newline at end of file
+from .extract_metadata import *
+from .query_index import *
+from .refresh_metadata import *
@@ -1,19 +1,29 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterator, List, Union
 
 import requests
 
 # from serpapi import GoogleSearch
 from crossref.restful import Works
-from publication.models import Publication, PublicationMetadata
+from django.conf import settings
+from django.utils import timezone
+from publication.models import Author, Publication, PublicationMetadata
 from utils import Profiler
 from utils.logger import Logger as Logger
 
+from .refresh_metadata import MetadataRefresher, background_refresher
+
 log = Logger(__name__)
+
+NO_AFFILIATION = "No Affiliation"
+NO_ABSTRACT = "No abstract available."
+
 class PublicationMetadataExtractor:
     
-    def __init__(self, paper_ids: Union[str, List[str]]):
+    def __init__(self, paper_ids: Union[str, List[str]], extract: bool = True):
         # For reference as PublicationMetadata fields -- Can be deleted afterwards
         log.info("Initializing PublicationMetadataExtractor")
 
@@ -54,6 +64,8 @@ class PublicationMetadataExtractor:
             "isbn-type",
         ]
         self.crossref_works = Works()
+        self.crossref_papers: Dict[str, Any] = {}
+        self.sch_papers: Dict[str, Any]      = {}
         self.headers        = { "Content-Type": "application/json" }
         self.base_url       = "https://api.semanticscholar.org/graph/v1/paper"
         
@@ -63,7 +75,10 @@ class PublicationMetadataExtractor:
         self.papers = self.get_papers(paper_ids)
         self.extracted_metadata: List[PublicationMetadata] = []
         self.failed_papers: List[Publication] = []
-        self.initialize_process()
+        
+        # Streaming callers (see `stream`) defer extraction until iterated
+        if extract:
+            self.initialize_process()
         
     def get_papers(self, paper_ids: List[str]) -> List[Publication]:
         """ Get the papers based on the given paper IDs. """
@@ -72,33 +87,142 @@ class PublicationMetadataExtractor:
     @Profiler("Extracting Metadata")
     def initialize_process(self, cache: bool = True):
         """ atomically extract metadata for all papers. """
+        for _ in self.stream(cache=cache, max_workers=1):
+            pass
+
+    def stream(self, cache: bool = True, max_workers: int = 8) -> Iterator[Dict[str, Any]]:
+        """
+        Extract metadata for all papers, yielding one record per paper as soon as it finishes.
+        
+        Cached papers are yielded first, and stale cached rows are queued for a background
+        refresh instead of being re-extracted. The remaining papers are extracted concurrently and
+        yielded in completion order, so a single slow DOI does not hold back the others.
+        Database writes stay on the calling thread; only the upstream requests run in the pool.
+        The last record is a summary of the whole run.
+        
+        Example records:
+        
+            {"type": "paper", "paper_id": "DOI:10.1/abc", "status": "cached", "metadata": {...}, "error": None}
+            {"type": "paper", "paper_id": "DOI:10.1/def", "status": "failed", "metadata": None, "error": "..."}
+            {"type": "summary", "total": 2, "extracted": 0, "cached": 1, "failed": ["DOI:10.1/def"], "elapsed": 1.2}
+        """
+        start_time = time.time()
+        counts     = { "extracted": 0, "cached": 0 }
+        pending    = []
+        stale      = []
+        max_age    = MetadataRefresher.max_age()
+        
         for index, paper in enumerate(self.papers):
-            log.info(f"Extracting metadata for paper {index + 1}/{len(self.papers)} - {paper.paper_title}")
+            extracted_metadata = PublicationMetadata.objects.filter(publication=paper)
             
             if cache:
-                extracted_metadata = PublicationMetadata.objects.filter(publication=paper)
                 if extracted_metadata.exists():
                     log.warn(f"Metadata already extracted for {paper.paper_title} in cache.")
-                    self.extracted_metadata.append(extracted_metadata.first())
+                    cached_metadata = extracted_metadata.first()
+                    if cached_metadata.is_stale(max_age):
+                        stale.append(cached_metadata)
+                    self.extracted_metadata.append(cached_metadata)
+                    counts["cached"] += 1
+                    yield self._paper_record(paper, "cached", metadata=cached_metadata)
                     continue
-            else:
-                extracted_metadata = PublicationMetadata.objects.filter(publication=paper)
-                if extracted_metadata.exists():
-                    extracted_metadata.delete()
-
-            try:
-                extracted_metadata = self._extract_data(paper)
-                processed_metadata = self.post_processing(extracted_metadata)
-                processed_metadata.save()
+            elif extracted_metadata.exists():
+                extracted_metadata.delete()
+            
+            pending.append((index, paper))
+        
+        if stale:
+            background_refresher.queue(stale)
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        try:
+            futures = {
+                executor.submit(self._extract_data, paper): (index, paper)
+                for index, paper in pending
+            }
+            for future in as_completed(futures):
+                index, paper = futures[future]
+                log.info(f"Finished metadata extraction for paper {index + 1}/{len(self.papers)} - {paper.paper_title}")
+                
+                try:
+                    # Post-processing reads and writes the author table, so it runs here with the save
+                    processed_metadata = self.post_processing(future.result())
+                    processed_metadata.save()
+                except Exception as e:
+                    log.error(f"Error extracting metadata for {paper.paper_title}. - {e}")
+                    self.failed_papers.append((index, paper))
+                    yield self._paper_record(paper, "failed", error=str(e))
+                    continue
+                
                 self.extracted_metadata.append(processed_metadata)
-            except Exception as e:
-                log.error(f"Error extracting metadata for {paper.paper_title}. - {e}")
-                self.failed_papers.append((index, paper))
+                counts["extracted"] += 1
+                yield self._paper_record(paper, "extracted", metadata=processed_metadata)
+        finally:
+            # Drop queued papers if the consumer stops iterating early (e.g. client disconnect)
+            executor.shutdown(wait=False, cancel_futures=True)
         
         if len(self.failed_papers) > 0:
             log.error(f"Failed to extract metadata for {len(self.failed_papers)} papers:")
             for index, paper in self.failed_papers:
                 log.error(f"{index} - {paper.paper_title}")
+        
+        yield {
+            "type":      "summary",
+            "total":     len(self.papers),
+            "extracted": counts["extracted"],
+            "cached":    counts["cached"],
+            "failed":    [paper.paper_id for _, paper in self.failed_papers],
+            "elapsed":   round(time.time() - start_time, 3),
+        }
+
+    def _paper_record(
+        self, 
+        paper: Publication, 
+        status: str, 
+        metadata: PublicationMetadata = None, 
+        error: str = None
+    ) -> Dict[str, Any]:
+        """ Build the per-paper record yielded by `stream`. """
+        
+        return {
+            "type":     "paper",
+            "paper_id": paper.paper_id,
+            "status":   status,
+            "metadata": metadata.to_dict(show_publication=True) if metadata else None,
+            "error":    error,
+        }
+
+    @Profiler("Extracting Metadata (batch)")
+    def extract_batch(self) -> List[PublicationMetadata]:
+        """
+        Extract metadata for all papers through Semantic Scholar batch lookups, without saving it.
+        
+        Crossref is not queried, so one request covers up to `MetadataRefresher.MAX_BATCH_SIZE`
+        papers. Papers unknown to Semantic Scholar are added to `failed_papers`.
+        """
+        fetcher    = MetadataRefresher()
+        batch_size = MetadataRefresher.MAX_BATCH_SIZE
+        
+        for start in range(0, len(self.papers), batch_size):
+            papers     = self.papers[start:start + batch_size]
+            paper_ids  = [self._get_paper_id(paper.paper_id) for paper in papers]
+            sch_papers = fetcher.fetch_batch(
+                paper_ids, fields=self.sch_fields, max_retries=1, timeout=settings.METADATA_REQUEST_TIMEOUT_SECONDS
+            ) or [None] * len(papers)
+            
+            for index, (paper, sch_paper) in enumerate(zip(papers, sch_papers), start=start):
+                if not sch_paper:
+                    self.failed_papers.append((index, paper))
+                    continue
+                
+                try:
+                    metadata = self._build_metadata(paper, sch_paper, crossref_paper=None)
+                    self.extracted_metadata.append(self.post_processing(metadata))
+                except Exception as e:
+                    log.error(f"Error extracting metadata for {paper.paper_title}. - {e}")
+                    self.failed_papers.append((index, paper))
+        
+        log.info(f"Extracted metadata for {len(self.extracted_metadata)}/{len(self.papers)} papers in batch.")
+        return self.extracted_metadata
 
     def _extract_data(self, paper: Publication) -> PublicationMetadata:
         """
@@ -123,14 +247,26 @@ class PublicationMetadataExtractor:
                     paper_title   = paper.paper_title,
                     doi           = pid,
                     search_string = paper.search_string,
-                    searched_from = paper.searched_from
+                    searched_from = paper.searched_from,
+                    refreshed_at  = timezone.now()
                 )
             
             sch_paper = sch_paper["data"][0]
         
-        # Extract other metadata fields
         doi             = self._get_doi(paper=sch_paper, paper_id=paper.paper_id)
         crossref_paper  = self._get_crossref_paper(doi)
+        return self._build_metadata(paper, sch_paper, crossref_paper)
+    
+    def _build_metadata(
+        self, 
+        paper: Publication, 
+        sch_paper: Dict[str, Any], 
+        crossref_paper: Union[None, Dict[str, Any]]
+    ) -> PublicationMetadata:
+        """ Build the metadata of a paper from its Semantic Scholar and (optional) Crossref records. """
+        
+        # Extract other metadata fields
+        doi             = self._get_doi(paper=sch_paper, paper_id=paper.paper_id)
         authors         = self._extract_authors(sch_paper, crossref_paper)
         abstract        = self._extract_abstract(sch_paper, crossref_paper)
         publisher       = self._extract_publisher(crossref_paper, doi)
@@ -138,6 +274,9 @@ class PublicationMetadataExtractor:
         fields_of_study = self._get_fields_of_study(sch_paper)
         doi_url         = f"https://doi.org/{doi}" if doi else None
         pub_date        = self._get_publication_date(sch_paper, crossref_paper)
+        
+        # Kept for post_processing, which gathers author affiliations from both records
+        self.sch_papers[doi] = sch_paper
 
         # TODO: paper keywords missing
         # TODO: paper type is conference/journal for arxiv papers
@@ -150,64 +289,66 @@ class PublicationMetadataExtractor:
             authors               = authors,
             abstract              = abstract,
             publisher             = publisher,
-            semantic_scholar_url  = sch_paper.get("url"),
+            semantic_scholar_url  = sch_paper.get("url") or "",
             doi_url               = doi_url,
             publication_date      = pub_date,
             field_of_study        = fields_of_study,
-            conference_journal    = sch_paper.get("venue"),
+            conference_journal    = sch_paper.get("venue") or "",
             publication_type      = paper_type,
             search_string         = paper.search_string,
-            citation_count        = sch_paper.get("citationCount"),
-            searched_from         = paper.searched_from
+            citation_count        = sch_paper.get("citationCount") or 0,
+            searched_from         = paper.searched_from,
+            refreshed_at          = timezone.now()
         )
         return metadata
     
     def post_processing(self, paper: PublicationMetadata) -> PublicationMetadata:
         """
         Post-process extracted metadata.
-        Apply cast_affliation to authors field.
+        Apply cast_affliation to authors field, record the affiliations seen in the
+        Crossref and Semantic Scholar records, and fill in missing affiliations
+        from the shared author table.
         """
-        # TODO: Fix this
-        crossref_authors = {}
-        FIRST_NAME_IDX = 0
-        LAST_NAME_IDX  = -1
-        
         paper.authors          = self._cast_affliation(paper.authors)
         paper.doi_url          = self._get_doi_url(paper.doi)
         paper.publication_type = self._get_publication_type(paper.publication_type)
-        crossref_paper         = self._get_crossref_paper(paper.doi) 
         
         if not paper.authors:
             return paper
         
-        # TODO: turn authors into a FK object with (author_name, family, and affiliation)
-    
-        if crossref_paper:
-            crossref_paper_authors = crossref_paper.get("author", [])
-            for author in crossref_paper_authors:
-                
-                if author["affiliation"] == []:
-                    continue
-                
-                first_name  = author.get("given", "")
-                last_name   = author.get("family", "")
-                author_name = f"{first_name} {last_name}"
-                
-                if author.get("affiliation"):
-                    crossref_authors[author_name] = [affil.get("name") for affil in author.get("affiliation")]
+        Author.bulk_record(self._collect_affiliations(paper))
 
-        for author in paper.authors:
-            if author["affiliation"] == ["No Affiliation"]:
-                author_name             = author["name"]
-                author_name_components  = author_name.split(" ")
-                author_name             = author_name_components[FIRST_NAME_IDX] + " " + author_name_components[LAST_NAME_IDX]
-                
-                if author_name in crossref_authors:
-                    author["affiliation"] = crossref_authors[author_name]
-                # else:
-                #     author["affiliation"] = self._get_affiliations_google_scholar(author_name)
+        missing_authors = [author for author in paper.authors if author["affiliation"] == [NO_AFFILIATION]]
+        if not missing_authors:
+            return paper
+        
+        known_affiliations = Author.lookup([author["name"] for author in missing_authors])
+        for author in missing_authors:
+            if affiliations := known_affiliations.get(Author.normalize_name(author["name"])):
+                author["affiliation"] = affiliations
         return paper
     
+    def _collect_affiliations(self, paper: PublicationMetadata) -> Dict[str, List[str]]:
+        """ Collect author name -> affiliations from the paper and its (already fetched) upstream records. """
+        
+        affiliations = {}
+        crossref_paper = self.crossref_papers.get(paper.doi)
+        sch_paper      = self.sch_papers.get(paper.doi) or {}
+        
+        for author in (crossref_paper or {}).get("author", []):
+            author_name = f'{author.get("given", "")} {author.get("family", "")}'.strip()
+            affiliations[author_name] = [affil.get("name") for affil in author.get("affiliation", [])]
+        
+        for author in sch_paper.get("authors") or []:
+            if author.get("name") and author.get("affiliations"):
+                affiliations.setdefault(author["name"], []).extend(author["affiliations"])
+        
+        for author in paper.authors:
+            if author["affiliation"] != [NO_AFFILIATION]:
+                affiliations.setdefault(author["name"], []).extend(author["affiliation"])
+        
+        return affiliations
+    
     # Helpers
     def _extract_sch(self, api_url: str, sch_fields: List[str]) -> Dict[str, Any]:
         """ Extract metadata from Semantic Scholar. """
@@ -266,7 +407,10 @@ class PublicationMetadataExtractor:
             return ["No Affiliation"]
 
     def _get_crossref_paper(self, doi: str):
-        """ Get the paper from Crossref. """
+        """ Get the paper from Crossref, reusing records already fetched by this extractor. """
+        
+        if doi in self.crossref_papers:
+            return self.crossref_papers[doi]
         
         try:
             crossref_paper = self.crossref_works.doi(doi)
@@ -276,51 +420,50 @@ class PublicationMetadataExtractor:
             log.error(f"Paper with DOI {doi} not found", e)
             crossref_paper = None
         
+        self.crossref_papers[doi] = crossref_paper
         return crossref_paper
   
     def _extract_authors(self, sch_paper, crossref_paper):
-        """Extract authors from the paper."""
+        """
+        Extract authors from the paper.
+        Builds new author dictionaries so the cached upstream records are left untouched.
+        """
         
         authors = None
         if crossref_paper is not None:
             authors = crossref_paper.get("author")
             
         if authors:
-            for i in range(len(authors)):
-                author        = authors[i]
+            extracted_authors = []
+            for author in authors:
                 author_name   = f'{author.get("given", "")} {author.get("family", "")}'
                 affiliations  = author.get("affiliation", [])
                 school_names  = (
                     [affil.get("name") for affil in affiliations]
                     if affiliations != []
-                    else ["No Affiliation"]
+                    else [NO_AFFILIATION]
                 )
                 
                 # Create a new dictionary with only 'name' and 'affiliation'
-                authors[i] = {
+                extracted_authors.append({
                     "name": author_name.strip(),
                     "affiliation": school_names,
-                }
-            return authors
+                })
+            return extracted_authors
             
         authors = sch_paper.get("authors")
         if not(authors):
             return []
 
-        for i in range(len(authors)):
-            author        = authors[i]
-            affiliations  = author.get("affiliations")
-            
-            if not(affiliations):
-                author_name = author["name"]
-                affiliations = ["No Affiliation"]
-
-            authors[i] = {
-                "name": author_name.strip(),
+        extracted_authors = []
+        for author in authors:
+            affiliations  = author.get("affiliations") or [NO_AFFILIATION]
+            extracted_authors.append({
+                "name": author["name"].strip(),
                 "affiliation": affiliations,
-            }
+            })
 
-        return authors
+        return extracted_authors
     
     def _extract_abstract(self, sch_paper: Dict[str, Any], crossref_paper: Union[None, Dict[str, Any]]):
         """ Extract the abstract from the paper. """
@@ -335,7 +478,7 @@ class PublicationMetadataExtractor:
         # TODO: Can try scraping via sch_paper["url"]
 
         log.warn("No abstract available.")
-        return "No abstract available."
+        return NO_ABSTRACT
     
 
     def _extract_publisher(self, crossref_paper: Union[None, Dict[str, Any]], doi: str):
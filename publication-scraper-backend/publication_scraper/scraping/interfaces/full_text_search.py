@@ -0,0 +1,122 @@
+import re
+from typing import List, Tuple
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from scraping.domain.query.search_query_parser import (
+    Operation,
+    QueryNode,
+    SearchQueryOperator,
+    SearchQueryParser,
+    Term,
+)
+from utils import Logger
+
+log = Logger(__name__)
+
+
+class PublicationSearch:
+    """
+    Ranked full-text search over the title, abstract, author names and venue of publications.
+
+    Searches the `publication_search` FTS5 table, which triggers keep in sync with Publication
+    and PublicationMetadata. Queries use the advanced search syntax (AND, OR, NOT, quoted
+    phrases, a trailing `*` for prefixes, adjacent terms ANDed), and results are ranked by
+    bm25 with matches in the title weighing the most. Words are indexed unstemmed, so that
+    prefixes match them as they are written.
+
+    Example Usage:
+
+        results, total = PublicationSearch().search('"code review" AND (LLM OR automat*)', limit=20)
+    """
+
+    # bm25 weights of the title, abstract, authors and venue columns
+    WEIGHTS = (10.0, 1.0, 2.0, 1.0)
+
+    NOT_WITHOUT_TERM = "NOT must follow a term it excludes matches from, as in 'review AND NOT bot'."
+
+    MATCHING_IDS_SQL = """
+        SELECT document.paper_id
+        FROM publication_search
+        JOIN publication_searchdocument AS document ON document.id = publication_search.rowid
+        WHERE publication_search MATCH %s
+    """
+
+    def __init__(self, weights: Tuple[float, float, float, float] = WEIGHTS):
+        self.weights = weights
+
+    def search(self, query: str, limit: int = 50, offset: int = 0) -> Tuple[List[Tuple[str, float]], int]:
+        """ The (paper id, score) of a page of the best matches, highest score first, and the number of matches. """
+
+        match = self.match_expression(query)
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT document.paper_id, -bm25(publication_search, %s, %s, %s, %s) AS score
+                FROM publication_search
+                JOIN publication_searchdocument AS document ON document.id = publication_search.rowid
+                WHERE publication_search MATCH %s
+                ORDER BY score DESC
+                LIMIT %s OFFSET %s
+            """, [*self.weights, match, limit, offset])
+            results = [(paper_id, round(score, 4)) for paper_id, score in cursor.fetchall()]
+
+            cursor.execute("SELECT count(*) FROM publication_search WHERE publication_search MATCH %s", [match])
+            total = cursor.fetchone()[0]
+        return results, total
+
+    @classmethod
+    def matching_ids(cls, query: str) -> RawSQL:
+        """ The paper ids matching a query, as a subquery for `paper_id__in`. """
+        return RawSQL(cls.MATCHING_IDS_SQL, [cls.match_expression(query)])
+
+    @classmethod
+    def match_expression(cls, query: str) -> str:
+        """
+        The FTS5 query of an advanced search query.
+
+        FTS5 only has a binary NOT, so negated terms must be ANDed with at least one term they
+        are excluded from.
+
+        >>> PublicationSearch.match_expression('"code review" AND NOT bot*')
+        '(("code review") NOT "bot"*)'
+        """
+        return cls._render(SearchQueryParser.compile(query).tree)
+
+    @classmethod
+    def _render(cls, node: QueryNode) -> str:
+        if isinstance(node, Term):
+            return cls._render_term(node)
+
+        if node.operator == SearchQueryOperator.OR:
+            return "(" + " OR ".join(cls._render(operand) for operand in cls._included(node.operands)) + ")"
+
+        if node.operator == SearchQueryOperator.NOT:
+            raise ValueError(cls.NOT_WITHOUT_TERM)
+
+        included = cls._included([operand for operand in node.operands if not cls._negated(operand)])
+        excluded = [operand.operands[0] for operand in node.operands if cls._negated(operand)]
+        expression = " AND ".join(cls._render(operand) for operand in included)
+        if not excluded:
+            return f"({expression})"
+        return f"(({expression})" + "".join(f" NOT {cls._render(operand)}" for operand in excluded) + ")"
+
+    @classmethod
+    def _included(cls, operands: List[QueryNode]) -> List[QueryNode]:
+        if not operands or any(cls._negated(operand) for operand in operands):
+            raise ValueError(cls.NOT_WITHOUT_TERM)
+        return operands
+
+    @staticmethod
+    def _negated(node: QueryNode) -> bool:
+        return isinstance(node, Operation) and node.operator == SearchQueryOperator.NOT
+
+    @staticmethod
+    def _render_term(term: Term) -> str:
+        """ A term as an FTS5 string, which FTS5 matches as a phrase of its words. """
+
+        if not re.search(r"\w", term.text):
+            raise ValueError(f"{term.text!r} has no words to search for.")
+        if term.text.endswith("*") and not term.phrase:
+            return '"{}"*'.format(term.text.rstrip("*").replace('"', '""'))
+        return '"{}"'.format(term.text.replace('"', '""'))
@@ -0,0 +1,256 @@
+import re
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.db import connection
+
+from publication.models import Publication
+from scraping.domain.query.search_query_parser import (
+    Operation,
+    QueryNode,
+    SearchQueryOperator,
+    SearchQueryParser,
+    Term,
+)
+from utils import Logger, Profiler
+
+from .extract_metadata import NO_ABSTRACT
+
+log = Logger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def encode_varints(numbers: Iterable[int]) -> bytes:
+    """ Encode non-negative integers as LEB128 varints, 7 bits per byte. """
+
+    encoded = bytearray()
+    for number in numbers:
+        while number >= 0x80:
+            encoded.append((number & 0x7F) | 0x80)
+            number >>= 7
+        encoded.append(number)
+    return bytes(encoded)
+
+
+def decode_varints(encoded: bytes) -> Iterator[int]:
+    """ Decode a sequence of LEB128 varints. """
+
+    number = shift = 0
+    for byte in encoded:
+        number |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield number
+            number = shift = 0
+
+
+class QueryIndex:
+    """
+    Evaluates advanced search queries against the harvested corpus, without asking any engine.
+
+    Every Publication is a document of its title and, when it has metadata, its abstract. The
+    index maps each lowercase word to compressed postings: the delta-encoded documents holding
+    it with the word's count in each, and separately the delta-encoded positions of the word
+    in those documents, so that boolean operators only decode the documents, and phrases and
+    hyphenated terms also check that their words are adjacent. A trailing `*` matches every
+    word starting with the term.
+
+    The index for the current corpus is built on first use and rebuilt once publications or
+    metadata change.
+
+    Example Usage:
+
+        index = QueryIndex.current()
+        paper_ids = index.search(SearchQueryParser.compile('"code review" AND (LLM OR automat*)'))
+    """
+
+    # Positions skipped between the title and the abstract, so that phrases do not span them
+    FIELD_GAP = 1
+
+    _lock = threading.Lock()
+    _current: Optional["QueryIndex"] = None
+
+    def __init__(self, paper_ids: List[str], postings: Dict[str, Tuple[bytes, bytes]], signature: Tuple = ()):
+        self.paper_ids  = paper_ids
+        self.postings   = postings
+        self.vocabulary = sorted(postings)
+        self.signature  = signature
+        self.documents  = frozenset(range(len(paper_ids)))
+        self._doc_set   = lru_cache(maxsize=4096)(self._decode_documents)
+        self._positions = lru_cache(maxsize=256)(self._decode_positions)
+
+    @classmethod
+    def current(cls, refresh: bool = False) -> "QueryIndex":
+        """ The index of the corpus as it is now, rebuilding it if the corpus changed since it was built. """
+
+        signature = cls.corpus_signature()
+        with cls._lock:
+            if refresh or cls._current is None or cls._current.signature != signature:
+                cls._current = cls.from_database(signature)
+            return cls._current
+
+    @staticmethod
+    def corpus_signature() -> Tuple:
+        """ What changes whenever a title or an abstract is added, changed or removed, bulk writes included. """
+
+        # Bumped by triggers on publications and their metadata
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT version FROM publication_corpusversion")
+            return tuple(cursor.fetchone())
+
+    @classmethod
+    @Profiler("Query Index - Build")
+    def from_database(cls, signature: Tuple = ()) -> "QueryIndex":
+        """ Index the titles of every Publication and the abstracts of their metadata. """
+
+        documents = (
+            Publication.objects
+                .order_by("paper_id")
+                .values_list("paper_id", "paper_title", "metadata__abstract")
+                .iterator(chunk_size=2000)
+        )
+        index = cls.build(
+            (paper_id, [title or "", abstract if abstract and abstract != NO_ABSTRACT else ""])
+            for paper_id, title, abstract in documents
+        )
+        index.signature = signature
+        log.info(f"Indexed {len(index.paper_ids)} publications: {len(index.vocabulary)} words, {index.size() / 2 ** 20:.1f} MiB of postings.")
+        return index
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, List[str]]]) -> "QueryIndex":
+        """ Index (paper id, fields) documents, in order. """
+
+        paper_ids: List[str] = []
+        occurrences: Dict[str, Tuple[List[int], List[List[int]]]] = {}
+        for doc, (paper_id, fields) in enumerate(documents):
+            paper_ids.append(paper_id)
+            positions_of: Dict[str, List[int]] = {}
+            position = 0
+            for field in fields:
+                for token in TOKEN_PATTERN.findall(field.lower()):
+                    positions_of.setdefault(token, []).append(position)
+                    position += 1
+                position += cls.FIELD_GAP
+
+            for token, positions in positions_of.items():
+                docs, doc_positions = occurrences.setdefault(token, ([], []))
+                docs.append(doc)
+                doc_positions.append(positions)
+
+        postings = {token: cls._encode(docs, doc_positions) for token, (docs, doc_positions) in occurrences.items()}
+        return cls(paper_ids, postings)
+
+    @staticmethod
+    def _encode(docs: List[int], doc_positions: List[List[int]]) -> Tuple[bytes, bytes]:
+        """ The (document gap, count) pairs, and the position gaps within each document. """
+
+        doc_gaps      = (doc - previous for doc, previous in zip(docs, [0, *docs]))
+        position_gaps = (position - previous for positions in doc_positions for position, previous in zip(positions, [0, *positions]))
+
+        documents = encode_varints(number for gap, positions in zip(doc_gaps, doc_positions) for number in (gap, len(positions)))
+        return documents, encode_varints(position_gaps)
+
+    def _decode_documents(self, token: str) -> frozenset:
+        """ The documents holding a word. """
+
+        if token not in self.postings:
+            return frozenset()
+        numbers = list(decode_varints(self.postings[token][0]))
+        return frozenset(accumulate(numbers[0::2]))
+
+    def _decode_positions(self, token: str) -> Dict[int, List[int]]:
+        """ The positions of a word in each document holding it. """
+
+        documents, positions = self.postings.get(token, (b"", b""))
+        numbers = list(decode_varints(documents))
+        position_gaps = decode_varints(positions)
+
+        positions_of = {}
+        for doc, count in zip(accumulate(numbers[0::2]), numbers[1::2]):
+            positions_of[doc] = list(accumulate(next(position_gaps) for _ in range(count)))
+        return positions_of
+
+    def search(self, parser: SearchQueryParser) -> List[str]:
+        """ The ids of the papers matching a compiled query, in paper id order. """
+        return [self.paper_ids[doc] for doc in sorted(self.evaluate(parser.tree))]
+
+    def evaluate(self, node: QueryNode) -> Set[int]:
+        """ The documents matching a node of a compiled query. """
+
+        if isinstance(node, Term):
+            return self._match(node)
+
+        if node.operator == SearchQueryOperator.NOT:
+            return self.documents - self.evaluate(node.operands[0])
+
+        if node.operator == SearchQueryOperator.OR:
+            return set().union(*(self.evaluate(operand) for operand in node.operands))
+
+        # Negated operands are subtracted rather than complemented, and the rest are
+        # intersected smallest first
+        included = [operand for operand in node.operands if not self._negated(operand)]
+        excluded = [operand.operands[0] for operand in node.operands if self._negated(operand)]
+        matches  = sorted((self.evaluate(operand) for operand in included), key=len) or [self.documents]
+
+        result = set(matches[0])
+        for match in matches[1:]:
+            if not result:
+                break
+            result &= match
+        for operand in excluded:
+            if not result:
+                break
+            result -= self.evaluate(operand)
+        return result
+
+    @staticmethod
+    def _negated(node: QueryNode) -> bool:
+        return isinstance(node, Operation) and node.operator == SearchQueryOperator.NOT
+
+    def _match(self, term: Term) -> Set[int]:
+        """ The documents holding a term: a word, a prefix, or words that must be adjacent. """
+
+        tokens = TOKEN_PATTERN.findall(term.text.lower())
+        if not tokens:
+            return set()
+
+        if term.text.endswith("*") and len(tokens) == 1:
+            start = bisect_left(self.vocabulary, tokens[0])
+            end   = bisect_left(self.vocabulary, tokens[0] + "\U0010FFFF")
+            return set().union(*(self._doc_set(token) for token in self.vocabulary[start:end]))
+
+        candidates = set(self._doc_set(tokens[0]))
+        for token in tokens[1:]:
+            candidates &= self._doc_set(token)
+        if len(tokens) == 1 or not candidates:
+            return candidates
+        return self._adjacent(tokens, candidates)
+
+    def _adjacent(self, tokens: List[str], candidates: Set[int]) -> Set[int]:
+        """ The candidate documents in which the tokens follow each other. """
+
+        positions_of = {token: self._positions(token) for token in set(tokens)}
+
+        matches = set()
+        for doc in candidates:
+            starts = set(positions_of[tokens[0]][doc])
+            for offset, token in enumerate(tokens[1:], start=1):
+                starts &= {position - offset for position in positions_of[token][doc]}
+                if not starts:
+                    break
+            if starts:
+                matches.add(doc)
+        return matches
+
+    def size(self) -> int:
+        """ Bytes of compressed postings. """
+        return sum(len(documents) + len(positions) for documents, positions in self.postings.values())
+
+    def stats(self) -> Dict[str, int]:
+        return {"documents": len(self.paper_ids), "words": len(self.vocabulary), "postings_bytes": self.size()}
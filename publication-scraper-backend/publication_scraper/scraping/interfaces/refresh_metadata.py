@@ -0,0 +1,188 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from publication.models import PublicationMetadata
+from utils.logger import Logger
+
+log = Logger(__name__)
+
+class MetadataRefresher:
+    """
+    Refreshes the volatile fields (citation count, abstract) of cached publication metadata
+    through the Semantic Scholar batch API.
+
+    Rows are refreshed in batches of up to `MAX_BATCH_SIZE` papers per request, and a run
+    stops once `max_requests` requests have been sent.
+
+    Example Usage:
+
+        refresher = MetadataRefresher()
+        refresher.refresh(MetadataRefresher.stale_metadata(), max_requests=10)
+    """
+
+    MAX_BATCH_SIZE = 500
+
+    def __init__(self, batch_size: int = MAX_BATCH_SIZE):
+        self.batch_url  = "https://api.semanticscholar.org/graph/v1/paper/batch"
+        self.sch_fields = ["citationCount", "abstract"]
+        self.batch_size = min(batch_size, self.MAX_BATCH_SIZE)
+        self.headers    = { "Content-Type": "application/json" }
+
+        if settings.SEMANTIC_SCHOLAR_API_KEY:
+            self.headers["x-api-key"] = settings.SEMANTIC_SCHOLAR_API_KEY
+
+    @staticmethod
+    def max_age() -> timedelta:
+        """ Age after which cached metadata is considered stale. """
+        return timedelta(days=settings.METADATA_REFRESH_AFTER_DAYS)
+
+    @staticmethod
+    def stale_metadata(max_age: Optional[timedelta] = None):
+        """ Stale metadata rows, stalest (or never refreshed) first. """
+
+        threshold = timezone.now() - (max_age if max_age is not None else MetadataRefresher.max_age())
+        return (
+            PublicationMetadata.objects
+                .filter(Q(refreshed_at__isnull=True) | Q(refreshed_at__lt=threshold))
+                .order_by(F("refreshed_at").asc(nulls_first=True))
+        )
+
+    def refresh(self, metadata: Iterable[PublicationMetadata], max_requests: Optional[int] = None) -> int:
+        """
+        Refresh the given metadata rows, sending at most `max_requests` batch requests.
+
+        :param metadata (Iterable[PublicationMetadata]): Rows to refresh, in priority order.
+        :param max_requests (int): Request budget for this run, unlimited if None.
+        :rettype int: Number of refreshed rows.
+        """
+        refreshed = 0
+        requests_sent = 0
+
+        for batch in self._batches(metadata):
+            if max_requests is not None and requests_sent >= max_requests:
+                log.info(f"Request budget of {max_requests} exhausted.")
+                break
+
+            sch_papers = self.fetch_batch([self._get_sch_id(md) for md in batch])
+            requests_sent += 1
+            if sch_papers is None:
+                continue
+
+            refreshed += self._apply(batch, sch_papers)
+
+        log.info(f"──────── Refreshed {refreshed} metadata rows with {requests_sent} requests ────────")
+        return refreshed
+
+    def fetch_batch(
+        self, 
+        paper_ids: List[str], 
+        fields: Optional[List[str]] = None, 
+        max_retries: int = 3, 
+        delay: int = 5,
+        timeout: float = 30
+    ) -> Optional[List[Optional[Dict[str, Any]]]]:
+        """
+        Fetch papers from the Semantic Scholar batch API, with `fields` defaulting to the refreshed fields.
+        The response is aligned with `paper_ids`, with None for papers that were not found.
+
+        The retrying defaults suit the background refresh; callers serving a request pass
+        `max_retries=1` and `settings.METADATA_REQUEST_TIMEOUT_SECONDS` so an outage fails fast.
+        """
+
+        params = { "fields": ",".join(dict.fromkeys(fields or self.sch_fields)) }
+        for attempt in range(max_retries):
+            try:
+                response = requests.post(self.batch_url, headers=self.headers, params=params, json={ "ids": paper_ids }, timeout=timeout)
+            except requests.RequestException as e:
+                log.error(f"Batch request failed: {e}. Attempt {attempt + 1} of {max_retries}.")
+            else:
+                if response.status_code == 200:
+                    return response.json()
+                log.error(f"Batch request failed with status code {response.status_code}. Attempt {attempt + 1} of {max_retries}.")
+
+            if attempt < max_retries - 1:
+                time.sleep(delay)
+
+        return None
+
+    def _apply(self, batch: List[PublicationMetadata], sch_papers: List[Optional[Dict[str, Any]]]) -> int:
+        """ Apply the fetched fields to the rows and save them in one bulk update. """
+
+        now = timezone.now()
+        for md, sch_paper in zip(batch, sch_papers):
+            # Papers unknown to Semantic Scholar are also marked, so they rotate to the back of the queue
+            md.refreshed_at = now
+            if not sch_paper:
+                continue
+            if sch_paper.get("citationCount") is not None:
+                md.citation_count = sch_paper["citationCount"]
+            if sch_paper.get("abstract"):
+                md.abstract = sch_paper["abstract"]
+
+        PublicationMetadata.objects.bulk_update(batch, ["citation_count", "abstract", "refreshed_at"])
+        return len(batch)
+
+    def _batches(self, metadata: Iterable[PublicationMetadata]) -> Iterable[List[PublicationMetadata]]:
+        """ Split the rows into batches of `batch_size`. """
+
+        batch = []
+        for md in metadata:
+            batch.append(md)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _get_sch_id(self, metadata: PublicationMetadata) -> str:
+        """ Get the Semantic Scholar paper identifier of the metadata row. """
+
+        if metadata.doi:
+            return f"DOI:{metadata.doi}"
+        return metadata.publication_id
+
+
+class BackgroundMetadataRefresher:
+    """
+    Queues stale metadata rows for a refresh on a single background worker.
+    Rows already queued are not queued again until their refresh completes.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="metadata-refresh")
+        self.lock     = threading.Lock()
+        self.queued   = set()
+
+    def queue(self, metadata: List[PublicationMetadata]) -> None:
+        """ Queue the given metadata rows for a background refresh. """
+
+        with self.lock:
+            ids = [md.pk for md in metadata if md.pk not in self.queued]
+            self.queued.update(ids)
+
+        if ids:
+            log.info(f"Queued {len(ids)} stale metadata rows for refresh.")
+            self.executor.submit(self._refresh, ids)
+
+    def _refresh(self, ids: List[int]) -> None:
+        """ Refresh the queued rows on the worker thread. """
+        try:
+            MetadataRefresher().refresh(PublicationMetadata.objects.filter(pk__in=ids))
+        except Exception as e:
+            log.error(f"Background metadata refresh failed: {e}")
+        finally:
+            with self.lock:
+                self.queued.difference_update(ids)
+            connection.close()
+
+
+background_refresher = BackgroundMetadataRefresher()
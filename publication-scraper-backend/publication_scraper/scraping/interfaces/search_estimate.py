@@ -0,0 +1,105 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import requests
+from django.conf import settings
+
+from scraping.domain import SearchEngine
+from scraping.models import SearchEngineType
+from utils import Logger, Profiler
+
+log = Logger(__name__)
+
+
+class SearchCostEstimator:
+    """
+    Estimates what a search would return and how long it would take, before running it.
+
+    Every search string of every engine is probed at once with a count-only request. A probe
+    estimates a search string at its number of requests times the probe's round trip, plus
+    the seconds per result of its engine (SEARCH_ESTIMATE_SECONDS_PER_RESULT) for every result
+    fetched. Engines search concurrently and go through their search strings in turn, so the
+    whole search takes as long as its slowest engine.
+
+    Example Usage:
+
+        estimator = SearchCostEstimator({SearchEngineType.DBLP: DBLPEngine(query)})
+        estimate  = estimator.estimate()
+    """
+
+    def __init__(
+        self,
+        engines: Dict[SearchEngineType, SearchEngine],
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        seconds_per_result: Optional[Dict[str, float]] = None
+    ):
+        self.engines            = engines
+        self.max_workers        = max_workers or settings.SEARCH_ESTIMATE_MAX_WORKERS
+        self.timeout            = timeout or settings.SEARCH_ESTIMATE_TIMEOUT_SECONDS
+        self.seconds_per_result = seconds_per_result if seconds_per_result is not None else settings.SEARCH_ESTIMATE_SECONDS_PER_RESULT
+
+    @Profiler("Search Estimate")
+    def estimate(self) -> Dict[str, Any]:
+        """ The estimate of every search string on every engine, with their totals. """
+
+        start_time = time.perf_counter()
+        search_strings = {engine_type: engine.search_strings() for engine_type, engine in self.engines.items()}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="search-estimate") as executor:
+            probes = {
+                engine_type: [executor.submit(self._probe, engine_type, engine, search_string) for search_string in search_strings[engine_type]]
+                for engine_type, engine in self.engines.items()
+            }
+            estimates = {engine_type: [probe.result() for probe in engine_probes] for engine_type, engine_probes in probes.items()}
+
+        # Every engine goes through the same search strings
+        combinations = next(iter(search_strings.values()), [])
+        per_combination = [
+            {
+                "search_string": search_string,
+                "engines": {engine_type.value: estimates[engine_type][index] for engine_type in self.engines},
+                "hits": sum(estimates[engine_type][index].get("hits", 0) for engine_type in self.engines),
+            }
+            for index, search_string in enumerate(combinations)
+        ]
+        per_engine = {
+            engine_type.value: {
+                "hits": sum(estimate.get("hits", 0) for estimate in engine_estimates),
+                "fetched": sum(estimate.get("fetched", 0) for estimate in engine_estimates),
+                "estimated_seconds": round(sum(estimate.get("estimated_seconds", 0.0) for estimate in engine_estimates), 2),
+                "failed": sum(1 for estimate in engine_estimates if "error" in estimate),
+            }
+            for engine_type, engine_estimates in estimates.items()
+        }
+        return {
+            "combinations": per_combination,
+            "engines": per_engine,
+            "hits": sum(engine["hits"] for engine in per_engine.values()),
+            "estimated_seconds": max((engine["estimated_seconds"] for engine in per_engine.values()), default=0.0),
+            "probe_seconds": round(time.perf_counter() - start_time, 3),
+        }
+
+    def _probe(self, engine_type: SearchEngineType, engine: SearchEngine, search_string: Any) -> Dict[str, Any]:
+        """ Count the results of a search string on an engine, and estimate the time to fetch them. """
+
+        start_time = time.perf_counter()
+        try:
+            formatted_search_string, hits = engine.count_results(search_string, timeout=self.timeout)
+        except (requests.RequestException, ValueError) as e:
+            log.error(f"Failed to estimate {search_string} on {engine_type.value}: {e}")
+            return {"error": str(e)}
+        probe_seconds = time.perf_counter() - start_time
+
+        fetched           = min(hits, engine.MAX_RESULTS) if engine.MAX_RESULTS is not None else hits
+        requests_needed   = max(math.ceil(fetched / engine.PAGE_SIZE), 1)
+        estimated_seconds = requests_needed * probe_seconds + fetched * self.seconds_per_result.get(engine_type.value, 0.0)
+        return {
+            "formatted_search_string": formatted_search_string,
+            "hits": hits,
+            "fetched": fetched,
+            "requests": requests_needed,
+            "estimated_seconds": round(estimated_seconds, 2),
+            "probe_seconds": round(probe_seconds, 3),
+        }
@@ -0,0 +1,50 @@
+import os
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from scraping.domain.search_term.synonym_index import SynonymIndex, wordnet_entries
+
+
+class Command(BaseCommand):
+    """
+    Build the WordNet synonym index that search term processing looks synonyms up in.
+    Downloads the WordNet corpus if it is missing; only needed again when NLTK is upgraded:
+
+        python manage.py build_synonym_index
+    """
+    help = "Precompute the WordNet synonym index (SYNONYM_INDEX_PATH)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", type=str, default=None,
+            help="Where to write the index (defaults to SYNONYM_INDEX_PATH).",
+        )
+        parser.add_argument(
+            "--sample", type=int, default=10000,
+            help="Number of lookups to time on the built index.",
+        )
+
+    def handle(self, *args, **options):
+        import nltk
+        nltk.download("wordnet", quiet=True)
+
+        path = options["output"] or settings.SYNONYM_INDEX_PATH
+        start_time = time.perf_counter()
+        words = SynonymIndex.build(wordnet_entries(), path)
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {words} words in {time.perf_counter() - start_time:.1f}s "
+            f"({os.path.getsize(path) / 2 ** 20:.1f} MiB) at {path}."
+        ))
+
+        # Time lookups on the new index, half of them for words it does not have
+        index = SynonymIndex(path)
+        sample = [index._key(random.randrange(len(index))).decode() for _ in range(options["sample"] // 2)]
+        sample += [f"{word}xq" for word in sample]
+        start_time = time.perf_counter()
+        for word in sample:
+            index.synonyms(word)
+        elapsed = time.perf_counter() - start_time
+        self.stdout.write(f"  Lookup: {elapsed / max(len(sample), 1) * 1e6:.1f} µs on average over {len(sample)} words")
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from scraping.interfaces.refresh_metadata import MetadataRefresher
+
+
+class Command(BaseCommand):
+    """
+    Refresh the stalest publication metadata rows through the Semantic Scholar batch API.
+    Intended to be scheduled periodically, e.g. with cron:
+
+        0 3 * * * python manage.py refresh_metadata --max-requests 20
+    """
+    help = "Refresh the stalest publication metadata rows in batches, within a request budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-requests", type=int, default=10,
+            help="Maximum number of Semantic Scholar batch requests to send.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=MetadataRefresher.MAX_BATCH_SIZE,
+            help=f"Papers per batch request (at most {MetadataRefresher.MAX_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--stale-after", type=int, default=None,
+            help="Refresh rows older than this many days (defaults to METADATA_REFRESH_AFTER_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        max_age   = timedelta(days=options["stale_after"]) if options["stale_after"] is not None else None
+        refresher = MetadataRefresher(batch_size=options["batch_size"])
+        
+        # Only load as many rows as the budget can cover
+        limit     = options["max_requests"] * refresher.batch_size
+        metadata  = MetadataRefresher.stale_metadata(max_age)[:limit]
+        
+        refreshed = refresher.refresh(metadata.iterator(), max_requests=options["max_requests"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} metadata rows."))
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.14 on 2026-10-19 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0002_searchresponse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThesaurusSynonyms',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=200, unique=True)),
+                ('synonyms', models.JSONField(default=list)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,6 +1,10 @@
 import uuid
+from datetime import timedelta
 from enum import Enum
+from typing import Dict, List
+
 from django.db import models
+from django.utils import timezone
 
 class SearchEngineType(str, Enum):
     DBLP = "DBLP"
@@ -49,4 +53,41 @@ class SearchResponse(models.Model):
             "matches": self.matches,
             "results": self.results,
             "timestamp": self.timestamp
-        }
\ No newline at end of file
+        }
+
+class ThesaurusSynonyms(models.Model):
+    """
+    word - the looked up word, lowercased
+    synonyms - JSON list of its thesaurus.com synonyms, empty if it has none
+    fetched_at - when the synonyms were fetched; entries older than THESAURUS_CACHE_DAYS are fetched again
+    """
+    word        = models.CharField(max_length=200, unique=True)
+    synonyms    = models.JSONField(default=list)
+    fetched_at  = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.word} - {len(self.synonyms)} synonyms"
+
+    @staticmethod
+    def fresh(words: List[str], max_age: timedelta) -> Dict[str, List[str]]:
+        """ The cached synonyms of the words fetched within `max_age`, in one query. """
+
+        cached = ThesaurusSynonyms.objects.filter(
+            word__in=set(words),
+            fetched_at__gte=timezone.now() - max_age,
+        ).values_list('word', 'synonyms')
+        return dict(cached)
+
+    @staticmethod
+    def bulk_store(synonyms: Dict[str, List[str]]) -> None:
+        """ Store freshly fetched synonyms, replacing the stale entries of the same words. """
+
+        if not synonyms:
+            return
+        fetched_at = timezone.now()
+        ThesaurusSynonyms.objects.bulk_create(
+            [ThesaurusSynonyms(word=word, synonyms=words, fetched_at=fetched_at) for word, words in synonyms.items()],
+            update_conflicts=True,
+            unique_fields=['word'],
+            update_fields=['synonyms', 'fetched_at'],
+        )
@@ -7,7 +7,9 @@ from rest_framework.serializers import (
     ModelSerializer,
     MultipleChoiceField,
     Serializer,
+    ValidationError,
 )
+from scraping.domain import SearchQueryParser, SearchQuerySyntaxError
 from scraping.models import SearchEngineType
 
 
@@ -21,6 +23,14 @@ class QuerySerializer(Serializer):
     secondary = ListField(child=CharField(), default=[], required=False, allow_empty=True)
     tertiary = ListField(child=CharField(), default=[], required=False, allow_empty=True)
 
+    def validate_advanced(self, value):
+        if value:
+            try:
+                SearchQueryParser.compile(value)
+            except SearchQuerySyntaxError as e:
+                raise ValidationError(str(e))
+        return value
+
 class SearchAndCleanSerializer(Serializer):
     validation_papers = ListField(child=ValidationPaperSerializer(), default=[])
     search_terms = QuerySerializer(required=True)
@@ -37,6 +47,26 @@ class ManualAddPublicationSerializer(Serializer):
     dois = ListField(child=CharField(), required=True)
 class PublicationMetadataSerializer(Serializer):
     paper_ids = ListField(child=CharField(), required=True)
+    stream = BooleanField(default=False)
+
+class QueryPreviewSerializer(Serializer):
+    query = CharField(required=True)
+    show_publication = BooleanField(default=False)
+    limit = IntegerField(default=1000, min_value=0)
+    refresh = BooleanField(default=False)
+
+    def validate_query(self, value):
+        try:
+            SearchQueryParser.compile(value)
+        except SearchQuerySyntaxError as e:
+            raise ValidationError(str(e))
+        return value
+
+class PublicationSearchSerializer(Serializer):
+    q = CharField(required=True)
+    limit = IntegerField(default=50, min_value=1, max_value=1000)
+    offset = IntegerField(default=0, min_value=0)
+    show_metadata = BooleanField(default=False)
 
 class SearchStringDifferenceSerializer(Serializer):
     search_terms = QuerySerializer(required=True)
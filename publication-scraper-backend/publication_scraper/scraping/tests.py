@@ -1,3 +1,123 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from publication.models import Publication, PublicationMetadata
+from scraping.domain.query.search_query_parser import (
+    Operation,
+    SearchQueryOperator,
+    SearchQueryParser,
+    SearchQuerySyntaxError,
+    Term,
+)
+from scraping.infrastructure.data_export import RisExporter
+from scraping.interfaces.full_text_search import PublicationSearch
+
+
+class PublicationSearchTest(TestCase):
+
+    def test_prefix_matches_the_written_word(self):
+        Publication.objects.create(paper_id="DOI:10.1/automated", paper_title="Automated Code Review")
+        Publication.objects.create(paper_id="DOI:10.1/manual", paper_title="Manual Code Review")
+
+        results, total = PublicationSearch().search("automat*")
+        self.assertEqual(total, 1)
+        self.assertEqual([paper_id for paper_id, _ in results], ["DOI:10.1/automated"])
+
+
+class RisExporterTest(TestCase):
+
+    def publication(self, paper_id: str, publication_type: list) -> Publication:
+        publication = Publication.objects.create(paper_id=paper_id, paper_title=paper_id)
+        PublicationMetadata.objects.create(
+            publication=publication, abstract="", publication_date="2024-01-01", citation_count=0, publication_type=publication_type
+        )
+        return Publication.objects.select_related('metadata').get(paper_id=paper_id)
+
+    def test_one_type_per_reference_first(self):
+        publications = [
+            self.publication("DOI:10.1/conference", ["conference", "journalarticle"]),
+            self.publication("DOI:10.1/chapter", ["book-chapter"]),
+            self.publication("DOI:10.1/proceedings", ["proceedings-article"]),
+            self.publication("DOI:10.1/untyped", []),
+        ]
+        exporter = RisExporter()
+        exporter.export(publications)
+
+        references = [reference.strip().splitlines() for reference in exporter.exported_data.split("ER  - ") if reference.strip()]
+        self.assertEqual([lines[0] for lines in references], ["TY  - CONF", "TY  - CHAP", "TY  - CONF", "TY  - JOUR"])
+        self.assertTrue(all(sum(line.startswith("TY  - ") for line in lines) == 1 for lines in references))
+
+
+class SearchQueryParserTest(SimpleTestCase):
+
+    def assertRenders(self, expr: str, semantic_scholar: str, dblp: str, web_of_science: str):
+        parser = SearchQueryParser(expr)
+        self.assertEqual(
+            [parser.parse("SEMANTIC_SCHOLAR"), parser.parse("DBLP"), parser.parse("WEB_OF_SCIENCE")],
+            [semantic_scholar, dblp, web_of_science],
+        )
+
+    def assertSyntaxError(self, expr: str, message: str, position: int):
+        with self.assertRaises(SearchQuerySyntaxError) as raised:
+            SearchQueryParser(expr)
+        self.assertIn(message, str(raised.exception))
+        self.assertEqual(raised.exception.position, position)
+
+    def test_not_binds_tighter_than_and_and_and_than_or(self):
+        self.assertEqual(SearchQueryParser("a OR b AND NOT c").tree, Operation(SearchQueryOperator.OR, (
+            Term("a"),
+            Operation(SearchQueryOperator.AND, (Term("b"), Operation(SearchQueryOperator.NOT, (Term("c"),)))),
+        )))
+        self.assertRenders("a OR b AND c", "(a | b + c)", "(a$ | b$ c$)", "(a OR b c)")
+        self.assertRenders("(a OR b) AND c", "(a | b) + c", "(a$ | b$) c$", "(a OR b) c")
+
+    def test_operators_in_any_case(self):
+        self.assertEqual(SearchQueryParser("a and not b").tree, SearchQueryParser("a AND NOT b").tree)
+
+    def test_adjacent_terms_are_anded(self):
+        self.assertEqual(SearchQueryParser("a b (c OR d)").tree, SearchQueryParser("a AND b AND (c OR d)").tree)
+        self.assertRenders("a b", "a + b", "a$ b$", "a b")
+
+    def test_hyphenated_terms(self):
+        self.assertEqual(SearchQueryParser("code-review").tree, Term("code-review"))
+        self.assertRenders("code-review", '"code review"', "code-review$", "code-review")
+
+    def test_apostrophe_terms(self):
+        self.assertEqual(SearchQueryParser("developer's tools").tree, Operation(SearchQueryOperator.AND, (Term("developer's"), Term("tools"))))
+        self.assertRenders("developer's", "developer's", "developer's$", "developer's")
+
+    def test_quoted_phrases(self):
+        self.assertEqual(SearchQueryParser('"code  review"').tree, Term("code review", phrase=True))
+        self.assertEqual(SearchQueryParser("'code review'").tree, Term("code review", phrase=True))
+        self.assertRenders('"code review" AND \'pull request\'',
+            '"code review" + "pull request"', '"code review"$ "pull request"$', '"code review" "pull request"')
+
+    def test_not_over_a_term(self):
+        self.assertRenders("a AND NOT b", "a + -b", "a$ -b$", "a NOT b")
+
+    def test_not_over_an_and_group(self):
+        self.assertRenders("NOT (a AND b)", "-(a + b)", "-(a$ b$)", "NOT (a b)")
+        self.assertRenders("c AND NOT (a b)", "c + -(a + b)", "c$ -(a$ b$)", "c NOT (a b)")
+
+    def test_not_over_an_or_group(self):
+        self.assertRenders("NOT (a OR b)", "-(a | b)", "-(a$ | b$)", "NOT (a OR b)")
+
+    def test_empty_query(self):
+        self.assertSyntaxError("", "Empty query", 0)
+        self.assertSyntaxError("   ", "Empty query", 0)
+
+    def test_empty_phrase(self):
+        self.assertSyntaxError('a ""', "Empty phrase", 3)
+
+    def test_unterminated_quote(self):
+        self.assertSyntaxError('a AND "code review', "Unterminated quote", 6)
+
+    def test_missing_closing_parenthesis(self):
+        self.assertSyntaxError("a AND (b OR c", "Missing closing parenthesis", 13)
+
+    def test_unexpected_closing_parenthesis(self):
+        self.assertSyntaxError("a )", "Unexpected token ')'", 2)
+
+    def test_dangling_operator(self):
+        self.assertSyntaxError("a AND", "Expected a term, got the end of the query", 5)
+        self.assertSyntaxError("NOT", "Expected a term, got the end of the query", 3)
+        self.assertSyntaxError("a OR OR b", "Expected a term, got 'OR'", 5)
@@ -4,9 +4,12 @@ from rest_framework.routers import DefaultRouter
 from .views.core_views import (
     PublicationMetadataView,
     SearchAndCleanView,
+    SearchEstimateView,
     SearchStringDifferenceView,
     ManualAddPublicationView,
-    HistoricalSearchQueryResultsView
+    HistoricalSearchQueryResultsView,
+    PublicationSearchView,
+    QueryPreviewView
 )
 from .views.crud_views import PublicationViewSet
 from .views.export_views import ExportView
@@ -18,10 +21,13 @@ router.register(r'publication', PublicationViewSet)
 # Core backend functions
 core_urls = [
     path('search-and-clean', SearchAndCleanView.as_view(), name='search-and-clean'),
+    path('search-and-clean/estimate', SearchEstimateView.as_view(), name='search-and-clean-estimate'),
     path('publication-metadata', PublicationMetadataView.as_view(), name='publication-metadata'),
     path('manual-add-publication', ManualAddPublicationView.as_view(), name='manual-add-publication'),
     path('search-string-difference', SearchStringDifferenceView.as_view(), name='search-string-difference'),
     path('historical-search', HistoricalSearchQueryResultsView.as_view(), name='historical-search'),
+    path('query-preview', QueryPreviewView.as_view(), name='query-preview'),
+    path('publication-search', PublicationSearchView.as_view(), name='publication-search'),
 ]
 
 # Web controller views
@@ -1,9 +1,13 @@
+import json
 import string
-import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from itertools import product
-from typing import Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Tuple
 
-from django.http import JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
 from publication.models import Publication, PublicationMetadata, PublicationStatus
 from rest_framework.status import HTTP_400_BAD_REQUEST
 from rest_framework.views import APIView
@@ -11,15 +15,21 @@ from scraping.domain import (
     DBLPEngine,
     SearchEngine,
     SearchQuery,
+    SearchQueryParser,
     SearchTerm,
     SearchTermProcessor,
     SemanticScholarEngine,
     WebOfScienceEngine,
 )
 from scraping.interfaces.extract_metadata import PublicationMetadataExtractor
+from scraping.interfaces.full_text_search import PublicationSearch
+from scraping.interfaces.query_index import QueryIndex
+from scraping.interfaces.search_estimate import SearchCostEstimator
 from scraping.models import SearchEngineType, SearchResult, SearchResponse
 from scraping.serializers.core_serializers import (
     PublicationMetadataSerializer,
+    PublicationSearchSerializer,
+    QueryPreviewSerializer,
     SearchAndCleanSerializer,
     SearchStringDifferenceSerializer,
     ManualAddPublicationSerializer
@@ -39,69 +49,99 @@ class SearchAndCleanView(APIView):
         
         serializer = SearchAndCleanSerializer(data=request.data)
         if serializer.is_valid():
-            self.validation_papers   = serializer.validated_data['validation_papers']
-            self.search_terms  = serializer.validated_data['search_terms']
-            self.year_start    = serializer.validated_data['year_start']
-            self.year_end      = serializer.validated_data['year_end']
-            self.sources       = serializer.validated_data['sources']
-            
-            # Simple three-level search & advanced search
-            self.all_search_terms = []
-            if self.search_terms.get('primary'): self.all_search_terms.append(list(self.search_terms['primary']))
-            if self.search_terms.get('secondary'): self.all_search_terms.append(list(self.search_terms['secondary']))
-            if self.search_terms.get('tertiary'): self.all_search_terms.append(list(self.search_terms['tertiary']))
-            self.all_search_terms = list(product(*self.all_search_terms))
-            log.info("All search terms: %s", self.all_search_terms)
-
-            self.advanced_search    = self.search_terms.get('advanced')
-
-            self.query = SearchQuery(
-                search_strings  = self.all_search_terms,
-                advanced_search = self.advanced_search,
-                start_year      = self.year_start,
-                end_year        = self.year_end,
-            )
+            self.parse_query(serializer.validated_data)
 
+            # Variants only depend on the search terms, so they are generated while the engines search
+            # and matched against, and the search waits on the slowest engine instead of their sum
             self.results: List[Publication] = []
-            self.results = self.search()
-            self.all_search_words = self.generate_variants()
+            with ThreadPoolExecutor(max_workers=len(self.sources) + 1, thread_name_prefix="search-and-clean") as executor:
+                variants = executor.submit(self._in_thread, self.generate_variants)
+                self.results = self.search(executor)
+                matches = self.get_matches()
+                self.all_search_words = variants.result()
 
-            matches = self.get_matches()
             results = [result.to_dict() for result in self.results]
             response = { "query": request.data, "variations": self.all_search_words, "results": results, "matches": matches }
             response = self.save_response(response)
             return JsonResponse(response)
         return JsonResponse(serializer.errors, status=HTTP_400_BAD_REQUEST, safe=False)
 
-    def search(self) -> List[Publication]:
-        """ Search for publications using the search terms. """
-        
-        engines: List[SearchEngine] = []
+    def parse_query(self, validated_data: Dict) -> SearchQuery:
+        """ Build the search query of a validated request. """
+
+        self.validation_papers   = validated_data['validation_papers']
+        self.search_terms  = validated_data['search_terms']
+        self.year_start    = validated_data['year_start']
+        self.year_end      = validated_data['year_end']
+        self.sources       = validated_data['sources']
+
+        # Simple three-level search & advanced search
+        self.all_search_terms = []
+        if self.search_terms.get('primary'): self.all_search_terms.append(list(self.search_terms['primary']))
+        if self.search_terms.get('secondary'): self.all_search_terms.append(list(self.search_terms['secondary']))
+        if self.search_terms.get('tertiary'): self.all_search_terms.append(list(self.search_terms['tertiary']))
+        self.all_search_terms = list(product(*self.all_search_terms))
+        log.info("All search terms: %s", self.all_search_terms)
+
+        self.advanced_search    = self.search_terms.get('advanced')
+
+        self.query = SearchQuery(
+            search_strings  = self.all_search_terms,
+            advanced_search = self.advanced_search,
+            start_year      = self.year_start,
+            end_year        = self.year_end,
+        )
+        return self.query
+
+    def engines(self) -> Dict[SearchEngineType, SearchEngine]:
+        """ The engines of the requested sources, searching with the query. """
+
+        engines: Dict[SearchEngineType, SearchEngine] = {}
 
         if SearchEngineType.DBLP in self.sources:
-            engines.append(DBLPEngine(self.query))
+            engines[SearchEngineType.DBLP] = DBLPEngine(self.query)
             
         if SearchEngineType.SEMANTIC_SCHOLAR in self.sources:
-            engines.append(SemanticScholarEngine(self.query))
+            engines[SearchEngineType.SEMANTIC_SCHOLAR] = SemanticScholarEngine(self.query)
 
         if SearchEngineType.WEB_OF_SCIENCE in self.sources:
-            engines.append(WebOfScienceEngine(self.query))
+            engines[SearchEngineType.WEB_OF_SCIENCE] = WebOfScienceEngine(self.query)
+
+        return engines
+
+    def search(self, executor: ThreadPoolExecutor) -> List[Publication]:
+        """ Search for publications using the search terms, on every engine at once. """
+        
+        engines = list(self.engines().values())
+        for engine in engines:
+            engine.save_on_search = False
 
         log.info("Searching for publications: %s", self.query.search_strings)
+        searches = [executor.submit(self._in_thread, engine.search) for engine in engines]
+
+        # Only the fetches run concurrently: results are saved here, one engine after the other,
+        # and combined in engine order, so duplicates resolve as before
         results = []
-        results.extend([result for engine in engines for result in engine.search()])
+        for engine, search in zip(engines, searches):
+            results.extend(search.result())
+            engine.save_search_results()
         results = Publication.remove_duplicates(results)
         Publication.bulk_upsert(results)
         return results
 
+    @staticmethod
+    def _in_thread(func: Callable[[], Any]) -> Any:
+        """ Run a stage on a worker thread, closing the thread's database connection afterwards. """
+        try:
+            return func()
+        finally:
+            connection.close()
+
     def generate_variants(self) -> List[SearchTerm]:
         """ Generate American and British variants of the search terms. """
         log.info("Generating search term variants...")
         if self.all_search_terms == [()]:
-            words_and_quoted_phrases = r"'[^']*'|\"[^\"]*\"|\b\w+\b"
-            self.terms = re.findall(words_and_quoted_phrases, self.advanced_search)
-            self.terms = [term for term in self.terms if term.lower() not in ['and', 'or', 'not']]
-            self.all_search_terms = [[term.replace('"', '').replace("'", '') for term in self.terms]]
+            self.all_search_terms = [self.query.parsed_query.terms()]
         log.info("All search terms: %s", self.all_search_terms)
         word_processor = SearchTermProcessor(self.all_search_terms)
         word_processor.generate_variants()
@@ -132,6 +172,24 @@ class SearchAndCleanView(APIView):
         search_results.save()
         return search_results.to_dict()
 
+class SearchEstimateView(SearchAndCleanView):
+
+    def post(self, request):
+        """
+        Dry run of search-and-clean: count what every combination would return on every engine,
+        and estimate how long fetching it would take, without fetching anything.
+        """
+        if request.data.get("sources") is None:
+            request.data["sources"] = [SearchEngineType.DBLP]
+
+        serializer = SearchAndCleanSerializer(data=request.data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=HTTP_400_BAD_REQUEST)
+
+        self.parse_query(serializer.validated_data)
+        estimate = SearchCostEstimator(self.engines()).estimate()
+        return JsonResponse({ "query": request.data, **estimate })
+
 class PublicationMetadataView(APIView):
     def post(self, request):
         serializer = PublicationMetadataSerializer(data=request.data)
@@ -142,6 +200,12 @@ class PublicationMetadataView(APIView):
             
             paper_ids = serializer.validated_data['paper_ids']
             paper_ids = [paper_id for paper_id in paper_ids if paper_id.startswith('DOI')]
+            
+            if serializer.validated_data['stream']:
+                extractor = PublicationMetadataExtractor(paper_ids, extract=False)
+                records   = (json.dumps(record, cls=DjangoJSONEncoder) + "\n" for record in extractor.stream())
+                return StreamingHttpResponse(records, content_type="application/x-ndjson")
+            
             extractor = PublicationMetadataExtractor(paper_ids)
             metadata = [pub_metadata.to_dict(show_publication=True) for pub_metadata in extractor.extracted_metadata]
             failed = [publication.paper_id for _, publication in extractor.failed_papers]
@@ -271,6 +335,83 @@ class SearchStringDifferenceView(APIView):
             return [pub.to_dict() for pub in publications]
         return paper_ids
 
+class QueryPreviewView(APIView):
+
+    def post(self, request):
+        """
+        Preview what an advanced query returns among the publications already harvested,
+        without searching any engine, along with the query each engine would be sent.
+        """
+        serializer = QueryPreviewSerializer(data=request.data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=HTTP_400_BAD_REQUEST)
+
+        parser       = SearchQueryParser.compile(serializer.validated_data['query'])
+        index        = QueryIndex.current(refresh=serializer.validated_data['refresh'])
+        start_time   = time.perf_counter()
+        paper_ids    = index.search(parser)
+        elapsed      = time.perf_counter() - start_time
+        num_results  = len(paper_ids)
+        paper_ids    = paper_ids[:serializer.validated_data['limit']]
+
+        results = paper_ids
+        if serializer.validated_data['show_publication']:
+            publications = Publication.objects.in_bulk(paper_ids)
+            results = [publications[paper_id].to_dict() for paper_id in paper_ids if paper_id in publications]
+
+        return JsonResponse({
+            "query": parser.expr,
+            "search_strings": {engine.value: parser.parse(engine) for engine in SearchEngineType},
+            "num_results": num_results,
+            "results": results,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "index": index.stats(),
+        })
+
+class PublicationSearchView(APIView):
+
+    def get(self, request):
+        """
+        Full-text search over the title, abstract, authors and venue of the publications,
+        best bm25 matches first.
+
+        GET ./publication-search?q="code review" AND (LLM OR automat*)&limit=20&offset=0
+        """
+        serializer = PublicationSearchSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=HTTP_400_BAD_REQUEST)
+
+        query         = serializer.validated_data['q']
+        show_metadata = serializer.validated_data['show_metadata']
+        start_time    = time.perf_counter()
+        try:
+            matches, total = PublicationSearch().search(
+                query,
+                limit  = serializer.validated_data['limit'],
+                offset = serializer.validated_data['offset'],
+            )
+        except ValueError as e:
+            return JsonResponse({ "q": [str(e)] }, status=HTTP_400_BAD_REQUEST)
+        elapsed = time.perf_counter() - start_time
+
+        publications = Publication.objects.in_bulk([paper_id for paper_id, _ in matches])
+        metadata     = {}
+        if show_metadata:
+            metadata = {
+                pub_metadata.publication_id: pub_metadata.to_dict()
+                for pub_metadata in PublicationMetadata.objects.filter(publication__in=publications.keys())
+            }
+
+        results = []
+        for paper_id, score in matches:
+            if paper_id in publications:
+                result = { **publications[paper_id].to_dict(), "score": score }
+                if show_metadata:
+                    result["metadata"] = metadata.get(paper_id)
+                results.append(result)
+
+        return JsonResponse({ "query": query, "total": total, "results": results, "elapsed_ms": round(elapsed * 1000, 3) })
+
 class HistoricalSearchQueryResultsView(APIView):
 
     def get(self, request):
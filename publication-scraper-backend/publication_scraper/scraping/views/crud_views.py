@@ -3,7 +3,7 @@ from publication.models import Publication
 from publication_scraper.permissions import IsReadOnly, IsReadWrite
 from rest_framework import viewsets
 
-from ..filters import PublicationFilter
+from ..filters import PublicationFilter, PublicationFullTextFilter
 from ..serializers.core_serializers import PublicationSerializer
 
 
@@ -13,6 +13,7 @@ class PublicationViewSet(viewsets.ModelViewSet):
     
     Example requests:
     GET ./publication?paper_id=1234
+    GET ./publication?search="code review" AND NOT survey
     
     PUT ./publication?paper_id=1234
     {
@@ -43,7 +44,7 @@ class PublicationViewSet(viewsets.ModelViewSet):
     """
     queryset = Publication.objects.all()
     serializer_class = PublicationSerializer
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, PublicationFullTextFilter]
     filterset_class = PublicationFilter
 
     def get_permissions(self):